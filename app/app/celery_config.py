@@ -2,16 +2,41 @@
 Celery configurations.
 """
 import os
-from celery import Celery
+from celery import Celery, signals
+from celery.fixups.django import DjangoFixup, DjangoWorkerFixup
 
 from django.conf import settings
 
 from kombu import Queue, Exchange
-from mail_templated import EmailMessage
+
+from core import metrics
+
+
+class WorkerFixup(DjangoWorkerFixup):
+    """Run only the model checks when a worker starts, the other
+    checks load the URLconf and with it every view and the schema
+    generation, which tasks don't need. Web processes and CI run all
+    of them."""
+
+    def validate_models(self):
+        from django.core.checks import Tags, run_checks
+        self.django_setup()
+        run_checks(tags=[Tags.models])
+
+
+class Fixup(DjangoFixup):
+    """Celery's Django fixup, with the WorkerFixup."""
+
+    @property
+    def worker_fixup(self):
+        # Created lazily, it reads the configuration.
+        if self._worker_fixup is None:
+            self._worker_fixup = WorkerFixup(self.app)
+        return self._worker_fixup
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
-app = Celery('app')
+app = Celery('app', fixups=[lambda app: Fixup(app).install()])
 app.config_from_object(settings, namespace='CELERY')
 
 app.conf.task_queues = [
@@ -24,9 +49,37 @@ app.conf.task_default_priority = 5
 app.conf.worker_prefetch_multiplier = 1
 app.conf.worker_concurrency = 1
 
+app.conf.beat_schedule = {
+    'publish-due-posts': {
+        'task': 'app.celery_config.publish_due_posts',
+        'schedule': settings.PUBLISH_INTERVAL,
+        # A later run publishes the same posts, don't pile them up.
+        'options': {'expires': settings.PUBLISH_INTERVAL},
+    },
+}
+
+signals.task_prerun.connect(metrics.task_prerun)
+signals.task_postrun.connect(metrics.task_postrun)
+signals.task_failure.connect(metrics.task_failure)
+signals.worker_process_shutdown.connect(metrics.worker_process_shutdown)
+
+
+@signals.worker_ready.connect
+def start_metrics_server(**kwargs):
+    """Serve the worker metrics when CELERY_METRICS_PORT is set."""
+    port = os.environ.get('CELERY_METRICS_PORT')
+    if port:
+        from prometheus_client import start_http_server
+        from prometheus_client import CollectorRegistry
+        from prometheus_client.multiprocess import MultiProcessCollector
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        start_http_server(int(port), registry=registry)
+
 
 @app.task(queue='tasks')
 def send_email_activation_account(email=None, context=None):
+    from mail_templated import EmailMessage
     email_object = EmailMessage(
         'email/activation.tpl',
         {'context': context}, 'DjangoAdmin@example.com',
@@ -39,6 +92,7 @@ def send_email_activation_account(email=None, context=None):
 
 @app.task(queue='tasks')
 def send_email_reset_password(email=None, token=None, link=None):
+    from mail_templated import EmailMessage
     email_object = EmailMessage(
         'email/reset-password.tpl',
         {'token': token, 'link': link}, 'DjangoAdmin@example.com',
@@ -49,4 +103,19 @@ def send_email_reset_password(email=None, token=None, link=None):
     return 'Done'
 
 
+@app.task(queue='tasks')
+def publish_due_posts():
+    """Publish the scheduled posts which became due."""
+    # Imported here, models can't load before the app registry.
+    from core import publishing
+    return publishing.publish_due()
+
+
+@app.task(queue='tasks')
+def warm_cache(pages=None):
+    """Render the common post lists, e.g. after a cache flush."""
+    from core import warming
+    return warming.warm(pages)
+
+
 app.autodiscover_tasks()
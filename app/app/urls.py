@@ -22,7 +22,31 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
-from blog.api.v1.health_check_view import HealthCheckApiView
+from blog.api.v1.health_check_view import (
+    HealthCheckApiView,
+    LivenessApiView,
+    ReadinessApiView
+)
+from core.views import metrics_view, SchemaView, SchemaDocsView
+
+artifact_schema_urlpatterns = [
+    path('api/schema/', SchemaView.as_view(), name='api-schema'),
+    path(
+        'api/schema/<str:version>/',
+        SchemaView.as_view(),
+        name='api-schema-version'
+    ),
+    path('api/docs/', SchemaDocsView.as_view(), name='api-docs'),
+]
+# Generated on every request, for development only.
+runtime_schema_urlpatterns = [
+    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path(
+        'api/docs/',
+        SpectacularSwaggerView.as_view(url_name='api-schema'),
+        name='api-docs',
+    )
+]
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,16 +55,16 @@ urlpatterns = [
     path('cicd/health-check/',
          HealthCheckApiView.as_view(),
          name='CICD-healthy'),
+    path('health/live', LivenessApiView.as_view(), name='health-live'),
+    path('health/ready', ReadinessApiView.as_view(), name='health-ready'),
+    path('metrics', metrics_view, name='metrics'),
     path(
         'api-auth/', include('rest_framework.urls',
                              namespace='rest_framework')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path(
-        'api/docs/',
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
-        name='api-docs',
-    )
-]
+] + (
+    runtime_schema_urlpatterns if settings.OPENAPI_SCHEMA_RUNTIME
+    else artifact_schema_urlpatterns
+)
 
 if settings.DEBUG:
     urlpatterns += static(
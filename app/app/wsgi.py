@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+try:
+    import uwsgi
+except ImportError:
+    # Not served by uWSGI, e.g. runserver.
+    pass
+else:
+    from core import metrics
+    uwsgi.atexit = metrics.mark_process_dead
@@ -0,0 +1,248 @@
+"""
+Bulk create, update and delete actions for the blog viewsets.
+"""
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiTypes
+)
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core import taxonomy
+
+
+def get_or_create_named(model, user, names):
+    """Return {name: object} of a user's categories or tags,
+    creating the missing ones with a single query."""
+    existing = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    created = model.objects.bulk_create([
+        model(user=user, name=name) for name in set(names) - set(existing)
+    ])
+    if created:
+        taxonomy.invalidate(model, [])
+    existing.update({obj.name: obj for obj in created})
+    return existing
+
+
+def _item_id(item):
+    """Return the integer id of a payload item, None if invalid."""
+    if isinstance(item, dict):
+        item = item.get('id')
+    try:
+        return int(item)
+    except (TypeError, ValueError):
+        return None
+
+
+class BulkModelMixin:
+    """Add a `bulk/` route to a viewset: POST a list of objects to
+    create them, PATCH a list of objects with their id to update them
+    and DELETE a list of ids to delete them.
+
+    Items are validated one by one, the valid ones are written in a
+    single transaction and the response holds one result per item in
+    payload order. Caches are invalidated once, see `bulk_invalidate`.
+    """
+    # Lookup of the user owning an object, only owners may write it.
+    bulk_owner_field = 'user'
+
+    def get_bulk_payload(self, request):
+        """Return the list payload, enforcing BULK_MAX_BATCH_SIZE."""
+        if not isinstance(request.data, list):
+            raise ValidationError({'detail': 'Expected a list of items.'})
+        if len(request.data) > settings.BULK_MAX_BATCH_SIZE:
+            raise ValidationError({
+                'detail': f'At most {settings.BULK_MAX_BATCH_SIZE} '
+                          f'items per request.'
+            })
+        return request.data
+
+    def get_bulk_create_kwargs(self):
+        """Return the attributes set on every created object."""
+        return {'user': self.request.user}
+
+    def get_bulk_objects(self, ids):
+        """Return ({id: object} of the owned objects, ids of the
+        existing objects the user doesn't own)."""
+        queryset = self.get_queryset().filter(pk__in=ids)
+        owned = queryset.filter(
+            **{self.bulk_owner_field: self.request.user}
+        ).in_bulk()
+        forbidden = set(
+            queryset.exclude(pk__in=owned).values_list('pk', flat=True)
+        )
+        return owned, forbidden
+
+    def bulk_create_objects(self, serializers):
+        """Create the objects of validated serializers."""
+        model = self.get_queryset().model
+        return model.objects.bulk_create([
+            model(**serializer.validated_data,
+                  **self.get_bulk_create_kwargs())
+            for serializer in serializers
+        ])
+
+    def bulk_update_objects(self, serializers):
+        """Save the changes of validated serializers."""
+        fields = {'updated_at'}
+        now = timezone.now()
+        for serializer in serializers:
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+                fields.add(attr)
+            serializer.instance.updated_at = now
+        if serializers:
+            self.get_queryset().model.objects.bulk_update(
+                [serializer.instance for serializer in serializers], fields
+            )
+
+    def bulk_delete_objects(self, objs):
+        """Delete objects."""
+        self.get_queryset().model.objects.filter(
+            pk__in=[obj.pk for obj in objs]
+        ).delete()
+
+    def bulk_invalidate(self, ids):
+        """Invalidate caches once after a bulk write of ids."""
+
+    def _bulk_response(self, results, success):
+        succeeded = sum(result['status'] == success for result in results)
+        if succeeded == len(results):
+            # Deleted items report 204, but the response has a body.
+            code = success if success != status.HTTP_204_NO_CONTENT \
+                else status.HTTP_200_OK
+        elif succeeded:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=code)
+
+    def _bulk_lookup(self, index, obj_id, owned, forbidden):
+        """Return (object, None) or (None, failed result) of an id."""
+        if obj_id in owned:
+            return owned[obj_id], None
+        if obj_id in forbidden:
+            return None, {
+                'index': index, 'id': obj_id,
+                'status': status.HTTP_403_FORBIDDEN,
+                'errors': {'detail': 'You do not own this object.'}
+            }
+        return None, {
+            'index': index, 'id': obj_id,
+            'status': status.HTTP_404_NOT_FOUND,
+            'errors': {'detail': 'Not found.'}
+        }
+
+    @extend_schema(
+        request=OpenApiTypes.OBJECT, responses=OpenApiTypes.OBJECT,
+        description='Create a list of objects, '
+                    'BULK_MAX_BATCH_SIZE at most.'
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_create(self, request):
+        """Create a list of objects."""
+        payload = self.get_bulk_payload(request)
+        results = [None] * len(payload)
+        valid = []
+        for index, item in enumerate(payload):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer))
+            else:
+                results[index] = {
+                    'index': index, 'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': serializer.errors
+                }
+        with transaction.atomic():
+            objs = self.bulk_create_objects(
+                [serializer for _, serializer in valid]
+            )
+        for (index, _), obj in zip(valid, objs):
+            results[index] = {
+                'index': index, 'id': obj.pk,
+                'status': status.HTTP_201_CREATED
+            }
+        if objs:
+            self.bulk_invalidate([obj.pk for obj in objs])
+        return self._bulk_response(results, status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request=OpenApiTypes.OBJECT, responses=OpenApiTypes.OBJECT,
+        description='Partially update a list of objects holding their id.'
+    )
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """Partially update a list of objects holding their id."""
+        payload = self.get_bulk_payload(request)
+        owned, forbidden = self.get_bulk_objects(
+            [_item_id(item) for item in payload]
+        )
+        results = [None] * len(payload)
+        valid = []
+        for index, item in enumerate(payload):
+            obj, failed = self._bulk_lookup(
+                index, _item_id(item), owned, forbidden
+            )
+            if failed:
+                results[index] = failed
+                continue
+            serializer = self.get_serializer(obj, data=item, partial=True)
+            if serializer.is_valid():
+                valid.append(serializer)
+                results[index] = {
+                    'index': index, 'id': obj.pk, 'status': status.HTTP_200_OK
+                }
+            else:
+                results[index] = {
+                    'index': index, 'id': obj.pk,
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': serializer.errors
+                }
+        with transaction.atomic():
+            self.bulk_update_objects(valid)
+        if valid:
+            self.bulk_invalidate(
+                [serializer.instance.pk for serializer in valid]
+            )
+        return self._bulk_response(results, status.HTTP_200_OK)
+
+    @extend_schema(
+        request=OpenApiTypes.OBJECT, responses=OpenApiTypes.OBJECT,
+        description='Delete a list of object ids.'
+    )
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete a list of object ids."""
+        payload = self.get_bulk_payload(request)
+        owned, forbidden = self.get_bulk_objects(
+            [_item_id(item) for item in payload]
+        )
+        results = []
+        objs = {}
+        for index, item in enumerate(payload):
+            obj, failed = self._bulk_lookup(
+                index, _item_id(item), owned, forbidden
+            )
+            if failed:
+                results.append(failed)
+                continue
+            objs[obj.pk] = obj
+            results.append({
+                'index': index, 'id': obj.pk,
+                'status': status.HTTP_204_NO_CONTENT
+            })
+        with transaction.atomic():
+            self.bulk_delete_objects(list(objs.values()))
+        if objs:
+            self.bulk_invalidate(list(objs))
+        return self._bulk_response(results, status.HTTP_204_NO_CONTENT)
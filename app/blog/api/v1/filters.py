@@ -0,0 +1,105 @@
+"""
+Filtering posts by categories, tags and published date.
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+MATCHES = ('any', 'all')
+
+
+def parse_ids(value, param):
+    """Return the integers of a comma separated list of ids, raising
+    ValidationError for malformed ones or more than POST_FILTER_MAX_IDS
+    of them."""
+    try:
+        ids = {int(str_id) for str_id in value.split(',')}
+    except ValueError:
+        raise ValidationError(
+            {param: 'Expected a comma separated list of ids.'}
+        )
+    if len(ids) > settings.POST_FILTER_MAX_IDS:
+        raise ValidationError({
+            param: f'At most {settings.POST_FILTER_MAX_IDS} ids.'
+        })
+    return sorted(ids)
+
+
+def parse_moment(value, param):
+    """Return the aware datetime of an ISO 8601 date or datetime, a
+    date meaning its midnight in the current time zone, raising
+    ValidationError for malformed ones."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.combine(day, time())
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError(
+            {param: 'Expected an ISO 8601 date or datetime.'}
+        )
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class TaxonomyFilter(BaseFilterBackend):
+    """Filter posts by comma separated `categories` and `tags` ids,
+    keeping posts having any of them or, with `match=all`, all of them.
+
+    Ids are matched with EXISTS subqueries on the many to many tables
+    instead of joins, which would repeat posts having several of them
+    and need a DISTINCT over the whole result.
+    """
+    fields = ('categories', 'tags')
+
+    def filter_queryset(self, request, queryset, view):
+        match = request.query_params.get('match', 'any')
+        if match not in MATCHES:
+            raise ValidationError({'match': f'One of {", ".join(MATCHES)}.'})
+        for field in self.fields:
+            value = request.query_params.get(field)
+            if value:
+                queryset = self.filter_field(
+                    queryset, field, parse_ids(value, field), match
+                )
+        return queryset
+
+    def filter_field(self, queryset, field, ids, match):
+        m2m = getattr(queryset.model, field)
+        source = f'{m2m.field.m2m_field_name()}_id'
+        target = f'{m2m.field.m2m_reverse_field_name()}_id'
+        rows = m2m.through.objects.filter(**{source: OuterRef('pk')})
+        if match == 'any':
+            return queryset.filter(
+                Exists(rows.filter(**{f'{target}__in': ids}))
+            )
+        for obj_id in ids:
+            queryset = queryset.filter(Exists(rows.filter(**{target: obj_id})))
+        return queryset
+
+
+class PublishedRangeFilter(BaseFilterBackend):
+    """Filter posts published from `published_after`, included, and
+    before `published_before`, excluded."""
+    lookups = {
+        'published_after': 'published_date__gte',
+        'published_before': 'published_date__lt',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in self.lookups.items():
+            value = request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(
+                    **{lookup: parse_moment(value, param)}
+                )
+        return queryset
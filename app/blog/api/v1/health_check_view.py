@@ -1,5 +1,6 @@
 """
-Sample view for checking the healthy of CICD instruction.
+Sample view for checking the healthy of CICD instruction
+and liveness/readiness probes for load balancers.
 """
 from rest_framework import (
     views,
@@ -7,6 +8,8 @@ from rest_framework import (
     response
 )
 
+from core import health
+
 
 class HealthCheckApiView(views.APIView):
     """Sample class for checking whether
@@ -15,3 +18,31 @@ class HealthCheckApiView(views.APIView):
         return response.Response({
             'detail': 'DONE'
         }, status=status.HTTP_200_OK)
+
+
+class LivenessApiView(views.APIView):
+    """The process is up and serving requests,
+    dependencies are not checked."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        return response.Response({'status': 'ok'}, status=status.HTTP_200_OK)
+
+
+class ReadinessApiView(views.APIView):
+    """Database, cache and broker are reachable. Probe results
+    are cached for a few seconds to keep polling cheap."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        checks = health.readiness()
+        ready = all(check['ok'] for check in checks.values())
+        return response.Response(
+            {'status': 'ok' if ready else 'unavailable', 'checks': checks},
+            status=(
+                status.HTTP_200_OK if ready
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        )
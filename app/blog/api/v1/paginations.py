@@ -1,8 +1,16 @@
 """
 Custom paginations.
 """
+import binascii
+from base64 import b64decode, b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class Defaultpagination(pagination.PageNumberPagination):
@@ -18,3 +26,90 @@ class Defaultpagination(pagination.PageNumberPagination):
             'total_pages': self.page.paginator.num_pages,
             'results': data
         })
+
+
+class FeedPagination(pagination.BasePagination):
+    """Keyset pagination of TagFeed and CategoryFeed rows, newest
+    published first.
+
+    The cursor holds the published date and id of the last post of a
+    page, the next page is read from there in the feed index. Pages
+    cost the same at any depth, but there are no page numbers nor
+    totals, only the link to the next page.
+    """
+    page_size = Defaultpagination.page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            published_date, post_id = b64decode(
+                encoded.encode(), altchars=b'-_', validate=True
+            ).decode().split('|')
+            published_date = parse_datetime(published_date)
+            post_id = int(post_id)
+        except (TypeError, ValueError, binascii.Error):
+            published_date = None
+        if published_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return published_date, post_id
+
+    def encode_cursor(self, published_date, post_id):
+        cursor = f'{published_date.isoformat()}|{post_id}'
+        return b64encode(cursor.encode(), altchars=b'-_').decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return the post ids of a page of feed rows."""
+        self.request = request
+        cursor = self.decode_cursor(request)
+        queryset = queryset.order_by('-published_date', '-post_id')
+        if cursor is not None:
+            published_date, post_id = cursor
+            # The first filter bounds the index range, the second one
+            # skips the posts of the previous page at the same date.
+            queryset = queryset.filter(
+                published_date__lte=published_date
+            ).filter(
+                Q(published_date__lt=published_date)
+                | Q(post_id__lt=post_id)
+            )
+        rows = list(
+            queryset.values_list('published_date', 'post_id')
+            [:self.page_size + 1]
+        )
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_cursor = self.encode_cursor(*rows[-1])
+        return [post_id for _, post_id in rows]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {'next': self.get_next_link()},
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'links': {
+                    'type': 'object',
+                    'properties': {
+                        'next': {'type': 'string', 'nullable': True},
+                    },
+                },
+                'results': schema,
+            },
+        }
@@ -0,0 +1,110 @@
+"""
+Name search and autocomplete actions for the category and tag viewsets.
+"""
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes
+)
+
+from django.conf import settings
+
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core import taxonomy
+from .serializers import AutocompleteSerializer
+
+# Longer queries are truncated, names are at most 255 characters.
+MAX_QUERY_LENGTH = 100
+
+QUERY_PARAMETER = OpenApiParameter(
+    'q', OpenApiTypes.STR,
+    description='Return names starting with or similar to it.'
+)
+
+
+class TaxonomySearchMixin:
+    """List categories or tags, only the ones matching `?q=` when
+    given, and add an `autocomplete/` route returning the best matches
+    of `q` ranked by similarity, then by usage.
+
+    Results are cached per query until a category or tag changes, see
+    `core.taxonomy.search`. Usage counts may be outdated meanwhile.
+    """
+
+    def get_search_query(self):
+        """Return the stripped and truncated `q` parameter."""
+        query = self.request.query_params.get('q', '').strip()
+        return query[:MAX_QUERY_LENGTH]
+
+    def get_autocomplete_limit(self):
+        """Return the `limit` parameter, at most
+        TAXONOMY_AUTOCOMPLETE_MAX_LIMIT."""
+        limit = self.request.query_params.get(
+            'limit', settings.TAXONOMY_AUTOCOMPLETE_LIMIT
+        )
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be at least 1.'})
+        return min(limit, settings.TAXONOMY_AUTOCOMPLETE_MAX_LIMIT)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        query = self.get_search_query()
+        if self.action == 'list' and query:
+            queryset = queryset.search(query)
+        return queryset
+
+    @extend_schema(parameters=[QUERY_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        query = self.get_search_query()
+
+        def build():
+            return super(TaxonomySearchMixin, self).list(
+                request, *args, **kwargs
+            ).data
+
+        if not query:
+            return Response(taxonomy.listing(model, build))
+        return Response(
+            taxonomy.search(model, f'list:{query.upper()}', build)
+        )
+
+    @extend_schema(
+        parameters=[
+            QUERY_PARAMETER,
+            OpenApiParameter(
+                'limit', OpenApiTypes.INT,
+                description='Number of matches, '
+                            'TAXONOMY_AUTOCOMPLETE_MAX_LIMIT at most.'
+            ),
+        ],
+        responses=AutocompleteSerializer(many=True),
+        description='Best matches of q, the most used ones without q.'
+    )
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """Return the best matches of a name being typed."""
+        model = self.get_queryset().model
+        query = self.get_search_query()
+        limit = self.get_autocomplete_limit()
+
+        def build():
+            queryset = model.objects.with_usage()
+            if query:
+                queryset = queryset.search(query).order_by(
+                    '-prefix', '-similarity', '-usage', 'name'
+                )
+            else:
+                queryset = queryset.order_by('-usage', 'name')
+            return list(queryset.values('id', 'name', 'usage')[:limit])
+
+        return Response(taxonomy.search(
+            model, f'autocomplete:{limit}:{query.upper()}', build
+        ))
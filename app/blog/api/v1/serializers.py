@@ -1,8 +1,11 @@
 """
 Serializers for blog endpoints.
 """
+from drf_spectacular.extensions import OpenApiSerializerExtension
 from rest_framework import serializers
 from django.urls import reverse
+from django.utils.text import Truncator
+from core import taxonomy
 from core.models import (
     Post,
     Category,
@@ -29,6 +32,15 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class AutocompleteSerializer(serializers.Serializer):
+    """Serializer for category and tag autocomplete matches."""
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    usage = serializers.IntegerField(
+        read_only=True, help_text='Number of posts using it.'
+    )
+
+
 class PostSerializer(serializers.ModelSerializer):
     """Serializer for posts."""
     snippet = serializers.CharField(source='content_snippet', read_only=True)
@@ -107,6 +119,91 @@ class PostSerializer(serializers.ModelSerializer):
             )
 
 
+def related_by_post(m2m, post_ids):
+    """Return {post_id: [{'id': .., 'name': ..}]} for a many to many
+    relation of posts, with a single query on the through table and
+    the names from the taxonomy cache."""
+    target = f'{m2m.field.m2m_reverse_field_name()}_id'
+    rows = list(m2m.through.objects.filter(
+        post_id__in=post_ids
+    ).order_by(target).values_list('post_id', target))
+    names = taxonomy.names(
+        m2m.field.related_model, {related_id for _, related_id in rows}
+    )
+    related = {}
+    for post_id, related_id in rows:
+        if related_id in names:
+            related.setdefault(post_id, []).append(
+                {'id': related_id, 'name': names[related_id]}
+            )
+    return related
+
+
+def post_detail_url_builder(request=None):
+    """Return a function building post detail URLs, reversing
+    the route only once instead of once per post."""
+    url = reverse('blog:api-blog:post-detail', args=[0])
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    head, tail = url.rsplit('/0/', 1)
+    return lambda post_id: f'{head}/{post_id}/{tail}'
+
+
+def represent_post_rows(rows, request=None):
+    """Return the PostSerializer representation of post rows."""
+    post_ids = [row['id'] for row in rows]
+    categories = related_by_post(Post.categories, post_ids)
+    tags = related_by_post(Post.tags, post_ids)
+    detail_url = post_detail_url_builder(request)
+    return [{
+        'id': row['id'],
+        'author': row['author'],
+        'title': row['title'],
+        'snippet': Truncator(row['content_start']).words(5),
+        'categories': categories.get(row['id'], []),
+        'abs_url': detail_url(row['id']),
+        'tags': tags.get(row['id'], []),
+    } for row in rows]
+
+
+class PostListSerializer(serializers.BaseSerializer):
+    """Read only serializer for lists of posts, producing the same
+    output as PostSerializer from `.values()` rows instead of model
+    instances (see `prepare_queryset`). Categories and tags of the
+    whole page are fetched in one query each."""
+    FIELDS = ['id', 'author', 'title', 'content_start']
+
+    @classmethod
+    def prepare_queryset(cls, queryset):
+        """Turn a post queryset into the rows this serializer reads."""
+        return queryset.with_snippet_source().values(*cls.FIELDS)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs['child'] = cls()
+        return PostListRowsSerializer(*args, **kwargs)
+
+    def to_representation(self, row):
+        return represent_post_rows([row], self.context.get('request'))[0]
+
+
+class PostListSerializerSchema(OpenApiSerializerExtension):
+    """Document PostListSerializer with the fields of PostSerializer,
+    whose output it reproduces."""
+    target_class = PostListSerializer
+
+    def map_serializer(self, auto_schema, direction):
+        return auto_schema._map_serializer(PostSerializer(), direction)
+
+
+class PostListRowsSerializer(serializers.ListSerializer):
+    """Many=True counterpart of PostListSerializer, batching the
+    category and tag queries over all rows."""
+
+    def to_representation(self, data):
+        return represent_post_rows(list(data), self.context.get('request'))
+
+
 class PostDetailSerializer(PostSerializer):
     """Serializer for posts detail's."""
 
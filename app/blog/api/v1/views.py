@@ -8,14 +8,18 @@ from drf_spectacular.utils import (
     OpenApiTypes
 )
 
-from django.core.cache import cache
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import urlencode
 
 from rest_framework.filters import (
     SearchFilter,
     OrderingFilter
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import (
     viewsets,
@@ -23,22 +27,34 @@ from rest_framework import (
     status
 )
 
-from django_filters.rest_framework import DjangoFilterBackend
-
+from core import feeds, post_cache, taxonomy
 from core.models import (
+    EXPORT_FIELDS,
     Post,
     Profile,
     Category,
     Tag,
-    Comment
+    Comment,
+    TagFeed,
+    CategoryFeed
+)
+from .bulk import BulkModelMixin, get_or_create_named
+from core.renderers import CSVRenderer, NDJSONRenderer
+from .filters import (
+    MATCHES,
+    PublishedRangeFilter,
+    TaxonomyFilter,
+    parse_ids
 )
-from .paginations import Defaultpagination
+from .paginations import Defaultpagination, FeedPagination
+from .search import TaxonomySearchMixin
 from .permissions import (
     IsOwnerOrReadOnlyProfile,
     IsOwnerOrReadOnlyUser,
 )
 from .serializers import (
     PostSerializer,
+    PostListSerializer,
     PostDetailSerializer,
     CategorySerializer,
     TagSerializer,
@@ -47,9 +63,25 @@ from .serializers import (
     ImageSerializer
 )
 
+PUBLISHED_RANGE_PARAMETERS = [
+    OpenApiParameter(
+        'published_after',
+        OpenApiTypes.DATETIME,
+        description='Keep posts published from this ISO 8601 date \
+        or datetime.'
+    ),
+    OpenApiParameter(
+        'published_before',
+        OpenApiTypes.DATETIME,
+        description='Keep posts published before this ISO 8601 date \
+        or datetime.'
+    ),
+]
+
 
 @extend_schema_view(
     list=extend_schema(
+        responses=PostSerializer,
         parameters=[
             OpenApiParameter(
                 'tags',
@@ -62,22 +94,32 @@ from .serializers import (
                 OpenApiTypes.STR,
                 description='Comma seprated list of category \
                 IDs to filter posts by them.'
-            )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR,
+                enum=MATCHES,
+                description='Keep posts having any (the default) or all \
+                of the tags and of the categories.'
+            ),
+            *PUBLISHED_RANGE_PARAMETERS
         ]
     )
 )
-class PostModelViewSet(viewsets.ModelViewSet):
+class PostModelViewSet(BulkModelMixin, viewsets.ModelViewSet):
     """CRUD for post's endpoints."""
     serializer_class = PostDetailSerializer
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnlyProfile
         ]
-    queryset = Post.objects.filter(status=True).order_by('-id')
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['categories', 'tags']
+    queryset = Post.objects.published().order_by('-id')
+    filter_backends = [
+        TaxonomyFilter, PublishedRangeFilter, SearchFilter, OrderingFilter
+    ]
     search_fields = ['title', 'content']
     ordering_fields = ['published_date']
     pagination_class = Defaultpagination
+    bulk_owner_field = 'author__user'
 
     def list(self, request, *args, **kwargs):
         """
@@ -85,41 +127,236 @@ class PostModelViewSet(viewsets.ModelViewSet):
         explained that to invalidate cache when saving,
         deleting or updating post objects in core/models.py
         """
-        cached_data = cache.get('post_objects')
-        if cached_data:
-            return Response(cached_data)
-        response = super().list(request, *args, **kwargs)
-        cache.set('post_objects', response.data)
+        variant = self.get_cache_variant(request)
+        if request.accepted_renderer.format != 'json' or variant is None:
+            return super().list(request, *args, **kwargs)
+        generation, (content, content_type) = post_cache.get_or_build(
+            lambda: self._render_list(request, *args, **kwargs), variant
+        )
+        response = HttpResponse(content, content_type=content_type)
+        # Compressed bodies are cached along with the list.
+        response.compression_cache_key = (
+            f'{post_cache.key(variant)}:{generation}'
+        )
         return response
 
-    def _get_params_to_int(self, qs):
-        """Convert comma seprated string to splited integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+    def get_cache_variant(self, request):
+        """Return the post_cache variant of a list request, None when
+        it isn't cached: searches, unknown orderings and pages past
+        POST_LIST_CACHE_PAGES. Equivalent filters share a variant."""
+        params = request.query_params
+        cached_params = {'page', 'ordering', 'match', *TaxonomyFilter.fields}
+        orderings = {
+            None, *self.ordering_fields,
+            *(f'-{field}' for field in self.ordering_fields)
+        }
+        try:
+            page = int(params.get('page', 1))
+        except ValueError:
+            return None
+        if not set(params) <= cached_params \
+                or not 1 <= page <= settings.POST_LIST_CACHE_PAGES \
+                or params.get('match', 'any') not in MATCHES \
+                or params.get('ordering') not in orderings:
+            return None
+        variant = {
+            field: ','.join(map(str, parse_ids(params[field], field)))
+            for field in TaxonomyFilter.fields if params.get(field)
+        }
+        if variant and params.get('match', 'any') != 'any':
+            variant['match'] = params['match']
+        if params.get('ordering'):
+            variant['ordering'] = params['ordering']
+        if page != 1:
+            variant['page'] = page
+        return urlencode(sorted(variant.items()))
+
+    def _render_list(self, request, *args, **kwargs):
+        """Return the rendered body and content type of the list, hits
+        are then served as they are, without unpickling nor rendering
+        the serialized posts again."""
+        response = self.finalize_response(
+            request, super().list(request, *args, **kwargs), *args, **kwargs
+        )
+        response.render()
+        return response.content, response['Content-Type']
 
     def get_queryset(self):
-        tags = self.request.query_params.get('tags')
-        categories = self.request.query_params.get('categories')
+        """Categories and tags are filtered by TaxonomyFilter."""
         queryset = self.queryset
-        if tags:
-            tags_id = self._get_params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
-        if categories:
-            categories_id = self._get_params_to_int(categories)
-            queryset = queryset.filter(categories__id__in=categories_id)
-        return queryset.distinct()
+        if self.action in ('list', 'feed'):
+            queryset = PostListSerializer.prepare_queryset(queryset)
+        elif self.action == 'export':
+            queryset = queryset.for_export()
+        return queryset
 
     def perform_create(self, serializer):
         profile = Profile.objects.get(user=self.request.user)
         serializer.save(author=profile)
 
+    def get_bulk_create_kwargs(self):
+        return {'author': Profile.objects.get(user=self.request.user)}
+
+    def bulk_create_objects(self, serializers):
+        taxonomies = [self._pop_taxonomies(s, []) for s in serializers]
+        posts = super().bulk_create_objects(serializers)
+        self._set_taxonomies(posts, taxonomies)
+        # Bulk writes skip the hooks and signals refreshing the feeds.
+        feeds.refresh([post.id for post in posts])
+        return posts
+
+    def bulk_update_objects(self, serializers):
+        taxonomies = [self._pop_taxonomies(s, None) for s in serializers]
+        super().bulk_update_objects(serializers)
+        self._set_taxonomies(
+            [s.instance for s in serializers], taxonomies, replace=True
+        )
+        feeds.refresh([s.instance.id for s in serializers])
+
+    def bulk_invalidate(self, ids):
+        # bulk_create and queryset deletes skip the lifecycle hooks.
+        post_cache.invalidate()
+
+    def _pop_taxonomies(self, serializer, default):
+        return {
+            field: serializer.validated_data.pop(field, default)
+            for field in ('categories', 'tags')
+        }
+
+    def _set_taxonomies(self, posts, taxonomies, replace=False):
+        """Assign the categories and tags of many posts, getting or
+        creating them by name like PostSerializer does."""
+        for field, model in (('categories', Category), ('tags', Tag)):
+            assigned = {
+                post.id: {item['name'] for item in names[field]}
+                for post, names in zip(posts, taxonomies)
+                if names[field] is not None
+            }
+            if not assigned:
+                continue
+            objs = get_or_create_named(
+                model, self.request.user, set().union(*assigned.values())
+            )
+            m2m = getattr(Post, field)
+            target = f'{m2m.field.m2m_reverse_field_name()}_id'
+            if replace:
+                m2m.through.objects.filter(post_id__in=assigned).delete()
+            m2m.through.objects.bulk_create([
+                m2m.through(post_id=post_id, **{target: objs[name].id})
+                for post_id, names in assigned.items() for name in names
+            ])
+
     def get_serializer_class(self):
         """Retrieving various serializers for various methods."""
-        if self.action == 'list':
-            return PostSerializer
+        if self.action in ('list', 'feed'):
+            return PostListSerializer
         elif self.action == 'upload_image':
             return ImageSerializer
         return PostDetailSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'tag', OpenApiTypes.INT, description='Id of the tag.'
+            ),
+            OpenApiParameter(
+                'category', OpenApiTypes.INT,
+                description='Id of the category.'
+            ),
+            OpenApiParameter(
+                'cursor', OpenApiTypes.STR,
+                description='Position of the page, from the next link.'
+            ),
+        ],
+        responses=PostListSerializer(many=True),
+        description='Published posts of a tag or category, newest first.'
+    )
+    @action(methods=['GET'], detail=False, pagination_class=FeedPagination)
+    def feed(self, request):
+        """Published posts of a tag or category, read from their feed
+        with keyset pagination, see core/feeds.py."""
+        params = [
+            (param, feed) for param, feed in (
+                ('tag', TagFeed), ('category', CategoryFeed)
+            ) if param in request.query_params
+        ]
+        if len(params) != 1:
+            raise ValidationError(
+                {'detail': 'Expected either a tag or a category.'}
+            )
+        (param, feed), = params
+        try:
+            obj_id = int(request.query_params[param])
+        except ValueError:
+            raise ValidationError({param: 'A valid integer is required.'})
+
+        post_ids = self.paginate_queryset(
+            feed.objects.filter(**{f'{param}_id': obj_id})
+        )
+        rows = {
+            row['id']: row
+            for row in self.get_queryset().filter(id__in=post_ids)
+        }
+        serializer = self.get_serializer(
+            [rows[post_id] for post_id in post_ids if post_id in rows],
+            many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'tags', OpenApiTypes.STR,
+                description='Comma seprated list of tag IDs.'
+            ),
+            OpenApiParameter(
+                'categories', OpenApiTypes.STR,
+                description='Comma seprated list of category IDs.'
+            ),
+            OpenApiParameter('match', OpenApiTypes.STR, enum=MATCHES),
+            *PUBLISHED_RANGE_PARAMETERS,
+        ],
+        responses=OpenApiTypes.STR,
+        description='Every published post matching the filters, as NDJSON \
+        (the default) or CSV with `?format=csv`. Authenticated users only.'
+    )
+    @action(
+        methods=['GET'], detail=False, pagination_class=None,
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def export(self, request):
+        """Stream the filtered posts, whatever their number.
+
+        Exports hold a worker for as long as they stream, they're for
+        authenticated users only and exempted from uWSGI's harakiri,
+        see scripts/uwsgi/base.ini.
+
+        Rows are read from a server-side cursor POST_EXPORT_CHUNK_SIZE at
+        a time and rendered as they come, so memory doesn't grow with
+        the export. The cursor is read in a transaction: outside of one
+        PostgreSQL would materialize the whole result before the first
+        row, and it's a consistent snapshot of the posts.
+        """
+        renderer = request.accepted_renderer
+        rows = self.filter_queryset(self.get_queryset())
+
+        def stream():
+            with transaction.atomic():
+                yield from renderer.stream(
+                    rows.iterator(chunk_size=settings.POST_EXPORT_CHUNK_SIZE),
+                    EXPORT_FIELDS, settings.POST_EXPORT_CHUNK_SIZE
+                )
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        response = StreamingHttpResponse(stream(), content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="posts.{renderer.format}"'
+        )
+        return response
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """New method for uploading image for posts."""
@@ -132,7 +369,9 @@ class PostModelViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CategoryModelViewSet(viewsets.ModelViewSet):
+class CategoryModelViewSet(
+    TaxonomySearchMixin, BulkModelMixin, viewsets.ModelViewSet
+):
     """CRUD for categories endpoints."""
     serializer_class = CategorySerializer
     queryset = Category.objects.all().order_by('-name')
@@ -145,8 +384,15 @@ class CategoryModelViewSet(viewsets.ModelViewSet):
         user = get_user_model().objects.get(id=self.request.user.id)
         serializer.save(user=user)
 
+    def bulk_invalidate(self, ids):
+        # bulk_create and bulk_update skip the signals.
+        taxonomy.invalidate(Category, ids)
+        post_cache.invalidate()
+
 
-class TagModelViewSet(viewsets.ModelViewSet):
+class TagModelViewSet(
+    TaxonomySearchMixin, BulkModelMixin, viewsets.ModelViewSet
+):
     """CRUD for tags endpoints."""
     serializer_class = TagSerializer
     queryset = Tag.objects.all().order_by('-name')
@@ -159,8 +405,13 @@ class TagModelViewSet(viewsets.ModelViewSet):
         user = get_user_model().objects.get(id=self.request.user.id)
         serializer.save(user=user)
 
+    def bulk_invalidate(self, ids):
+        # bulk_create and bulk_update skip the signals.
+        taxonomy.invalidate(Tag, ids)
+        post_cache.invalidate()
+
 
-class CommentModelViewSet(viewsets.ModelViewSet):
+class CommentModelViewSet(BulkModelMixin, viewsets.ModelViewSet):
     """CRUD for comments endpoints."""
     serializer_class = CommentDetailSerializer
     queryset = Comment.objects.all().order_by('-comment')
@@ -172,6 +423,13 @@ class CommentModelViewSet(viewsets.ModelViewSet):
         user = self.request.user
         serializer.save(user=user)
 
+    def get_queryset(self):
+        """Leave full comments out of lists, they only show a snippet."""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.with_snippet_source()
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return CommentSerializer
@@ -0,0 +1,223 @@
+"""
+Test bulk API's.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Profile,
+    Post,
+    Category,
+    Tag,
+    Comment,
+    TagFeed
+)
+
+
+BULK_POST_URL = reverse('blog:api-blog:post-bulk-create')
+BULK_TAG_URL = reverse('blog:api-blog:tag-bulk-create')
+BULK_COMMENT_URL = reverse('blog:api-blog:comment-bulk-create')
+
+
+def create_user(email='Test@example.com', password='T123@example'):
+    """Create and return a sample user."""
+    return get_user_model().objects.create_user(
+        email=email, password=password
+    )
+
+
+def create_post(author, **params):
+    """Create and return a sample post."""
+    defaults = {
+        'title': 'Sample title',
+        'content': 'Sample content',
+        'published_date': "2023-10-12T16:48:32.691Z",
+        'status': True
+    }
+    defaults.update(**params)
+    return Post.objects.create(author=author, **defaults)
+
+
+def post_payload(title, **params):
+    """Return the payload of a post for bulk requests."""
+    payload = {
+        'title': title,
+        'content': 'Sample content',
+        'published_date': '2023-10-12T16:48:32.691Z',
+        'status': True,
+        'categories': [],
+        'tags': []
+    }
+    payload.update(**params)
+    return payload
+
+
+class PublicBulkTests(TestCase):
+    """Test unauthenticated bulk requests."""
+
+    def test_bulk_create_unauthenticated_unsuccessfully(self):
+        """Test bulk writes require authentication."""
+        res = APIClient().post(BULK_TAG_URL, [{'name': 'a'}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBulkTests(TestCase):
+    """Test authenticated bulk requests."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.profile = Profile.objects.get(user=self.user)
+
+    def test_bulk_create_posts_with_shared_tags(self):
+        """Test creating posts whose tags and categories are
+        created once and shared."""
+        Tag.objects.create(user=self.user, name='Python')
+        payload = [
+            post_payload(
+                f'Post {index}',
+                tags=[{'name': 'Python'}, {'name': 'Django'}],
+                categories=[{'name': 'Web'}]
+            ) for index in range(3)
+        ]
+
+        with patch('core.post_cache.invalidate') as mock_invalidate:
+            res = self.client.post(BULK_POST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result['index'] for result in res.data['results']], [0, 1, 2]
+        )
+        mock_invalidate.assert_called_once_with()
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Category.objects.filter(user=self.user).count(), 1)
+        for result in res.data['results']:
+            post = Post.objects.get(id=result['id'])
+            self.assertEqual(post.author, self.profile)
+            self.assertEqual(
+                sorted(post.tags.values_list('name', flat=True)),
+                ['Django', 'Python']
+            )
+
+    def test_bulk_create_reports_invalid_items(self):
+        """Test valid items are created and invalid ones reported."""
+        payload = [{'name': 'Valid'}, {'name': ''}]
+
+        res = self.client.post(BULK_TAG_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        valid, invalid = res.data['results']
+        self.assertEqual(valid['status'], status.HTTP_201_CREATED)
+        self.assertEqual(invalid['status'], status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', invalid['errors'])
+        self.assertTrue(Tag.objects.filter(id=valid['id']).exists())
+
+    @override_settings(BULK_MAX_BATCH_SIZE=2)
+    def test_bulk_create_over_max_batch_size(self):
+        """Test rejecting payloads larger than BULK_MAX_BATCH_SIZE."""
+        payload = [{'name': str(index)} for index in range(3)]
+
+        res = self.client.post(BULK_TAG_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_create_requires_a_list(self):
+        """Test rejecting payloads which aren't lists."""
+        res = self.client.post(BULK_TAG_URL, {'name': 'a'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_posts(self):
+        """Test updating owned posts, refusing others' posts
+        and reporting unknown ids."""
+        other_user = create_user(email='other@example.com')
+        own = create_post(self.profile)
+        other = create_post(Profile.objects.get(user=other_user))
+        own.tags.add(Tag.objects.create(user=self.user, name='Old'))
+        payload = [
+            {'id': own.id, 'title': 'Edited', 'tags': [{'name': 'New'}]},
+            {'id': other.id, 'title': 'Edited'},
+            {'id': 0, 'title': 'Edited'},
+        ]
+
+        res = self.client.patch(BULK_POST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['status'] for result in res.data['results']],
+            [status.HTTP_200_OK, status.HTTP_403_FORBIDDEN,
+             status.HTTP_404_NOT_FOUND]
+        )
+        own.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(own.title, 'Edited')
+        self.assertEqual(
+            list(own.tags.values_list('name', flat=True)), ['New']
+        )
+        self.assertEqual(
+            list(TagFeed.objects.filter(post=own).values_list(
+                'tag__name', flat=True
+            )), ['New']
+        )
+        self.assertEqual(other.title, 'Sample title')
+
+    def test_bulk_update_comments(self):
+        """Test updating comments keeps unchanged fields."""
+        post = create_post(self.profile)
+        comments = [
+            Comment.objects.create(
+                post_obj=post, user=self.user, comment=f'Comment {index}'
+            ) for index in range(2)
+        ]
+        payload = [
+            {'id': comment.id, 'comment': 'Edited'} for comment in comments
+        ]
+
+        res = self.client.patch(BULK_COMMENT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for comment in comments:
+            comment.refresh_from_db()
+            self.assertEqual(comment.comment, 'Edited')
+            self.assertEqual(comment.post_obj, post)
+
+    def test_bulk_delete_posts(self):
+        """Test deleting owned posts only."""
+        other_user = create_user(email='other@example.com')
+        own = [create_post(self.profile) for _ in range(2)]
+        other = create_post(Profile.objects.get(user=other_user))
+
+        with patch('core.post_cache.invalidate') as mock_invalidate:
+            res = self.client.delete(
+                BULK_POST_URL, [own[0].id, own[1].id, other.id],
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        mock_invalidate.assert_called_once_with()
+        self.assertFalse(
+            Post.objects.filter(id__in=[post.id for post in own]).exists()
+        )
+        self.assertTrue(Post.objects.filter(id=other.id).exists())
+
+    def test_bulk_update_tags_invalidates_their_names(self):
+        """Test renaming tags drops their cached names only."""
+        renamed = Tag.objects.create(user=self.user, name='Old')
+        Tag.objects.create(user=self.user, name='Kept')
+
+        with patch('core.taxonomy.invalidate') as mock_invalidate:
+            res = self.client.patch(
+                BULK_TAG_URL, [{'id': renamed.id, 'name': 'New'}],
+                format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_invalidate.assert_called_once_with(Tag, [renamed.id])
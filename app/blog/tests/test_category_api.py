@@ -55,6 +55,19 @@ class PublicUserCategoryTests(TestCase):
         self.assertEqual(res.data, serializer.data)
         self.assertEqual(len(res.data), 2)
 
+    def test_search_categories(self):
+        """Test listing the categories matching q only."""
+        sample_user = create_user()
+        create_category(user=sample_user, name='Programming')
+        create_category(user=sample_user, name='Travel')
+
+        res = self.client.get(LIST_CATEGORY_URL, {'q': 'prog'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [category['name'] for category in res.data], ['Programming']
+        )
+
     def test_retrieve_detail_category_successfully(self):
         """Test retrieving category detail with unauthenticated
         without deleting and updating permissions."""
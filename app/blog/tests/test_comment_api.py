@@ -1,7 +1,9 @@
 """
 Test comment API.s.
 """
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -81,6 +83,25 @@ class PublicUserTagTests(TestCase):
         self.assertEqual(res.data, serializer.data)
         self.assertEqual(len(res.data), 2)
 
+    def test_list_comments_selects_only_comment_start(self):
+        """Test listing comments doesn't load whole comments
+        and still returns their snippet."""
+        sample_user = create_user()
+        sample_profile = Profile.objects.get(user=sample_user)
+        sample_post = create_post(author=sample_profile)
+        create_comment(
+            post_obj=sample_post, user=sample_user,
+            comment='one two three four five six ' + 'x' * 900
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(LIST_COMMENT_URL)
+
+        self.assertEqual(res.data[0]['snippet'], 'one two three four five…')
+        columns = queries.captured_queries[-1]['sql'].split(' FROM ')[0]
+        self.assertIn('SUBSTRING("core_comment"."comment", 1, 200)', columns)
+        self.assertEqual(columns.count('"core_comment"."comment"'), 1)
+
     def test_retrieve_detail_comment_unsuccessfully(self):
         """Test retrieving comment detail
         with unauthenticated unsuccessfully."""
@@ -174,7 +195,7 @@ class PrivateUserCommentTests(TestCase):
         """Test creating comments with authenticated successfully."""
         sample_post = create_post(author=self.profile)
         payload = {
-            'post_obj': 1,
+            'post_obj': sample_post.id,
             'comment': 'Sample comment'
         }
         res = self.client.post(LIST_COMMENT_URL, payload)
@@ -182,7 +203,7 @@ class PrivateUserCommentTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(sample_post.author, self.profile)
         self.assertTrue(Comment.objects.filter(
-            post_obj=1, comment='Sample comment'
+            post_obj=sample_post, comment='Sample comment'
             ).exists())
 
     def test_update_comment_authenticated_user_successfully(self):
@@ -2,14 +2,20 @@
 Test for checking whether the CICD
 instruction works correctly or not.
 """
-from django.test import SimpleTestCase
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import health
+
 
 HEALTH_CHECK_CICD_URL = reverse('CICD-healthy')
+HEALTH_LIVE_URL = reverse('health-live')
+HEALTH_READY_URL = reverse('health-ready')
 
 
 class Test(SimpleTestCase):
@@ -22,3 +28,46 @@ class Test(SimpleTestCase):
 
         res = self.client.get(HEALTH_CHECK_CICD_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class HealthProbeTests(TestCase):
+    """Test liveness and readiness endpoints."""
+    def setUp(self):
+        self.client = APIClient()
+        health.reset()
+        self.addCleanup(health.reset)
+
+    def test_liveness(self):
+        """Test liveness without checking dependencies."""
+        with patch.dict(health.PROBES, clear=True):
+            res = self.client.get(HEALTH_LIVE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_readiness_ok(self):
+        """Test readiness when every dependency is reachable."""
+        res = self.client.get(HEALTH_READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['checks']['database']['ok'])
+        self.assertTrue(res.data['checks']['cache']['ok'])
+
+    def test_readiness_unavailable(self):
+        """Test returning 503 when a dependency is down."""
+        def broken():
+            raise ConnectionError('down')
+
+        with patch.dict(health.PROBES, {'broker': broken}):
+            res = self.client.get(HEALTH_READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(res.data['checks']['broker']['ok'])
+
+    def test_readiness_is_cached(self):
+        """Test probing dependencies once within the cache period."""
+        calls = []
+        with patch.dict(health.PROBES, {'cache': lambda: calls.append(1)}):
+            self.client.get(HEALTH_READY_URL)
+            self.client.get(HEALTH_READY_URL)
+
+        self.assertEqual(len(calls), 1)
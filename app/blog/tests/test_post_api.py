@@ -1,26 +1,36 @@
 """
 Test post API's.
 """
+import csv
+import io
+import json
 import os
 import tempfile
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from django.test import TestCase
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
 
+from core import post_cache
 from core.models import (
     Profile,
     Post,
     Category,
-    Tag
+    Tag,
+    TagFeed
 )
+from blog.api.v1.serializers import PostSerializer, PostListSerializer
 
 
 LIST_POST_URL = reverse('blog:api-blog:post-list')
+FEED_POST_URL = reverse('blog:api-blog:post-feed')
+EXPORT_POST_URL = reverse('blog:api-blog:post-export')
 
 
 def post_detail_url(post_id):
@@ -70,6 +80,74 @@ class PublicUserPostTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_list_serializer_matches_post_serializer(self):
+        """Test the list serializer reading `.values()` rows
+        returns the same output as PostSerializer."""
+        sample_user = create_user(
+            email='Test@example.com', password='T123@example'
+            )
+        profile = Profile.objects.get(user=sample_user)
+        first = create_post(author=profile, content='a b c d e f g')
+        create_post(author=profile, content='short')
+        first.tags.add(
+            Tag.objects.create(user=sample_user, name='b'),
+            Tag.objects.create(user=sample_user, name='a'),
+        )
+        first.categories.add(
+            Category.objects.create(user=sample_user, name='Django')
+        )
+        queryset = Post.objects.order_by('-id')
+        context = {'request': Request(APIRequestFactory().get('/'))}
+
+        expected = PostSerializer(
+            queryset, many=True, context=context
+        ).data
+        result = PostListSerializer(
+            PostListSerializer.prepare_queryset(queryset),
+            many=True, context=context
+        ).data
+
+        self.assertEqual(
+            [dict(post) for post in expected], result
+        )
+
+    def test_list_posts_queries_do_not_grow_with_page(self):
+        """Test listing posts runs a fixed number of queries."""
+        sample_user = create_user(
+            email='Test@example.com', password='T123@example'
+            )
+        profile = Profile.objects.get(user=sample_user)
+        tag = Tag.objects.create(user=sample_user, name='Python')
+        for _ in range(5):
+            create_post(author=profile).tags.add(tag)
+        # Invalidations wait for a commit which never comes in tests.
+        cache.delete('post_objects')
+        self.client.get(LIST_POST_URL)
+        cache.delete('post_objects')
+
+        # Tag names now come from the taxonomy cache.
+        with self.assertNumQueries(4):
+            res = self.client.get(LIST_POST_URL)
+
+        self.assertEqual(res.json()['total_posts'], 5)
+
+    def test_list_posts_served_from_cached_bytes(self):
+        """Test a cached post list is returned without any query."""
+        sample_user = create_user(
+            email='Test@example.com', password='T123@example'
+            )
+        create_post(author=Profile.objects.get(user=sample_user))
+        cache.delete('post_objects')
+        first = self.client.get(LIST_POST_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(LIST_POST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res.content, first.content)
+        self.assertEqual(res.json()['total_posts'], 1)
+
     def test_create_post_without_authentication(self):
         """Test POST method for creating posts without authentication."""
         res = self.client.post(LIST_POST_URL, {})
@@ -109,6 +187,263 @@ class PublicUserPostTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class PostFilterTests(TestCase):
+    """Test filtering posts by categories and tags."""
+    def setUp(self):
+        # Filtered lists are cached too, entries of earlier tests
+        # are outdated.
+        post_cache.bump_generation()
+        self.client = APIClient()
+        user = create_user(email='Test@example.com', password='T123@example')
+        profile = Profile.objects.get(user=user)
+        self.python = Tag.objects.create(user=user, name='Python')
+        self.django = Tag.objects.create(user=user, name='Django')
+        self.web = Category.objects.create(user=user, name='Web')
+        self.python_post = create_post(profile)
+        self.python_post.tags.add(self.python)
+        self.both_post = create_post(profile)
+        self.both_post.tags.add(self.python, self.django)
+        self.both_post.categories.add(self.web)
+        self.django_post = create_post(profile)
+        self.django_post.tags.add(self.django)
+
+    def filter_posts(self, **params):
+        res = self.client.get(LIST_POST_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json()
+
+    def test_filter_posts_having_any_tag(self):
+        """Test keeping posts having any of the tags, once."""
+        data = self.filter_posts(tags=f'{self.python.id},{self.django.id}')
+
+        self.assertEqual(data['total_posts'], 3)
+
+    def test_filter_posts_having_all_tags(self):
+        """Test keeping posts having every tag with match=all."""
+        data = self.filter_posts(
+            tags=f'{self.python.id},{self.django.id}', match='all'
+        )
+
+        self.assertEqual(data['total_posts'], 1)
+        self.assertEqual(data['results'][0]['id'], self.both_post.id)
+
+    def test_filter_posts_by_tags_and_categories(self):
+        """Test categories and tags filters both apply."""
+        data = self.filter_posts(
+            tags=str(self.django.id), categories=str(self.web.id)
+        )
+
+        self.assertEqual(data['total_posts'], 1)
+        self.assertEqual(data['results'][0]['id'], self.both_post.id)
+
+    def test_equivalent_filters_share_cached_list(self):
+        """Test filtered pages are cached once for the same ids in any
+        order, searches aren't cached."""
+        self.filter_posts(tags=f'{self.python.id},{self.django.id}')
+
+        with self.assertNumQueries(0):
+            data = self.filter_posts(
+                tags=f'{self.django.id},{self.python.id}'
+            )
+        self.assertEqual(data['total_posts'], 3)
+        self.filter_posts(search='Sample')
+        with self.assertNumQueries(4):
+            self.filter_posts(search='Sample')
+
+    def test_filter_posts_with_invalid_params(self):
+        """Test malformed ids and matches are rejected, not a 500."""
+        for params in (
+            {'tags': '1,x'}, {'categories': ','}, {'match': 'some'},
+            {'tags': ','.join(str(index) for index in range(21))},
+        ):
+            res = self.client.get(LIST_POST_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PostFeedTests(TestCase):
+    """Test the feeds of tags and categories."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='Test@example.com', password='T123@example'
+        )
+        self.profile = Profile.objects.get(user=self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Python')
+
+    def create_tagged_posts(self, count):
+        """Create posts published a day apart, oldest first."""
+        posts = []
+        for day in range(1, count + 1):
+            post = create_post(
+                self.profile, published_date=f'2023-10-{day:02}T10:00:00Z'
+            )
+            post.tags.add(self.tag)
+            posts.append(post)
+        return posts
+
+    def test_feed_pages_follow_published_date(self):
+        """Test browsing a tag feed newest first with cursors."""
+        posts = self.create_tagged_posts(5)
+        seen = []
+        url = FEED_POST_URL + f'?tag={self.tag.id}'
+
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            data = res.json()
+            seen.extend(post['id'] for post in data['results'])
+            url = data['links']['next']
+
+        self.assertEqual(seen, [post.id for post in reversed(posts)])
+
+    def test_feed_follows_post_changes(self):
+        """Test feeds follow tags, status and published dates."""
+        first, second = self.create_tagged_posts(2)
+        other = create_post(self.profile)
+
+        first.status = False
+        first.save()
+        other.tags.add(self.tag)
+        second.tags.remove(self.tag)
+        Post.objects.filter(id=other.id).update(
+            published_date='2024-01-01T00:00:00Z'
+        )
+        res = self.client.get(FEED_POST_URL, {'tag': self.tag.id})
+
+        self.assertEqual(
+            [post['id'] for post in res.json()['results']], [other.id]
+        )
+        self.assertEqual(
+            TagFeed.objects.get(post=other).published_date.year, 2024
+        )
+
+    def test_scheduled_posts_are_hidden(self):
+        """Test posts published in the future stay out of the list,
+        detail and feeds."""
+        post = create_post(self.profile, published_date='2999-01-01T00:00Z')
+        post.tags.add(self.tag)
+        cache.delete('post_objects')
+
+        res = self.client.get(LIST_POST_URL)
+        self.assertEqual(res.json()['total_posts'], 0)
+        res = self.client.get(post_detail_url(post.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(FEED_POST_URL, {'tag': self.tag.id})
+        self.assertEqual(res.json()['results'], [])
+
+    def test_feed_with_invalid_params(self):
+        """Test rejecting missing, ambiguous or malformed params."""
+        for params in ({}, {'tag': 1, 'category': 1}, {'tag': 'x'}):
+            res = self.client.get(FEED_POST_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(FEED_POST_URL, {'tag': 1, 'cursor': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostExportTests(TestCase):
+    """Test streaming the posts as NDJSON and CSV."""
+    def setUp(self):
+        self.client = APIClient()
+        user = create_user(email='Test@example.com', password='T123@example')
+        profile = Profile.objects.get(user=user)
+        self.python = Tag.objects.create(user=user, name='Python')
+        self.web = Category.objects.create(user=user, name='Web')
+        self.old_post = create_post(
+            profile, published_date='2023-01-10T12:00:00Z'
+        )
+        self.new_post = create_post(
+            profile, title='Sample, "quoted"',
+            published_date='2023-06-10T12:00:00Z'
+        )
+        self.new_post.tags.add(self.python)
+        self.new_post.categories.add(self.web)
+        create_post(profile, status=False)
+        self.client.force_authenticate(user)
+
+    def export(self, **params):
+        res = self.client.get(EXPORT_POST_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_requires_authentication(self):
+        """Test refusing exports to anonymous users."""
+        self.client.force_authenticate(None)
+
+        res = self.client.get(EXPORT_POST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(res.streaming)
+
+    def test_export_ndjson(self):
+        """Test exporting published posts, one JSON object per line."""
+        with self.settings(POST_EXPORT_CHUNK_SIZE=1):
+            rows = [
+                json.loads(line) for line in self.export().splitlines()
+            ]
+
+        self.assertEqual(
+            [row['id'] for row in rows], [self.new_post.id, self.old_post.id]
+        )
+        self.assertEqual(rows[0]['tag_ids'], [self.python.id])
+        self.assertEqual(rows[0]['category_ids'], [self.web.id])
+        self.assertEqual(rows[1]['tag_ids'], [])
+        self.assertEqual(rows[0]['content'], self.new_post.content)
+
+    def test_export_csv(self):
+        """Test exporting posts as CSV with a header row."""
+        res = self.client.get(EXPORT_POST_URL, {'format': 'csv'})
+        rows = list(csv.DictReader(
+            io.StringIO(b''.join(res.streaming_content).decode())
+        ))
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('posts.csv', res['Content-Disposition'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], 'Sample, "quoted"')
+        self.assertEqual(rows[0]['tag_ids'], str(self.python.id))
+        self.assertEqual(
+            rows[0]['published_date'], '2023-06-10T12:00:00+00:00'
+        )
+
+    def test_export_empty_csv_has_header(self):
+        """Test an export without posts still has its columns."""
+        data = self.export(format='csv', tags=str(self.python.id) + '0')
+
+        self.assertTrue(data.startswith('id,author_id,title,'))
+        self.assertEqual(len(data.splitlines()), 1)
+
+    def test_export_filters(self):
+        """Test the tag, category and published date filters."""
+        for params, expected in (
+            ({'tags': str(self.python.id)}, [self.new_post.id]),
+            ({'categories': str(self.web.id)}, [self.new_post.id]),
+            ({'published_after': '2023-03-01'}, [self.new_post.id]),
+            ({'published_before': '2023-06-10T12:00:00Z'},
+             [self.old_post.id]),
+        ):
+            rows = self.export(**params).splitlines()
+
+            self.assertEqual(
+                [json.loads(row)['id'] for row in rows], expected
+            )
+
+    def test_export_with_invalid_params(self):
+        """Test malformed dates are rejected before streaming."""
+        for params in (
+            {'published_after': 'yesterday'},
+            {'published_before': '2023-13-01'},
+        ):
+            res = self.client.get(EXPORT_POST_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), json.loads(res.content))
+
+
 class PrivateUserPostTests(TestCase):
     """Test authenticated requests."""
     def setUp(self):
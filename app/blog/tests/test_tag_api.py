@@ -8,11 +8,12 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Post, Profile
 from ..api.v1.serializers import TagSerializer
 
 
 LIST_TAG_URL = reverse('blog:api-blog:tag-list')
+AUTOCOMPLETE_TAG_URL = reverse('blog:api-blog:tag-autocomplete')
 
 
 def tag_detail_url(tag_id):
@@ -35,6 +36,16 @@ def create_tag(user, name='IT'):
     return tag
 
 
+def create_post_with_tags(user, *tags):
+    """Create and return a post with tags."""
+    post = Post.objects.create(
+        author=Profile.objects.get(user=user), title='Sample title',
+        content='Sample content', published_date='2023-10-12T16:48:32Z'
+    )
+    post.tags.add(*tags)
+    return post
+
+
 class PublicUserTagTests(TestCase):
     """Test unauthenticated requests."""
     def setUp(self):
@@ -56,6 +67,73 @@ class PublicUserTagTests(TestCase):
         self.assertEqual(res.data, serializer.data)
         self.assertEqual(len(res.data), 2)
 
+    def test_list_of_tags_is_cached_until_a_tag_changes(self):
+        """Test serving the cached list and refreshing
+        it when a tag is saved."""
+        sample_user = create_user()
+        tag = create_tag(user=sample_user)
+        self.client.get(LIST_TAG_URL)
+
+        with self.assertNumQueries(0):
+            self.client.get(LIST_TAG_URL)
+
+        tag.name = 'Renamed'
+        tag.save()
+        res = self.client.get(LIST_TAG_URL)
+
+        self.assertEqual(res.data[0]['name'], 'Renamed')
+
+    def test_search_tags(self):
+        """Test listing the tags matching q only, prefixes first."""
+        sample_user = create_user()
+        for name in ('Django', 'python', 'PyPy', 'Numpy'):
+            create_tag(user=sample_user, name=name)
+
+        res = self.client.get(LIST_TAG_URL, {'q': 'Py'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag['name'] for tag in res.data]
+        self.assertEqual(sorted(names[:2]), ['PyPy', 'python'])
+        self.assertNotIn('Django', names)
+
+    def test_autocomplete_ranks_by_usage(self):
+        """Test equally similar matches are ranked by usage."""
+        sample_user = create_user()
+        python = create_tag(user=sample_user, name='Python')
+        pyramid = create_tag(user=sample_user, name='Pyramid')
+        create_post_with_tags(sample_user, python, pyramid)
+        create_post_with_tags(sample_user, pyramid)
+
+        res = self.client.get(AUTOCOMPLETE_TAG_URL, {'q': 'py', 'limit': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, [{'id': pyramid.id, 'name': 'Pyramid', 'usage': 2}]
+        )
+
+    def test_autocomplete_is_cached_until_a_tag_changes(self):
+        """Test serving cached matches and finding new tags."""
+        sample_user = create_user()
+        create_tag(user=sample_user, name='Python')
+        self.client.get(AUTOCOMPLETE_TAG_URL, {'q': 'py'})
+
+        with self.assertNumQueries(0):
+            self.client.get(AUTOCOMPLETE_TAG_URL, {'q': 'py'})
+
+        create_tag(user=sample_user, name='Pyramid')
+        res = self.client.get(AUTOCOMPLETE_TAG_URL, {'q': 'py'})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_autocomplete_with_invalid_limit(self):
+        """Test rejecting limits which aren't positive integers."""
+        for limit in ('ten', '0'):
+            res = self.client.get(
+                AUTOCOMPLETE_TAG_URL, {'q': 'py', 'limit': limit}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_retrieve_detail_tag_successfully(self):
         """Test retrieving tag detail with unauthenticated
         without deleting and updating permissions."""
@@ -1,7 +1,9 @@
 """
 Views for blog App.
 """
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse
 from django.urls import reverse_lazy
 from django.views.generic import (
     ListView,
@@ -11,6 +13,7 @@ from django.views.generic import (
     UpdateView
 )
 
+from core import post_cache
 from core.models import (
     Post,
     Profile
@@ -19,11 +22,32 @@ from .forms import PostForms
 
 
 class PostListView(ListView):
-    """Return a list of existing posts with status True."""
-    queryset = Post.objects.filter(status=True)
+    """Return a list of existing posts with status True,
+    published by now."""
+    queryset = Post.objects.published()
     context_object_name = 'posts'
     paginate_by = 3
 
+    def get(self, request, *args, **kwargs):
+        """Serve the first POST_LIST_CACHE_PAGES pages from post_cache,
+        the page doesn't depend on the user."""
+        page = request.GET.get('page', '1')
+        if set(request.GET) - {'page'} or page not in {
+            str(number)
+            for number in range(1, settings.POST_LIST_CACHE_PAGES + 1)
+        }:
+            return super().get(request, *args, **kwargs)
+        _, (content, content_type) = post_cache.get_or_build(
+            lambda: self._render(request, *args, **kwargs),
+            f'html:page={page}'
+        )
+        return HttpResponse(content, content_type=content_type)
+
+    def _render(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        return response.content, response['Content-Type']
+
 
 class PostDetailView(DetailView):
     """Return details of a post by it's pk."""
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import feeds, taxonomy  # noqa: F401
+        # Only requests are profiled, workers spare importing DRF.
+        if settings.PROCESS_TYPE == 'web':
+            from . import profiling
+            profiling.install_serializer_timing()
@@ -0,0 +1,389 @@
+"""
+Benchmark scenarios run by `python manage.py benchmark <scenario>`.
+
+Each scenario receives the command options and returns a list of
+(label, seconds, rows) tuples, optionally followed by a memory size in
+bytes, described by the `memory` argument of `scenario()`. The command
+turns them into rows per second, relative to the first entry. They
+run against whatever the database holds, seed it first with
+`python manage.py insert_data`.
+"""
+import io
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.test import RequestFactory
+
+SCENARIOS = {}
+
+
+def scenario(name, memory='peak'):
+    """Register a benchmark scenario under name."""
+    def register(func):
+        func.memory = memory
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def timed(func, repeat):
+    """Return the best wall time of `repeat` calls of func."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(func):
+    """Return the peak memory in bytes allocated by one call of func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def api_request(path='/'):
+    """Return a request as seen by the blog API views."""
+    from rest_framework.request import Request
+    host = next(
+        (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+         if host != '*'),
+        'localhost'
+    )
+    return Request(RequestFactory().get(path, HTTP_HOST=host))
+
+
+@scenario('list_serializers')
+def list_serializers(options):
+    """PostSerializer on prefetched instances vs PostListSerializer
+    on `.values()` rows, queries included, for one page of posts."""
+    from core.models import Post
+    from blog.api.v1.serializers import PostSerializer, PostListSerializer
+
+    rows = options['rows']
+    queryset = Post.objects.order_by('-id')
+    context = {'request': api_request()}
+
+    def model_serializer():
+        page = queryset.prefetch_related('categories', 'tags')[:rows]
+        return PostSerializer(page, many=True, context=context).data
+
+    def values_serializer():
+        page = PostListSerializer.prepare_queryset(queryset)[:rows]
+        return PostListSerializer(page, many=True, context=context).data
+
+    count = len(model_serializer())
+    return [
+        ('PostSerializer', timed(model_serializer, options['repeat']),
+         count),
+        ('PostListSerializer', timed(values_serializer, options['repeat']),
+         count),
+    ]
+
+
+def compare_text_columns(model, snippet, options):
+    """Loading whole rows vs deferring the text column and selecting
+    only the start needed by snippets."""
+    rows = options['rows']
+    queryset = model.objects.order_by('-id')
+
+    def full():
+        return [getattr(obj, snippet)() for obj in queryset[:rows]]
+
+    def deferred():
+        return [
+            getattr(obj, snippet)()
+            for obj in queryset.with_snippet_source()[:rows]
+        ]
+
+    count = len(full())
+    return [
+        (label, timed(func, options['repeat']), count, peak_memory(func))
+        for label, func in (
+            (model.__name__, full), (f'{model.__name__} deferred', deferred)
+        )
+    ]
+
+
+@scenario('post_columns')
+def post_columns(options):
+    """Seed multi-KB posts with `insert_data --paragraphs 10` first."""
+    from core.models import Post
+    return compare_text_columns(Post, 'content_snippet', options)
+
+
+@scenario('comment_columns')
+def comment_columns(options):
+    """Comments are at most 1000 characters, expect a smaller gain."""
+    from core.models import Comment
+    return compare_text_columns(Comment, 'comment_snippet', options)
+
+
+def post_page(rows):
+    """Return `rows` posts serialized by PostDetailSerializer."""
+    from core.models import Post
+    from blog.api.v1.serializers import PostDetailSerializer
+    return PostDetailSerializer(
+        Post.objects.prefetch_related('categories', 'tags')
+        .order_by('-id')[:rows],
+        many=True, context={'request': api_request()}
+    ).data
+
+
+@scenario('json_render')
+def json_render(options):
+    """Stdlib JSON vs orjson rendering of a page of posts,
+    100 with the default --rows."""
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import ORJSONRenderer
+
+    page = post_page(options['rows'])
+    return [
+        (renderer.__name__,
+         timed(lambda: renderer().render(page), options['repeat']),
+         len(page))
+        for renderer in (JSONRenderer, ORJSONRenderer)
+    ]
+
+
+@scenario('json_parse')
+def json_parse(options):
+    """Stdlib JSON vs orjson parsing of a page of posts."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from core.parsers import ORJSONParser
+
+    page = post_page(options['rows'])
+    body = JSONRenderer().render(page)
+    return [
+        (parser.__name__,
+         timed(lambda: parser().parse(io.BytesIO(body)), options['repeat']),
+         len(page))
+        for parser in (JSONParser, ORJSONParser)
+    ]
+
+
+@scenario('list_cache', memory='in Redis')
+def list_cache(options):
+    """Post list cache hits: the pickled serialized page rendered on
+    every hit vs the rendered bytes, with the size of each entry."""
+    from django.core.cache import cache
+    from django_redis import get_redis_connection
+    from core.renderers import ORJSONRenderer
+    from blog.api.v1.serializers import PostListSerializer
+    from core.models import Post
+
+    page = {
+        'links': {'next': None, 'previous': None},
+        'total_posts': options['rows'],
+        'total_pages': 1,
+        'results': PostListSerializer(
+            PostListSerializer.prepare_queryset(
+                Post.objects.order_by('-id')
+            )[:options['rows']],
+            many=True, context={'request': api_request()}
+        ).data
+    }
+    content = ORJSONRenderer().render(page)
+    entries = {
+        'benchmark:list_cache:data': page,
+        'benchmark:list_cache:bytes': (content, 'application/json'),
+    }
+    cache.set_many(entries)
+    connection = get_redis_connection('default')
+
+    def size(key):
+        return connection.strlen(cache.make_key(key))
+
+    try:
+        return [
+            ('pickled data',
+             timed(lambda: ORJSONRenderer().render(
+                 cache.get('benchmark:list_cache:data')
+             ), options['repeat']),
+             len(page['results']), size('benchmark:list_cache:data')),
+            ('rendered bytes',
+             timed(lambda: cache.get('benchmark:list_cache:bytes'),
+                   options['repeat']),
+             len(page['results']), size('benchmark:list_cache:bytes')),
+        ]
+    finally:
+        cache.delete_many(entries)
+
+
+@scenario('cache_profile', memory='encoded')
+def cache_profile(options):
+    """Encoded size and encode + decode time of typical cache entries,
+    a rendered page of posts, its data and the tag list, for every
+    serializer and installed compressor of the cache settings."""
+    from django.utils.module_loading import import_string
+    from django_redis.exceptions import CompressorError
+    from blog.api.v1.serializers import TagSerializer
+    from core.cache import ThresholdCompressor
+    from core.models import Tag
+    from core.renderers import ORJSONRenderer
+
+    page = post_page(options['rows'])
+    entries = [
+        (1, (ORJSONRenderer().render(page), 'application/json')),
+        page,
+        TagSerializer(Tag.objects.order_by('-id')[:100], many=True).data,
+    ]
+    cache_options = settings.CACHES['default']['OPTIONS']
+
+    def profile(serializer, compressor):
+        def encode(entry):
+            return compressor.compress(serializer.dumps(entry))
+
+        def decode(value):
+            try:
+                value = compressor.decompress(value)
+            except CompressorError:
+                pass
+            return serializer.loads(value)
+
+        return (
+            timed(lambda: [decode(encode(entry)) for entry in entries],
+                  options['repeat']),
+            sum(len(encode(entry)) for entry in entries)
+        )
+
+    results = []
+    for serializer_name, serializer in settings.CACHE_SERIALIZERS.items():
+        serializer = import_string(serializer)(options=cache_options)
+        for compressor_name, compressor in settings.CACHE_COMPRESSORS.items():
+            try:
+                compressor = ThresholdCompressor(
+                    {**cache_options, 'COMPRESS_WITH': compressor}
+                )
+            except ImportError:
+                continue
+            seconds, size = profile(serializer, compressor)
+            results.append((f'{serializer_name}+{compressor_name}',
+                            seconds, len(entries), size))
+    return results
+
+
+def compare_tag_filters(match, options):
+    """Joins + DISTINCT vs EXISTS filtering of posts by their three most
+    used tags, counted and paginated like the post list."""
+    from blog.api.v1.filters import TaxonomyFilter
+    from core.models import Post, Tag
+
+    ids = list(
+        Tag.objects.with_usage().order_by('-usage')
+        .values_list('id', flat=True)[:3]
+    )
+    queryset = Post.objects.published().order_by('-id')
+    if match == 'any':
+        joined = queryset.filter(tags__id__in=ids)
+    else:
+        joined = queryset
+        for tag_id in ids:
+            joined = joined.filter(tags__id=tag_id)
+    filtered = {
+        'join distinct': joined.distinct(),
+        'exists': TaxonomyFilter().filter_field(
+            queryset, 'tags', ids, match
+        ),
+    }
+
+    def page(posts):
+        posts.count()
+        return list(posts.values_list('id', flat=True)[:options['rows']])
+
+    return [
+        (f'{label} ({match})',
+         timed(lambda: page(posts), options['repeat']), len(page(posts)))
+        for label, posts in filtered.items()
+    ]
+
+
+@scenario('tag_filter_any')
+def tag_filter_any(options):
+    """Seed a large dataset with `insert_data --posts 100000` first."""
+    return compare_tag_filters('any', options)
+
+
+@scenario('tag_filter_all')
+def tag_filter_all(options):
+    """Posts having all three tags are rarer, see tag_filter_any."""
+    return compare_tag_filters('all', options)
+
+
+@scenario('tag_feed')
+def tag_feed(options):
+    """A page of post ids halfway through the most used tag: the
+    filtered list counted and offset like page numbers vs the tag feed
+    read from a cursor, see core/feeds.py."""
+    from blog.api.v1.filters import TaxonomyFilter
+    from django.db.models import Q
+    from core.models import Post, Tag, TagFeed
+
+    tag_id = Tag.objects.with_usage().order_by('-usage')[0].id
+    rows = options['rows']
+    posts = TaxonomyFilter().filter_field(
+        Post.objects.published(), 'tags', [tag_id], 'any'
+    ).order_by('-published_date', '-id')
+    feed = TagFeed.objects.filter(tag_id=tag_id).order_by(
+        '-published_date', '-post_id'
+    )
+    offset = feed.count() // 2
+    published_date, post_id = feed.values_list(
+        'published_date', 'post_id'
+    )[offset - 1]
+
+    def offset_page():
+        posts.count()
+        return list(posts.values_list('id', flat=True)[offset:offset + rows])
+
+    def keyset_page():
+        return list(feed.filter(published_date__lte=published_date).filter(
+            Q(published_date__lt=published_date) | Q(post_id__lt=post_id)
+        ).values_list('post_id', flat=True)[:rows])
+
+    assert offset_page() == keyset_page()
+    return [
+        ('filtered list offset', timed(offset_page, options['repeat']),
+         len(offset_page())),
+        ('feed keyset', timed(keyset_page, options['repeat']),
+         len(keyset_page())),
+    ]
+
+
+@scenario('post_export')
+def post_export(options):
+    """NDJSON export of --rows posts: the rows fetched at once and
+    rendered as a whole vs streamed from a server-side cursor, chunk by
+    chunk. Only the peak memory of the streamed one stays flat."""
+    from django.db import transaction
+    from core.models import EXPORT_FIELDS, Post
+    from core.renderers import NDJSONRenderer
+
+    queryset = Post.objects.published().order_by('-id').for_export()[
+        :options['rows']
+    ]
+    renderer = NDJSONRenderer()
+    chunk_size = settings.POST_EXPORT_CHUNK_SIZE
+
+    def whole():
+        return len(renderer.render(list(queryset)))
+
+    def streamed():
+        with transaction.atomic():
+            return sum(map(len, renderer.stream(
+                queryset.iterator(chunk_size=chunk_size),
+                EXPORT_FIELDS, chunk_size
+            )))
+
+    count = queryset.count()
+    return [
+        (label, timed(func, options['repeat']), count, peak_memory(func))
+        for label, func in (('fetched at once', whole), ('streamed', streamed))
+    ]
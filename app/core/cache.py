@@ -0,0 +1,61 @@
+"""
+Cache backend recording hits and misses for profiling and metrics,
+and the compressor of the cache profile, see CACHES in the settings.
+"""
+from django.utils.module_loading import import_string
+
+from django_redis.cache import RedisCache as DjangoRedisCache
+from django_redis.compressors.base import BaseCompressor
+
+from . import metrics, profiling
+
+
+_MISSING = object()
+
+
+class RedisCache(DjangoRedisCache):
+    """django_redis backend counting lookups in the running
+    profile and in the Prometheus metrics."""
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, _MISSING, version=version, client=client)
+        if value is _MISSING:
+            profiling.record_cache(0, 1)
+            metrics.CACHE_LOOKUPS.labels('miss').inc()
+            return default
+        profiling.record_cache(1)
+        metrics.CACHE_LOOKUPS.labels('hit').inc()
+        return value
+
+    def get_many(self, keys, *args, **kwargs):
+        keys = list(keys)
+        values = super().get_many(keys, *args, **kwargs)
+        hits, misses = len(values), len(keys) - len(values)
+        profiling.record_cache(hits, misses)
+        metrics.CACHE_LOOKUPS.labels('hit').inc(hits)
+        metrics.CACHE_LOOKUPS.labels('miss').inc(misses)
+        return values
+
+
+class ThresholdCompressor(BaseCompressor):
+    """Compress values of at least COMPRESS_MIN_LENGTH bytes with the
+    COMPRESS_WITH compressor, at the COMPRESS_LEVEL of those having a
+    level, keeping them as is when it doesn't make them smaller.
+    django_redis reads values which fail to decompress as is."""
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.min_length = options.get('COMPRESS_MIN_LENGTH', 0)
+        self.compressor = import_string(options['COMPRESS_WITH'])(options)
+        level = options.get('COMPRESS_LEVEL')
+        if level is not None and hasattr(self.compressor, 'preset'):
+            self.compressor.preset = level
+
+    def compress(self, value):
+        if len(value) < self.min_length:
+            return value
+        compressed = self.compressor.compress(value)
+        return compressed if len(compressed) < len(value) else value
+
+    def decompress(self, value):
+        return self.compressor.decompress(value)
@@ -0,0 +1,117 @@
+"""
+Response compression negotiated with Accept-Encoding.
+
+gzip is always available, brotli (`br`) and zstd are used when the
+`brotli` and `zstandard` packages are installed. Responses may set a
+`compression_cache_key` attribute when their body is cached, the
+compressed variants are then cached next to it instead of being
+compressed again for every request, see `CompressionMiddleware`.
+"""
+import re
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml',
+    'application/vnd.oai.openapi', 'text/',
+)
+
+# Preferred first when the client accepts several with the same q.
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS['zstd'] = lambda data: zstandard.ZstdCompressor(
+        level=3
+    ).compress(data)
+if brotli is not None:
+    ENCODERS['br'] = lambda data: brotli.compress(data, quality=5)
+ENCODERS['gzip'] = lambda data: gzip.compress(data, compresslevel=6)
+
+_weak_etag = re.compile(r'^"')
+
+
+def negotiate(accept_encoding):
+    """Return the best available encoding of an Accept-Encoding
+    header, None if none of them is acceptable."""
+    qualities = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name:
+            qualities[name] = quality
+
+    best, best_quality = None, 0
+    for encoding in ENCODERS:
+        quality = qualities.get(encoding, qualities.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(encoding, data):
+    """Compress data with an encoding returned by negotiate()."""
+    return ENCODERS[encoding](data)
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _compressible(self, response):
+        content_type = response.get('Content-Type', '')
+        return (
+            not response.streaming
+            and not response.has_header('Content-Encoding')
+            and len(response.content) >= settings.COMPRESSION_MIN_LENGTH
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        cache_key = getattr(response, 'compression_cache_key', None)
+        compressed = None
+        if cache_key:
+            cache_key = f'{cache_key}:{encoding}'
+            compressed = cache.get(cache_key)
+        if compressed is None:
+            compressed = compress(encoding, response.content)
+            if cache_key:
+                cache.set(cache_key, compressed)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = _weak_etag.sub('W/"', response['ETag'])
+        return response
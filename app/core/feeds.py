@@ -0,0 +1,73 @@
+"""
+Feeds of the published posts of every tag and category.
+
+TagFeed and CategoryFeed copy the published date of the posts next to
+their tag or category, so a tag or category feed is a range scan of a
+single index in date order, see `PostModelViewSet.feed`.
+
+Rows of a post are rewritten by `refresh()`: from the Post lifecycle
+hooks when its status or published date change, from m2m_changed when
+its tags or categories change and explicitly after bulk writes, which
+skip both. Posts scheduled in the future are added once they are due
+by core/publishing.py.
+"""
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import Post, TagFeed, CategoryFeed
+
+FEEDS = {'tags': TagFeed, 'categories': CategoryFeed}
+
+
+def _insert_sql(field, feed):
+    m2m = getattr(Post, field)
+    target = m2m.field.m2m_reverse_name()
+    source = m2m.field.m2m_column_name()
+    return (
+        f'INSERT INTO {feed._meta.db_table} '
+        f'({target}, post_id, published_date) '
+        f'SELECT m2m.{target}, post.id, post.published_date '
+        f'FROM {m2m.through._meta.db_table} m2m '
+        f'JOIN {Post._meta.db_table} post ON post.id = m2m.{source} '
+        f'WHERE post.status AND post.published_date <= now()'
+    )
+
+
+def refresh(post_ids):
+    """Rewrite the feed rows of posts."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    with connection.cursor() as cursor:
+        for field, feed in FEEDS.items():
+            feed.objects.filter(post_id__in=post_ids).delete()
+            cursor.execute(
+                _insert_sql(field, feed) + ' AND post.id = ANY(%s)',
+                [post_ids]
+            )
+
+
+def rebuild():
+    """Rewrite every feed row."""
+    with connection.cursor() as cursor:
+        for field, feed in FEEDS.items():
+            cursor.execute(f'TRUNCATE {feed._meta.db_table}')
+            cursor.execute(_insert_sql(field, feed))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.categories.through)
+def refresh_changed_posts(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh([instance.pk])
+        return
+    # Posts added to or removed from a tag or category.
+    if action in ('post_add', 'post_remove'):
+        refresh(pk_set)
+    elif action == 'pre_clear':
+        field = 'tags' if sender is Post.tags.through else 'categories'
+        target = getattr(Post, field).field.m2m_reverse_field_name()
+        FEEDS[field].objects.filter(**{target: instance}).delete()
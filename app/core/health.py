@@ -0,0 +1,106 @@
+"""
+Dependency probes for readiness checks and startup waits.
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+
+from django_redis import get_redis_connection
+
+
+def check_database():
+    """Run a trivial query on the default database."""
+    connection = connections['default']
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        # Probes run in short lived threads, don't leak their connection.
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def check_cache():
+    """Ping the Redis server behind the default cache."""
+    get_redis_connection('default').ping()
+
+
+def check_broker():
+    """Open and close a connection to the Celery broker."""
+    from app.celery_config import app as celery_app
+    with celery_app.connection_for_write(
+        connect_timeout=settings.HEALTH_CHECK_TIMEOUT
+    ) as connection:
+        connection.connect()
+
+
+PROBES = {
+    'database': check_database,
+    'cache': check_cache,
+    'broker': check_broker,
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=len(PROBES), thread_name_prefix='health'
+)
+_lock = threading.Lock()
+_last_result = None
+_last_checked = 0.0
+
+
+def _run_probe(probe):
+    start = time.perf_counter()
+    try:
+        probe()
+    except Exception as e:
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+    return {
+        'ok': True,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+def run_probes():
+    """Run every probe concurrently, bounded by HEALTH_CHECK_TIMEOUT."""
+    futures = {
+        name: _executor.submit(_run_probe, probe)
+        for name, probe in PROBES.items()
+    }
+    wait(futures.values(), timeout=settings.HEALTH_CHECK_TIMEOUT)
+    return {
+        name: future.result() if future.done() else
+        {'ok': False, 'error': 'Timed out.'}
+        for name, future in futures.items()
+    }
+
+
+def readiness():
+    """Return the probe results, cached for HEALTH_CHECK_CACHE_SECONDS.
+
+    Only one request per process runs the probes, concurrent callers
+    get the previous result instead of piling up on a slow dependency.
+    """
+    global _last_result, _last_checked
+    if (
+        _last_result is not None
+        and time.monotonic() - _last_checked
+        < settings.HEALTH_CHECK_CACHE_SECONDS
+    ):
+        return _last_result
+    if not _lock.acquire(blocking=_last_result is None):
+        return _last_result
+    try:
+        _last_result = run_probes()
+        _last_checked = time.monotonic()
+        return _last_result
+    finally:
+        _lock.release()
+
+
+def reset():
+    """Forget the cached result."""
+    global _last_result, _last_checked
+    _last_result, _last_checked = None, 0.0
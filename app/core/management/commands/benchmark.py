@@ -0,0 +1,38 @@
+"""
+Command for running the benchmark scenarios of core/benchmarks.py.
+"""
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    """Django command to run benchmarks against the current database."""
+    help = 'Run a benchmark scenario and report rows per second.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument(
+            '--rows', type=int, default=100,
+            help='Rows processed per iteration.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Iterations, the best one is reported.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        scenario = SCENARIOS[options['scenario']]
+        results = scenario(options)
+        baseline = results[0][1]
+        for label, seconds, rows, *memory in results:
+            rate = rows / seconds if seconds else float('inf')
+            line = (
+                f'{label:<30} {seconds * 1000:9.2f}ms '
+                f'{rate:12.0f} rows/s '
+                f'x{baseline / seconds if seconds else 0:.2f}'
+            )
+            if memory:
+                line += f' {memory[0] / 1024:10.1f}KiB {scenario.memory}'
+            self.stdout.write(line)
@@ -0,0 +1,20 @@
+"""
+Command for building the OpenAPI schema artifact, see core/schema.py.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to generate the OpenAPI schema once, when the
+    image is built."""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        artifact = schema.write()
+        self.stdout.write(self.style.SUCCESS(
+            f'OpenAPI schema {artifact.version} written to '
+            f'{settings.OPENAPI_SCHEMA_DIR}.'
+        ))
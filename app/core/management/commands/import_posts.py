@@ -0,0 +1,478 @@
+"""
+Command for importing posts from NDJSON or CSV files, like the ones of
+the post export endpoint.
+
+Every record is a post with a title, content, published_date and
+optionally status, image, created_at and updated_at. Its author is
+found by `author_email`, else by `author_id`, the id of a profile,
+else it's the --author. Categories and tags are either `categories` and
+`tags` names of the author's user, created if missing, or existing
+`category_ids` and `tag_ids`. Lists are `;` separated in CSV files. Ids
+of the records are ignored, imported posts get new ones.
+
+Files are read line by line, gzip compressed ones decompressed on the
+fly, others optionally memory-mapped. Records are parsed and validated
+by a process pool, a few batches ahead of the writes. Authors,
+categories and tags are resolved through in-memory maps, then every
+batch is written in a transaction: post ids are reserved from their
+sequence and posts and their categories and tags loaded with COPY FROM
+STDIN. The transaction also records the progress of the file in a
+PostImport row, so running the command again after a crash resumes
+after the last committed batch, unless the file changed meanwhile.
+Invalid records are skipped and reported.
+"""
+import csv
+import gzip
+import hashlib
+import mmap
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from itertools import islice
+
+import orjson
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import feeds, post_cache, taxonomy
+from core.models import Category, Post, PostImport, Profile, Tag
+from core.pg_copy import copy_m2m, copy_rows
+from core.pool import ordered_map
+
+GZIP_MAGIC = b'\x1f\x8b'
+FORMATS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}
+POST_COLUMNS = (
+    'id', 'author_id', 'title', 'content', 'image', 'status',
+    'published_date', 'created_at', 'updated_at'
+)
+TRUE = {'1', 't', 'true', 'y', 'yes'}
+FALSE = {'', '0', 'f', 'false', 'n', 'no'}
+
+Row = namedtuple('Row', [
+    'number', 'author_email', 'author_id', 'title', 'content', 'image',
+    'status', 'published_date', 'created_at', 'updated_at',
+    'categories', 'category_ids', 'tags', 'tag_ids'
+])
+
+
+class InvalidRecord(Exception):
+    pass
+
+
+def _list(value, cast=str):
+    """Return the items of a list or of a `;` separated string."""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    if not isinstance(value, list):
+        raise InvalidRecord(f'Expected a list, got {value!r}.')
+    try:
+        return [cast(item) for item in value]
+    except (TypeError, ValueError):
+        raise InvalidRecord(f'Invalid items in {value!r}.')
+
+
+def _names(record, field):
+    names = [name.strip() for name in _list(record.get(field))]
+    max_length = Category._meta.get_field('name').max_length
+    if not all(0 < len(name) <= max_length for name in names):
+        raise InvalidRecord(f'Invalid {field} {names!r}.')
+    return names
+
+
+def _datetime(record, field, default=None):
+    value = record.get(field)
+    if value in (None, ''):
+        if default is None:
+            raise InvalidRecord(f'{field} is required.')
+        return default
+    try:
+        # Much faster than parse_datetime for the exported dates,
+        # Python < 3.11 doesn't read the Z suffix.
+        if value.endswith('Z'):
+            value = f'{value[:-1]}+00:00'
+        moment = datetime.fromisoformat(value)
+    except (AttributeError, TypeError, ValueError):
+        try:
+            moment = parse_datetime(value)
+        except (TypeError, ValueError):
+            moment = None
+    if moment is None:
+        raise InvalidRecord(f'Invalid {field} {value!r}.')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    value = '' if value is None else str(value).strip().lower()
+    if value not in TRUE | FALSE:
+        raise InvalidRecord(f'Invalid status {value!r}.')
+    return value in TRUE
+
+
+def parse_record(record, number, now):
+    """Return the Row of a decoded record, raising InvalidRecord."""
+    if not isinstance(record, dict):
+        raise InvalidRecord('Expected an object.')
+    title = record.get('title')
+    if not isinstance(title, str) or not title.strip():
+        raise InvalidRecord('title is required.')
+    if len(title) > Post._meta.get_field('title').max_length:
+        raise InvalidRecord('title is too long.')
+    content = record.get('content')
+    if not isinstance(content, str):
+        raise InvalidRecord('content is required.')
+    if '\x00' in title or '\x00' in content:
+        # PostgreSQL text can't hold them, COPY would fail.
+        raise InvalidRecord('NUL characters aren\'t allowed.')
+    author_id = record.get('author_id')
+    if author_id not in (None, ''):
+        try:
+            author_id = int(author_id)
+        except (TypeError, ValueError):
+            raise InvalidRecord(f'Invalid author_id {author_id!r}.')
+    created_at = _datetime(record, 'created_at', now)
+    return Row(
+        number=number,
+        author_email=str(record.get('author_email') or '').lower() or None,
+        author_id=author_id or None,
+        title=title,
+        content=content,
+        image=record.get('image') or '',
+        status=_bool(record.get('status')),
+        published_date=_datetime(record, 'published_date'),
+        created_at=created_at,
+        updated_at=_datetime(record, 'updated_at', created_at),
+        categories=_names(record, 'categories'),
+        category_ids=_list(record.get('category_ids'), int),
+        tags=_names(record, 'tags'),
+        tag_ids=_list(record.get('tag_ids'), int),
+    )
+
+
+def parse_batch(args):
+    """Parse a batch of raw records, run in worker processes. Return
+    the rows and the (number, message) of the invalid records."""
+    format, header, first, records = args
+    now = timezone.now()
+    rows, errors = [], []
+    for number, raw in enumerate(records, first):
+        try:
+            if format == 'ndjson':
+                record = orjson.loads(raw)
+            elif len(raw) != len(header):
+                raise InvalidRecord(
+                    f'Expected {len(header)} columns, got {len(raw)}.'
+                )
+            else:
+                record = dict(zip(header, raw))
+            rows.append(parse_record(record, number, now))
+        except orjson.JSONDecodeError as error:
+            errors.append((number, f'Invalid JSON: {error}'))
+        except InvalidRecord as error:
+            errors.append((number, str(error)))
+    return rows, errors
+
+
+def fingerprint(path):
+    """Return a hash identifying the content of a file, from its size
+    and first MiB."""
+    digest = hashlib.sha256(str(os.path.getsize(path)).encode())
+    with open(path, 'rb') as file:
+        digest.update(file.read(1 << 20))
+    return digest.hexdigest()
+
+
+@contextmanager
+def open_lines(path, use_mmap=False):
+    """Yield an iterable of the lines of a file, as bytes."""
+    with open(path, 'rb') as file:
+        compressed = file.read(2) == GZIP_MAGIC
+        file.seek(0)
+        if compressed:
+            if use_mmap:
+                raise CommandError('Gzip files can\'t be memory-mapped.')
+            with gzip.open(file) as lines:
+                yield lines
+        elif use_mmap and os.fstat(file.fileno()).st_size:
+            with mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped:
+                yield iter(mapped.readline, b'')
+        else:
+            yield file
+
+
+def read_records(lines, format):
+    """Return the header of a file, None for NDJSON, and an iterator of
+    its raw records: lines for NDJSON, lists of values for CSV."""
+    if format == 'ndjson':
+        return None, (line for line in lines if line.strip())
+    reader = csv.reader(line.decode('utf-8') for line in lines)
+    header = next(reader, [])
+    if header:
+        header[0] = header[0].lstrip('\ufeff')
+    return header, (values for values in reader if values)
+
+
+class Command(BaseCommand):
+    """Django command to import posts from NDJSON or CSV files."""
+    help = 'Import posts from an NDJSON or CSV file, resuming if needed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=sorted(set(FORMATS.values())),
+            help='Format of the file, from its extension by default.'
+        )
+        parser.add_argument(
+            '--author',
+            help='Email of the author of records without a known one.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Records per COPY transaction.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Processes parsing records.'
+        )
+        parser.add_argument(
+            '--mmap', action='store_true',
+            help='Memory-map the file instead of reading it.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Import the file from its start, not from the last '
+                 'committed batch.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = os.path.abspath(options['path'])
+        if not os.path.isfile(path):
+            raise CommandError(f'No file {path}.')
+        format = options['format'] or self._guess_format(path)
+        self.batch_size = options['batch_size']
+        self._load_maps()
+        self.default_author = None
+        if options['author']:
+            self.default_author = self.authors.get(options['author'].lower())
+            if self.default_author is None:
+                raise CommandError(f'No user {options["author"]}.')
+
+        progress = self._progress(path, options['restart'])
+        # Forked workers only parse records and never touch the database.
+        pool = None
+        imap = map
+        if options['workers'] > 1:
+            pool = multiprocessing.get_context('fork').Pool(
+                options['workers']
+            )
+            imap = partial(ordered_map, pool, ahead=2 * options['workers'])
+        try:
+            with open_lines(path, options['mmap']) as lines:
+                header, records = read_records(lines, format)
+                self._import(
+                    progress, imap(parse_batch, self._batches(
+                        format, header, records, progress.records
+                    ))
+                )
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+    def _guess_format(self, path):
+        name = path[:-3] if path.endswith('.gz') else path
+        format = FORMATS.get(os.path.splitext(name)[1].lower())
+        if format is None:
+            raise CommandError(
+                'Unknown file extension, use --format.'
+            )
+        return format
+
+    def _load_maps(self):
+        """Load the authors, categories and tags records refer to."""
+        self.authors = {}
+        self.profile_users = {}
+        # The first profile of a user is its author.
+        for profile_id, user_id, email in Profile.objects.order_by(
+            '-id'
+        ).values_list('id', 'user_id', 'user__email'):
+            self.authors[email.lower()] = profile_id
+            self.profile_users[profile_id] = user_id
+        self.names = {}
+        self.ids = {}
+        for model in (Category, Tag):
+            self.names[model] = {
+                (user_id, name): obj_id
+                for obj_id, user_id, name in model.objects.values_list(
+                    'id', 'user_id', 'name'
+                )
+            }
+            self.ids[model] = set(self.names[model].values())
+
+    def _progress(self, path, restart):
+        """Return the PostImport of the file, starting over when it was
+        restarted. A file whose content changed since records were
+        imported from it needs --restart, resuming would skip records
+        by their position in another file."""
+        digest = fingerprint(path)
+        progress, _ = PostImport.objects.get_or_create(
+            source=path[-1024:], defaults={'fingerprint': digest}
+        )
+        changed = progress.fingerprint != digest
+        if changed and progress.records and not restart:
+            raise CommandError(
+                f'{path} changed since record {progress.records} was '
+                'imported, use --restart to import it from its start.'
+            )
+        if restart or changed:
+            progress.fingerprint = digest
+            progress.records = progress.imported = 0
+            progress.save()
+        elif progress.records:
+            self.stdout.write(
+                f'Resuming after record {progress.records}, '
+                f'{progress.imported} posts already imported.'
+            )
+        return progress
+
+    def _batches(self, format, header, records, skip):
+        """Yield the parse_batch arguments of the records after the
+        `skip` first ones."""
+        records = islice(records, skip, None)
+        first = skip + 1
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            yield format, header, first, batch
+            first += len(batch)
+
+    def _import(self, progress, parsed):
+        start = time.perf_counter()
+        records = imported = skipped = 0
+        for rows, errors in parsed:
+            count = len(rows) + len(errors)
+            posts = self._resolve(rows, errors)
+            with transaction.atomic():
+                self._write(posts)
+                progress.records += count
+                progress.imported += len(posts)
+                progress.save(update_fields=[
+                    'records', 'imported', 'updated_at'
+                ])
+            for number, message in sorted(errors):
+                self.stderr.write(f'Record {number}: {message}')
+            records += count
+            imported += len(posts)
+            skipped += len(errors)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Records: {progress.records}, imported {imported}, '
+                f'skipped {skipped}, '
+                f'{records / elapsed if elapsed else 0:.0f} records/s'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} posts, skipped {skipped} records.'
+        ))
+
+    def _resolve(self, rows, errors):
+        """Return the (row, author profile id) of the rows whose author,
+        category and tag ids exist, adding errors for the others."""
+        posts = []
+        for row in rows:
+            if row.author_email:
+                author = self.authors.get(row.author_email)
+            elif row.author_id in self.profile_users:
+                author = row.author_id
+            else:
+                author = None
+            author = author or self.default_author
+            unknown = [
+                f'{field} {sorted(set(ids) - self.ids[model])}'
+                for field, model, ids in (
+                    ('category_ids', Category, row.category_ids),
+                    ('tag_ids', Tag, row.tag_ids),
+                ) if not set(ids) <= self.ids[model]
+            ]
+            if author is None:
+                errors.append((row.number, 'Unknown author.'))
+            elif unknown:
+                errors.append((row.number, f'Unknown {", ".join(unknown)}.'))
+            else:
+                posts.append((row, author))
+        return posts
+
+    def _taxonomy_ids(self, model, row, user_id):
+        """Return the ids of the categories or tags of a row, ids and
+        names of the user."""
+        field = 'categories' if model is Category else 'tags'
+        names = self.names[model]
+        return sorted(
+            set(getattr(row, f'{model._meta.model_name}_ids'))
+            | {names[user_id, name] for name in getattr(row, field)}
+        )
+
+    def _create_names(self, posts):
+        """Create the categories and tags named by posts which their
+        author's user doesn't have yet."""
+        for model, field in ((Category, 'categories'), (Tag, 'tags')):
+            missing = {
+                (self.profile_users[author], name)
+                for row, author in posts for name in getattr(row, field)
+            } - set(self.names[model])
+            if not missing:
+                continue
+            created = model.objects.bulk_create([
+                model(user_id=user_id, name=name)
+                for user_id, name in sorted(missing)
+            ])
+            for obj in created:
+                self.names[model][obj.user_id, obj.name] = obj.id
+                self.ids[model].add(obj.id)
+            taxonomy.invalidate(model, [])
+
+    def _write(self, posts):
+        """Write posts with their categories and tags, in the current
+        transaction."""
+        if not posts:
+            return
+        self._create_names(posts)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+                'FROM generate_series(1, %s)',
+                [Post._meta.db_table, 'id', len(posts)]
+            )
+            post_ids = [post_id for post_id, in cursor.fetchall()]
+        copy_rows(Post._meta.db_table, POST_COLUMNS, (
+            (post_id, author, row.title, row.content, row.image,
+             row.status, row.published_date, row.created_at,
+             row.updated_at)
+            for post_id, (row, author) in zip(post_ids, posts)
+        ))
+        for m2m, model in ((Post.categories, Category), (Post.tags, Tag)):
+            copy_m2m(m2m, (
+                (post_id, obj_id)
+                for post_id, (row, author) in zip(post_ids, posts)
+                for obj_id in self._taxonomy_ids(
+                    model, row, self.profile_users[author]
+                )
+            ))
+        # COPY skips the lifecycle hooks.
+        feeds.refresh(post_ids)
+        post_cache.invalidate()
@@ -1,18 +1,38 @@
 """
 Command for inserting fake data via faker module into the database.
+
+Rows are generated in a process pool, a few batches ahead of the
+writes so memory stays bounded. Posts, comments and users are written
+with batched bulk_create and the many to many through tables are loaded
+with COPY FROM STDIN, so millions of posts can be seeded for
+benchmarks. The same --seed always generates the same content.
 """
-from faker import Faker
 import random
-from datetime import datetime
+import multiprocessing
+from datetime import timedelta
+from functools import partial
 
+from faker import Faker
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import (
+    BaseCommand,
+    CommandError
+)
 
+from core import feeds, post_cache
+from core.pg_copy import copy_m2m
+from core.pool import ordered_map
 from core.models import (
     Profile,
     Post,
     Category,
-    Tag
+    Tag,
+    Comment
 )
 
 categories = [
@@ -31,44 +51,235 @@ tags = [
     'Mentally'
 ]
 
+PASSWORD = 'T123@example'
+
+
+def _taxonomy_names(base, count, fake, prefix):
+    """Return `count` unique names starting with the base list."""
+    names = base[:count]
+    for index in range(len(names), count):
+        names.append(f'{fake.word().capitalize()}-{prefix}{index}')
+    return names
+
+
+def _generate_posts(args):
+    """Generate a chunk of post rows, run in worker processes."""
+    (seed, count, start_date, n_authors, n_categories, n_tags,
+     paragraphs) = args
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        rows.append((
+            rng.randrange(n_authors),
+            fake.sentence(nb_words=6)[:255],
+            '\n\n'.join(
+                fake.paragraph(nb_sentences=5) for _ in range(paragraphs)
+            ),
+            rng.random() < 0.8,
+            start_date - timedelta(seconds=rng.randrange(3 * 365 * 86400)),
+            rng.sample(range(n_categories), min(n_categories, 2)),
+            rng.sample(range(n_tags), min(n_tags, rng.randint(1, 3))),
+        ))
+    return rows
+
+
+def _generate_comments(args):
+    """Generate a chunk of comment rows, run in worker processes."""
+    seed, count, n_posts, n_users = args
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    return [
+        (rng.randrange(n_posts), rng.randrange(n_users),
+         fake.sentence(nb_words=12)[:1000])
+        for _ in range(count)
+    ]
+
 
 class Command(BaseCommand):
     """Django command to inserting fake data."""
+    help = 'Seed users, taxonomies, posts and comments for benchmarks.'
 
-    def __init__(self, *args, **kwargs):
-        super(Command, self).__init__(*args, **kwargs)
-        self.fake = Faker()
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--posts', type=int, default=10)
+        parser.add_argument('--comments', type=int, default=0)
+        parser.add_argument('--tags', type=int, default=len(tags))
+        parser.add_argument(
+            '--categories', type=int, default=len(categories)
+        )
+        parser.add_argument(
+            '--paragraphs', type=int, default=1,
+            help='Paragraphs of about 400 characters per post content.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Same seed always generates the same content.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk_create/COPY transaction.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Processes generating fake rows.'
+        )
 
     def handle(self, *args, **options):
         """Entrypoint for command."""
-        fake_user = get_user_model().objects.create_user(
-            email=self.fake.email(), password='T123@example', is_verified=True
+        if options['users'] < 1:
+            raise CommandError('At least one user is required.')
+        self.fake = Faker()
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.paragraphs = options['paragraphs']
+        # Dates only depend on the seed within the same day.
+        self.start_date = timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+        users, profiles = self._create_users(options['users'])
+        owner = users[0]
+        category_objs = self._get_or_create_taxonomy(
+            Category, _taxonomy_names(
+                categories, options['categories'], self.fake, 'c'
+            ), owner
+        )
+        tag_objs = self._get_or_create_taxonomy(
+            Tag, _taxonomy_names(tags, options['tags'], self.fake, 't'),
+            owner
         )
-        fake_profile = Profile.objects.get(user=fake_user)
-        fake_profile.first_name = self.fake.first_name()
-        fake_profile.last_name = self.fake.last_name()
-        fake_profile.bio = self.fake.paragraph(nb_sentences=3)
-        fake_profile.sex = random.choice(['M', 'F'])
-        fake_profile.save()
-
-        for category in categories:
-            Category.objects.get_or_create(user_id=1, name=category)
-
-        for tag in tags:
-            Tag.objects.get_or_create(user_id=1, name=tag)
-
-        for _ in range(10):
-            """Create and return 10 posts each time."""
-            post = Post.objects.create(
-                author=fake_profile,
-                title=self.fake.paragraph(nb_sentences=1),
-                content=self.fake.paragraph(nb_sentences=5),
-                status=random.choice([True, False]),
-                published_date=datetime.now()
+
+        # Forked workers only generate rows and never touch the database.
+        pool = None
+        self.imap = map
+        if options['workers'] > 1:
+            pool = multiprocessing.get_context('fork').Pool(
+                options['workers']
+            )
+            self.imap = partial(
+                ordered_map, pool, ahead=2 * options['workers']
+            )
+        try:
+            post_ids = self._create_posts(
+                options['posts'], options['seed'],
+                profiles, category_objs, tag_objs
+            )
+            comments = self._create_comments(
+                options['comments'], options['seed'], post_ids, users
             )
-            post.save()
-            category = Category.objects.get(name=random.choice(categories))
-            tag = Tag.objects.get(name=random.choice(tags))
-            post.categories.add(category)
-            post.tags.add(tag)
-            post.refresh_from_db()
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        # bulk_create skips the lifecycle hooks, invalidate once instead.
+        post_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {len(users)} users, {len(post_ids)} posts and "
+            f"{comments} comments."
+        ))
+
+    def _chunks(self, total):
+        """Yield the size of each batch for `total` rows."""
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def _create_users(self, count):
+        """Create verified users user<n>@example.com with profiles."""
+        start = (get_user_model().objects.aggregate(
+            Max('id'))['id__max'] or 0) + 1
+        password = make_password(PASSWORD)
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(
+                email=f'user{start + index}@example.com',
+                password=password,
+                is_verified=True
+            ) for index in range(count)
+        ], batch_size=self.batch_size)
+        # bulk_create skips the post_save signal creating profiles.
+        profiles = Profile.objects.bulk_create([
+            Profile(
+                user=user,
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                bio=self.fake.paragraph(nb_sentences=3),
+                sex=self.fake.random_element(['M', 'F'])
+            ) for user in users
+        ], batch_size=self.batch_size)
+        return users, profiles
+
+    def _get_or_create_taxonomy(self, model, names, user):
+        """Return objects for names, creating the missing ones."""
+        existing = {
+            obj.name: obj for obj in model.objects.filter(name__in=names)
+        }
+        model.objects.bulk_create([
+            model(user=user, name=name)
+            for name in names if name not in existing
+        ], batch_size=self.batch_size)
+        return list(model.objects.filter(name__in=names).order_by('id'))
+
+    def _create_posts(self, total, seed, profiles,
+                      category_objs, tag_objs):
+        """Create posts batch by batch, return the new post ids."""
+        post_ids = []
+        chunks = (
+            (seed * 1000003 + index, size, self.start_date,
+             len(profiles), len(category_objs), len(tag_objs),
+             self.paragraphs)
+            for index, size in enumerate(self._chunks(total))
+        )
+        for rows in self.imap(_generate_posts, chunks):
+            with transaction.atomic():
+                posts = Post.objects.bulk_create([
+                    Post(
+                        author_id=profiles[author].id,
+                        title=title,
+                        content=content,
+                        status=status,
+                        published_date=published_date
+                    ) for author, title, content, status, published_date,
+                    _, _ in rows
+                ])
+                copy_m2m(Post.categories, (
+                    (post.id, category_objs[index].id)
+                    for post, row in zip(posts, rows) for index in row[5]
+                ))
+                copy_m2m(Post.tags, (
+                    (post.id, tag_objs[index].id)
+                    for post, row in zip(posts, rows) for index in row[6]
+                ))
+                feeds.refresh([post.id for post in posts])
+            post_ids.extend(post.id for post in posts)
+            self.stdout.write(f'Posts: {len(post_ids)}/{total}')
+        return post_ids
+
+    def _create_comments(self, total, seed, post_ids, users):
+        """Create comments batch by batch on the new posts, return how
+        many were created."""
+        if not post_ids:
+            return 0
+        created = 0
+        chunks = (
+            (seed * 1000033 + index, size, len(post_ids), len(users))
+            for index, size in enumerate(self._chunks(total))
+        )
+        for rows in self.imap(_generate_comments, chunks):
+            with transaction.atomic():
+                comments = Comment.objects.bulk_create([
+                    Comment(
+                        post_obj_id=post_ids[post],
+                        user_id=users[user].id,
+                        comment=text
+                    ) for post, user, text in rows
+                ])
+                copy_m2m(Post.comments, (
+                    (comment.post_obj_id, comment.id)
+                    for comment in comments
+                ))
+            created += len(comments)
+            self.stdout.write(f'Comments: {created}/{total}')
+        return created
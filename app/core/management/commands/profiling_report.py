@@ -0,0 +1,57 @@
+"""
+Command for reporting the worst endpoints recorded by the profiling middleware.
+"""
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+SORT_FIELDS = [
+    'p95_ms', 'p99_ms', 'avg_ms', 'sql_count',
+    'sql_ms', 'duplicates', 'serializer_ms', 'count'
+]
+
+
+class Command(BaseCommand):
+    """Django command to dump the worst profiled endpoints."""
+    help = 'Print the worst endpoints aggregated by ProfilingMiddleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--sort', choices=SORT_FIELDS, default='p95_ms'
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Delete the aggregated data after printing it.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        routes = profiling.load_routes()
+        worst = sorted(
+            routes.items(),
+            key=lambda item: item[1][options['sort']],
+            reverse=True
+        )[:options['top']]
+
+        if not worst:
+            self.stdout.write('No profiled requests.')
+        for route, stats in worst:
+            self.stdout.write(
+                f"{route}\n"
+                f"  requests={stats['count']} "
+                f"avg={stats['avg_ms']:.1f}ms "
+                f"p50<={stats['p50_ms']}ms p95<={stats['p95_ms']}ms "
+                f"p99<={stats['p99_ms']}ms\n"
+                f"  sql={stats['sql_count']:.1f} queries "
+                f"{stats['sql_ms']:.1f}ms "
+                f"duplicates={stats['duplicates']:.1f} "
+                f"n+1 requests={stats['n_plus_one']}\n"
+                f"  serializer={stats['serializer_ms']:.1f}ms "
+                f"cache hits={stats['cache_hits']} "
+                f"misses={stats['cache_misses']}"
+            )
+
+        if options['reset']:
+            profiling.reset()
+            self.stdout.write(self.style.SUCCESS('Profiling data reset.'))
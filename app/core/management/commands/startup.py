@@ -0,0 +1,93 @@
+"""
+Command for preparing a container before serving, see core/startup.py.
+
+Phases run in a single process, sparing the interpreter and Django
+startup of a command per phase, and each reports its timing.
+"""
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+
+class Command(BaseCommand):
+    """Django command to wait for dependencies, collect static files,
+    migrate and warm the cache when needed."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--migrations', choices=('apply', 'wait', 'skip'),
+            default='apply',
+            help='Apply pending migrations, or wait for a migrate job '
+                 'to apply them.'
+        )
+        parser.add_argument(
+            '--migrations-timeout', type=float, default=300,
+            help='Seconds to wait for a migrate job.'
+        )
+        parser.add_argument('--skip-static', action='store_true')
+        parser.add_argument('--skip-warm', action='store_true')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.perf_counter()
+        self._phase('wait_for_db', self.wait_for_db)
+        if not options['skip_static']:
+            self._phase('collectstatic', self.collectstatic)
+        if options['migrations'] == 'apply':
+            self._phase('migrate', self.migrate)
+        elif options['migrations'] == 'wait':
+            self._phase('migrate', lambda: self.wait_for_migrations(
+                options['migrations_timeout']
+            ))
+        if not options['skip_warm']:
+            self._phase('warm_cache', self.warm_cache)
+        self.stdout.write(self.style.SUCCESS(
+            f'Startup took {time.perf_counter() - start:.2f}s.'
+        ))
+
+    def _phase(self, name, run):
+        start = time.perf_counter()
+        outcome = run()
+        self.stdout.write(
+            f'{name}: {outcome or "done"} '
+            f'in {time.perf_counter() - start:.2f}s'
+        )
+
+    def wait_for_db(self):
+        call_command('wait_for_db', stdout=self.stdout, stderr=self.stderr)
+
+    def collectstatic(self):
+        sources = startup.static_sources_hash()
+        if sources == startup.collected_static_hash():
+            return 'skipped, static files unchanged'
+        call_command('collectstatic', interactive=False, verbosity=0)
+        startup.save_static_hash(sources)
+
+    def migrate(self):
+        if not startup.migration_plan():
+            return 'skipped, no migrations to apply'
+        with startup.migrate_lock():
+            # Another container may have applied them meanwhile.
+            plan = startup.migration_plan()
+            if plan:
+                call_command('migrate', interactive=False, verbosity=0)
+        return f'applied {len(plan)} migrations'
+
+    def wait_for_migrations(self, timeout):
+        deadline = time.monotonic() + timeout
+        while startup.migration_plan():
+            if time.monotonic() > deadline:
+                raise CommandError(
+                    f'Migrations still pending after {timeout:g}s.'
+                )
+            time.sleep(1)
+
+    def warm_cache(self):
+        # A cache failure only leaves the lists cold.
+        try:
+            call_command('warm_cache', stdout=self.stdout)
+        except Exception as error:
+            return f'failed, {error!r}'
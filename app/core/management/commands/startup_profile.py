@@ -0,0 +1,127 @@
+"""
+Command for profiling the cold start of web and worker processes.
+
+Every process type is started afresh under `python -X importtime`, the
+way uWSGI or a Celery worker would start it, and reports:
+- its time to be ready: the WSGI application loaded for web processes,
+  the task modules imported for workers;
+- for web processes, the time to the end of a first request, loading
+  the URLconf and views;
+- its import costs, cumulative for the imports of the startup code and
+  self times summed per top level package.
+With --check, exceeding the STARTUP_BUDGETS seconds to be ready fails.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+PROCESSES = {
+    'web': '''
+import json, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+ready = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {{'PATH_INFO': {path!r}, 'HTTP_HOST': {host!r}}}
+setup_testing_defaults(environ)
+statuses = []
+response = application(environ, lambda status, *args: statuses.append(status))
+b''.join(response)
+print(json.dumps({{
+    'ready': ready - start, 'first_request': time.perf_counter() - start,
+    'status': statuses[0],
+}}))
+''',
+    'worker': '''
+import json, time
+start = time.perf_counter()
+from app.celery_config import app
+app.loader.import_default_modules()
+print(json.dumps({{'ready': time.perf_counter() - start}}))
+''',
+}
+
+
+def profile(process, path='/', host='localhost'):
+    """Start a process type afresh, return its timings and its
+    -X importtime rows."""
+    code = PROCESSES[process].format(path=path, host=host)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, 'PROCESS_TYPE': process}
+    )
+    if result.returncode:
+        raise CommandError(
+            f'The {process} process failed:\n{result.stderr[-2000:]}'
+        )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, startup.parse_importtime(result.stderr)
+
+
+class Command(BaseCommand):
+    """Django command to report what the cold start of web and worker
+    processes costs."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--process', choices=PROCESSES, action='append',
+            help='Process types to profile, all of them by default.'
+        )
+        parser.add_argument(
+            '--path', default='/blog/api/v1/posts/',
+            help='Path of the first request of web processes.'
+        )
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail when a process exceeds its STARTUP_BUDGETS.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        host = next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+             if host != '*'),
+            'localhost'
+        )
+        over_budget = []
+        for process in options['process'] or PROCESSES:
+            timings, rows = profile(process, options['path'], host)
+            self.report(process, timings, rows, options['top'])
+            budget = settings.STARTUP_BUDGETS[process]
+            if timings['ready'] > budget:
+                over_budget.append(
+                    f'{process} ready in {timings["ready"]:.2f}s, '
+                    f'budget {budget:g}s'
+                )
+        if options['check'] and over_budget:
+            raise CommandError('; '.join(over_budget))
+
+    def report(self, process, timings, rows, top):
+        line = f'{process}: ready in {timings["ready"]:.2f}s'
+        if 'first_request' in timings:
+            line += (
+                f', first request in {timings["first_request"]:.2f}s '
+                f'({timings["status"]})'
+            )
+        imports = [row for row in rows if row[3] == 0]
+        total = sum(cumulative for _, _, cumulative, _ in imports)
+        self.stdout.write(self.style.SUCCESS(
+            f'{line}, imports {total / 1e6:.2f}s'
+        ))
+        self.stdout.write('  slowest imports (cumulative)')
+        for module, _, cumulative, _ in sorted(
+            imports, key=lambda row: row[2], reverse=True
+        )[:top]:
+            self.stdout.write(f'    {cumulative / 1e3:8.1f}ms {module}')
+        self.stdout.write('  packages (self)')
+        for package, self_us in startup.package_times(rows)[:top]:
+            self.stdout.write(f'    {self_us / 1e3:8.1f}ms {package}')
@@ -0,0 +1,100 @@
+"""
+Command for reporting memory usage of uWSGI workers from the stats server.
+"""
+import json
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_stats(address, timeout=2):
+    """Read and return the JSON document served by the uWSGI stats server.
+    Address is either `host:port` or the path of a unix socket."""
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        sock = socket.create_connection((host or '127.0.0.1', int(port)),
+                                        timeout=timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+
+    chunks = []
+    with sock:
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    return json.loads(b''.join(chunks))
+
+
+def process_rss(pid):
+    """Return the resident set size of a local process in bytes,
+    0 if the process is not visible from this container."""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class Command(BaseCommand):
+    """Django command to report startup and steady-state RSS of uWSGI."""
+    help = 'Report per worker RSS and request counts from uWSGI stats.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address', default='127.0.0.1:9191',
+            help='Stats server address, host:port or unix socket path.'
+        )
+        parser.add_argument(
+            '--samples', type=int, default=1,
+            help='Number of samples to take.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=10,
+            help='Seconds between samples.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for sample in range(options['samples']):
+            if sample:
+                time.sleep(options['interval'])
+            try:
+                stats = read_stats(options['address'])
+            except (OSError, ValueError) as e:
+                raise CommandError(
+                    f"Unable to read uWSGI stats from "
+                    f"{options['address']}: {e}"
+                )
+            self._report(stats)
+
+    def _report(self, stats):
+        """Write one sample: the master and every running worker."""
+        master_rss = process_rss(stats['pid'])
+        self.stdout.write(
+            f"master pid={stats['pid']} rss={master_rss / 2**20:.1f}MiB "
+            f"listen_queue={stats.get('listen_queue', 0)}"
+        )
+        total_rss = master_rss
+        for worker in stats['workers']:
+            if not worker['pid']:
+                continue
+            rss = worker.get('rss') or process_rss(worker['pid'])
+            total_rss += rss
+            self.stdout.write(
+                f"  worker {worker['id']} pid={worker['pid']} "
+                f"status={worker['status']} rss={rss / 2**20:.1f}MiB "
+                f"requests={worker['requests']} "
+                f"avg_rt={worker.get('avg_rt', 0) / 1000:.1f}ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"total rss={total_rss / 2**20:.1f}MiB"
+        ))
@@ -1,5 +1,5 @@
 """
-Command for waiting for db untill it will be ready.
+Command for waiting for db, cache and broker untill they will be ready.
 """
 import time
 
@@ -7,22 +7,51 @@ from django.core.management.base import BaseCommand
 from django.db.utils import OperationalError
 
 from psycopg2 import OperationalError as Psycopg2Error
+from kombu.exceptions import OperationalError as KombuError
+from redis.exceptions import RedisError
+
+from core import health
 
 
 class Command(BaseCommand):
-    """Django command to wait for db."""
+    """Django command to wait for db, cache and broker."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-delay', type=float, default=10,
+            help='Upper bound in seconds of the exponential backoff.'
+        )
+        parser.add_argument('--skip-cache', action='store_true')
+        parser.add_argument('--skip-broker', action='store_true')
 
     def handle(self, *args, **options):
         """Entrypoint for command."""
+        self.max_delay = options['max_delay']
         self.stdout.write("Database is loading...")
-        db_up = False
-        while db_up is False:
+        self._wait(
+            'Database',
+            lambda: self.check(databases=['default']),
+            (Psycopg2Error, OperationalError)
+        )
+        if not options['skip_cache']:
+            self._wait('Cache', health.check_cache, (RedisError,))
+        if not options['skip_broker']:
+            self._wait(
+                'Broker', health.check_broker, (KombuError, OSError)
+            )
+
+    def _wait(self, name, probe, errors):
+        """Call probe until it stops raising errors, doubling the delay."""
+        delay = 0.5
+        while True:
             try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2Error, OperationalError):
+                probe()
+                break
+            except errors:
                 self.stdout.write(
-                    "Database is unavailable! waiting 1 second..."
-                    )
-                time.sleep(1)
-            self.stdout.write(self.style.SUCCESS("Database is available!"))
+                    f"{name} is unavailable! "
+                    f"waiting {delay:g} seconds..."
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+        self.stdout.write(self.style.SUCCESS(f"{name} is available!"))
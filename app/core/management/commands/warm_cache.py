@@ -0,0 +1,31 @@
+"""
+Command for warming the cached post lists, see core/warming.py.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import warming
+
+
+class Command(BaseCommand):
+    """Django command to render the common post lists ahead of
+    readers."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int,
+            help='Pages of every list, CACHE_WARM_PAGES by default.'
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Rendering threads, CACHE_WARM_WORKERS by default.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.perf_counter()
+        warmed = warming.warm(options['pages'], options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed} pages in {time.perf_counter() - start:.2f}s.'
+        ))
@@ -0,0 +1,145 @@
+"""
+Prometheus metrics for the web and Celery processes.
+
+Under uWSGI (several workers) and Celery (prefork pool) every process
+writes its samples to PROMETHEUS_MULTIPROC_DIR and the exposition merges
+them, see `collect()`. Without that variable the in-process default
+registry is used, as with runserver and the test suite.
+
+Gauges set a `multiprocess_mode`. The live ones only count running
+processes, so exiting uWSGI workers and Celery pool processes call
+`mark_process_dead()`, see app/wsgi.py and app/celery_config.py.
+"""
+import os
+import time
+import logging
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import multiprocess
+from prometheus_client.multiprocess import MultiProcessCollector
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Latency of HTTP requests.',
+    ['method', 'route', 'status'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being handled.',
+    multiprocess_mode='livesum'
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries executed per HTTP request.',
+    ['method', 'route'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200)
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total',
+    'Cache lookups of the default cache.',
+    ['result']
+)
+POST_LIST_CACHE = Counter(
+    'post_list_cache_total',
+    'Lookups of the cached post list.',
+    ['result']
+)
+TWO_TIER_CACHE = Counter(
+    'two_tier_cache_lookups_total',
+    'Lookups of the two tier caches by tier.',
+    ['namespace', 'tier', 'result']
+)
+TASK_DURATION = Histogram(
+    'celery_task_duration_seconds',
+    'Run time of Celery tasks.',
+    ['task', 'state'],
+    buckets=(.05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+)
+TASK_FAILURES = Counter(
+    'celery_task_failures_total',
+    'Failed Celery tasks.',
+    ['task', 'exception']
+)
+
+
+class QueueDepthCollector:
+    """Read the depth of the Celery queues from the broker on scrape."""
+
+    def __init__(self, celery_app):
+        self.celery_app = celery_app
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            'celery_queue_depth',
+            'Messages waiting in the Celery queues.',
+            labels=['queue']
+        )
+        try:
+            with self.celery_app.connection_for_read() as connection:
+                connection.ensure_connection(max_retries=1, timeout=1)
+                channel = connection.default_channel
+                for queue in self.celery_app.conf.task_queues or []:
+                    declared = channel.queue_declare(
+                        queue=queue.name, passive=True
+                    )
+                    depth.add_metric([queue.name], declared.message_count)
+        except Exception:
+            logger.warning('Unable to read Celery queue depth.',
+                           exc_info=True)
+        yield depth
+
+
+def collect():
+    """Return the exposition of every process plus the queue depth."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    from app.celery_config import app as celery_app
+    broker_registry = CollectorRegistry()
+    broker_registry.register(QueueDepthCollector(celery_app))
+
+    return generate_latest(registry) + generate_latest(broker_registry)
+
+
+def mark_process_dead(pid=None):
+    """Drop the live gauge samples of an exiting process, the current
+    one by default."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+_task_started = {}
+
+
+def task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or 'UNKNOWN').observe(
+            time.perf_counter() - started
+        )
+
+
+def task_failure(sender=None, exception=None, **kwargs):
+    TASK_FAILURES.labels(sender.name, type(exception).__name__).inc()
+
+
+def worker_process_shutdown(pid=None, **kwargs):
+    mark_process_dead(pid)
@@ -0,0 +1,120 @@
+"""
+Middlewares.
+"""
+import time
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.crypto import constant_time_compare
+
+from redis.exceptions import RedisError
+
+from . import metrics, post_cache, profiling
+
+logger = logging.getLogger(__name__)
+
+
+def route_name(request):
+    """Return the view name of the request for metric labels."""
+    match = request.resolver_match
+    return match.view_name if match else 'unresolved'
+
+
+class MetricsMiddleware:
+    """Record Prometheus latency and query count metrics per route."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            stack.enter_context(
+                metrics.REQUESTS_IN_PROGRESS.track_inprogress()
+            )
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(count_queries)
+                )
+            response = self.get_response(request)
+
+        route = route_name(request)
+        metrics.REQUEST_LATENCY.labels(
+            request.method, route, response.status_code
+        ).observe(time.perf_counter() - start)
+        metrics.REQUEST_QUERIES.labels(request.method, route).observe(
+            queries
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile SQL, cache and serializer costs of a request.
+
+    Enabled for every request with PROFILING_ENABLED or per request
+    by sending the PROFILING_HEADER header, whose value must be the
+    PROFILING_SECRET unless DEBUG is on: results are returned in a
+    Server-Timing header and aggregated per route in Redis, they're not
+    for anonymous clients.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _enabled(self, request):
+        if settings.PROFILING_ENABLED:
+            return True
+        value = settings.PROFILING_HEADER and request.headers.get(
+            settings.PROFILING_HEADER
+        )
+        if not value:
+            return False
+        if settings.DEBUG:
+            return True
+        return bool(settings.PROFILING_SECRET) and constant_time_compare(
+            value, settings.PROFILING_SECRET
+        )
+
+    def __call__(self, request):
+        if not self._enabled(request):
+            return self.get_response(request)
+
+        with ExitStack() as stack:
+            profile = stack.enter_context(profiling.RequestProfile())
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        response['Server-Timing'] = profile.server_timing()
+        n_plus_one = profile.n_plus_one()
+        if n_plus_one:
+            logger.warning(
+                'Possible N+1 on %s: %s', request.path, n_plus_one
+            )
+
+        route = f'{request.method} {route_name(request)}'
+        try:
+            profiling.store(route, profile)
+        except RedisError:
+            logger.exception('Unable to store the profile of %s', route)
+        return response
+
+
+class CacheInvalidationMiddleware:
+    """Coalesce the post list invalidations of a request into one."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with post_cache.coalesce():
+            return self.get_response(request)
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+TABLES = ('core_category', 'core_tag')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create pg_trgm and the indexes of the name searches, where the
+    server ships the extension. Searches fall back to LIKE otherwise,
+    see core.models.TaxonomyQuerySet."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_name_trgm '
+            f'ON {table} USING gin (UPPER(name) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_remove_post_counted_views'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
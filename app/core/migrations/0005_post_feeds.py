@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILL_FEEDS = [
+    'INSERT INTO core_tagfeed (tag_id, post_id, published_date) '
+    'SELECT m2m.tag_id, post.id, post.published_date '
+    'FROM core_post_tags m2m JOIN core_post post ON post.id = m2m.post_id '
+    'WHERE post.status',
+    'INSERT INTO core_categoryfeed (category_id, post_id, published_date) '
+    'SELECT m2m.category_id, post.id, post.published_date '
+    'FROM core_post_categories m2m '
+    'JOIN core_post post ON post.id = m2m.post_id WHERE post.status',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.post')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tag')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CategoryFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_date', models.DateTimeField()),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tagfeed',
+            index=models.Index(fields=['tag', 'published_date', 'post'], name='core_tagfeed_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='tagfeed',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='core_tagfeed_tag_post'),
+        ),
+        migrations.AddIndex(
+            model_name='categoryfeed',
+            index=models.Index(fields=['category', 'published_date', 'post'], name='core_categoryfeed_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='categoryfeed',
+            constraint=models.UniqueConstraint(fields=('category', 'post'), name='core_categoryfeed_category_post'),
+        ),
+        migrations.RunSQL(FILL_FEEDS, migrations.RunSQL.noop),
+    ]
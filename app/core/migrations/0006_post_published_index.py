@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:28
+
+from django.db import migrations, models
+
+# Feeds were filled with scheduled posts too, they're added once due.
+DROP_SCHEDULED = [
+    'DELETE FROM core_tagfeed WHERE published_date > now()',
+    'DELETE FROM core_categoryfeed WHERE published_date > now()',
+]
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_post_feeds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', True)), fields=['published_date'], name='core_post_published'),
+        ),
+        migrations.RunSQL(DROP_SCHEDULED, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_post_published_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=1024, unique=True)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('records', models.PositiveBigIntegerField(default=0)),
+                ('imported', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
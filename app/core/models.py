@@ -3,16 +3,29 @@ Models.
 """
 import os
 import uuid
+from functools import lru_cache
 
 from django.utils import timezone
-from django.core.cache import cache
 from django.db.models import (
     QuerySet,
-    Manager
+    Manager,
+    Q,
+    Case,
+    When,
+    Value,
+    Count,
+    Func,
+    FloatField,
+    BooleanField,
+    IntegerField,
+    OuterRef,
+    Subquery
 )
+from django.db.models.functions import Now, Substr, Upper
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
 from django.utils.text import Truncator
-from django.db import models
+from django.db import models, connection
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
@@ -31,6 +44,17 @@ from django_lifecycle import (
 
 from app.models import TimeStampedModel
 
+from . import post_cache
+
+# Snippets only need the first words, list querysets load this many
+# characters of the text instead of the whole column.
+SNIPPET_SOURCE_LENGTH = 200
+# Columns of the post export, see PostQuerySet.for_export().
+EXPORT_FIELDS = (
+    'id', 'author_id', 'title', 'content', 'image', 'status',
+    'published_date', 'created_at', 'updated_at', 'category_ids', 'tag_ids'
+)
+
 
 def post_image_file_path(instance, filename):
     """Create and return a path for saving images."""
@@ -41,11 +65,44 @@ def post_image_file_path(instance, filename):
 
 
 class PostQuerySet(QuerySet):
+    def published(self):
+        """Posts with a status whose published date is due, see
+        core/publishing.py."""
+        return self.filter(status=True, published_date__lte=Now())
+
     def update(self, **kwargs):
         """Overrode update method on post objects to
         invalidated cache on deleting or saving posts."""
-        cache.delete('post_objects')
-        super(PostQuerySet, self).update(updated_at=timezone.now(), **kwargs)
+        post_cache.invalidate()
+        kwargs.setdefault('updated_at', timezone.now())
+        refreshed = None
+        if {'status', 'published_date'} & set(kwargs):
+            refreshed = list(self.values_list('id', flat=True))
+        super(PostQuerySet, self).update(**kwargs)
+        if refreshed:
+            from . import feeds
+            feeds.refresh(refreshed)
+
+    def with_snippet_source(self):
+        """Defer content, annotating only its start as `content_start`."""
+        return self.defer('content').annotate(
+            content_start=Substr('content', 1, SNIPPET_SOURCE_LENGTH)
+        )
+
+    def for_export(self):
+        """Rows of EXPORT_FIELDS, the ids of the categories and tags of
+        every post selected along with it as `category_ids` and
+        `tag_ids`, so that rows can be streamed from a single cursor."""
+        annotations = {}
+        for field in ('categories', 'tags'):
+            m2m = getattr(self.model, field)
+            source = f'{m2m.field.m2m_field_name()}_id'
+            target = f'{m2m.field.m2m_reverse_field_name()}_id'
+            annotations[f'{target[:-3]}_ids'] = IdArray(
+                m2m.through.objects.filter(**{source: OuterRef('pk')})
+                .values(target)
+            )
+        return self.annotate(**annotations).values(*EXPORT_FIELDS)
 
 
 class PostManager(Manager):
@@ -53,6 +110,85 @@ class PostManager(Manager):
     def get_queryset(self):
         return PostQuerySet(self.model, using=self._db)
 
+    def published(self):
+        return self.get_queryset().published()
+
+
+class CommentQuerySet(QuerySet):
+    def with_snippet_source(self):
+        """Defer comment, annotating only its start as `comment_start`."""
+        return self.defer('comment').annotate(
+            comment_start=Substr('comment', 1, SNIPPET_SOURCE_LENGTH)
+        )
+
+
+@lru_cache(maxsize=None)
+def trigram_available():
+    """Return whether the pg_trgm extension is installed, see the
+    0004_name_trigram_indexes migration."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        )
+        return cursor.fetchone() is not None
+
+
+class TrigramWordSimilarity(Func):
+    """pg_trgm word_similarity(), the similarity of a string with the
+    most similar part of another one."""
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+
+class TrigramWordMatch(Func):
+    """pg_trgm `<%`, whether the word similarity of the first argument
+    with the second one reaches pg_trgm.word_similarity_threshold. It
+    can use trigram indexes of the second one, unlike a comparison of
+    TrigramWordSimilarity."""
+    template = '%(expressions)s'
+    arg_joiner = ' <%% '
+    output_field = BooleanField()
+
+
+class IdArray(Subquery):
+    """ARRAY(subquery), the ids selected by a subquery as a sorted
+    array. Subqueries lose their ordering, it's part of the template."""
+    template = 'ARRAY(%(subquery)s ORDER BY 1)'
+    output_field = ArrayField(IntegerField())
+
+
+class TaxonomyQuerySet(QuerySet):
+    def search(self, query):
+        """Names starting with or similar to query, most similar first,
+        annotated with their `similarity` to it.
+
+        Both lookups are on UPPER(name) like the trigram indexes. Without
+        pg_trgm names containing query are found instead.
+        """
+        query = query.upper()
+        queryset = self.annotate(search_name=Upper('name')).annotate(
+            prefix=Case(
+                When(Q(search_name__startswith=query), then=Value(True)),
+                default=Value(False), output_field=BooleanField()
+            )
+        )
+        if trigram_available():
+            queryset = queryset.filter(
+                Q(search_name__startswith=query)
+                | Q(TrigramWordMatch(Value(query), 'search_name'))
+            ).annotate(
+                similarity=TrigramWordSimilarity(Value(query), 'search_name')
+            )
+        else:
+            queryset = queryset.filter(
+                search_name__contains=query
+            ).annotate(similarity=Value(0.0, output_field=FloatField()))
+        return queryset.order_by('-prefix', '-similarity', 'name')
+
+    def with_usage(self):
+        """Annotate the number of posts using each object as `usage`."""
+        return self.annotate(usage=Count('post'))
+
 
 class UserManager(BaseUserManager):
     """
@@ -141,14 +277,32 @@ class Post(TimeStampedModel, LifecycleModel):
 
     objects = PostManager()
 
+    class Meta:
+        indexes = [
+            # Due posts and the posts scheduled next, see published().
+            models.Index(
+                fields=['published_date'], name='core_post_published',
+                condition=Q(status=True)
+            ),
+        ]
+
     @hook(AFTER_SAVE)
     @hook(AFTER_DELETE)
     def invalidate_cache(self):
-        cache.delete('post_objects')
+        post_cache.invalidate()
+
+    @hook(AFTER_SAVE, when_any=['status', 'published_date'], has_changed=True)
+    def refresh_feeds(self):
+        """Feeds only hold published posts, by published date."""
+        from . import feeds
+        feeds.refresh([self.id])
 
     def content_snippet(self):
         """Return a snippet of content."""
-        truncated_content = Truncator(self.content).words(5)
+        content = getattr(self, 'content_start', None)
+        if content is None:
+            content = self.content
+        truncated_content = Truncator(content).words(5)
         return truncated_content
 
     def __str__(self):
@@ -162,6 +316,8 @@ class Category(TimeStampedModel):
     )
     name = models.CharField(max_length=255)
 
+    objects = TaxonomyQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -173,10 +329,65 @@ class Tag(TimeStampedModel):
     )
     name = models.CharField(max_length=255)
 
+    objects = TaxonomyQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
 
+class FeedEntry(models.Model):
+    """A published post of a tag or category, see core/feeds.py."""
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='+'
+    )
+    published_date = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+
+
+class TagFeed(FeedEntry):
+    """Published posts of each tag."""
+    # Indexed first by the constraint and the range index.
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, related_name='+', db_index=False
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post'], name='core_tagfeed_tag_post'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', 'published_date', 'post'],
+                name='core_tagfeed_range'
+            ),
+        ]
+
+
+class CategoryFeed(FeedEntry):
+    """Published posts of each category."""
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name='+', db_index=False
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'post'],
+                name='core_categoryfeed_category_post'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['category', 'published_date', 'post'],
+                name='core_categoryfeed_range'
+            ),
+        ]
+
+
 class Comment(TimeStampedModel):
     """This class defines comments attributes."""
     post_obj = models.ForeignKey(Post, on_delete=models.CASCADE)
@@ -185,10 +396,29 @@ class Comment(TimeStampedModel):
     )
     comment = models.TextField(max_length=1000)
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self):
         return f'from: {self.user} - on: {self.post_obj}'
 
     def comment_snippet(self):
         """Return a snippet of the comment."""
-        trancated_comment = Truncator(self.comment).words(5)
+        comment = getattr(self, 'comment_start', None)
+        if comment is None:
+            comment = self.comment
+        trancated_comment = Truncator(comment).words(5)
         return trancated_comment
+
+
+class PostImport(models.Model):
+    """Progress of the import_posts command for a file, updated in the
+    transaction of every batch so an interrupted import resumes after
+    its last committed batch."""
+    source = models.CharField(max_length=1024, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    records = models.PositiveBigIntegerField(default=0)
+    imported = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.records} records'
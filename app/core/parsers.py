@@ -0,0 +1,21 @@
+"""
+Parsers for the REST API.
+"""
+import orjson
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import ORJSONRenderer
+
+
+class ORJSONParser(BaseParser):
+    """Parse UTF-8 JSON request bodies with orjson."""
+    media_type = 'application/json'
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,16 @@
+"""
+Process pool helpers of the insert_data and import_posts commands.
+"""
+from collections import deque
+
+
+def ordered_map(pool, func, items, ahead):
+    """Like pool.imap, only submitting `ahead` items in advance instead
+    of consuming the whole items iterable."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= ahead:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
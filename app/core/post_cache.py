@@ -0,0 +1,131 @@
+"""
+Cache of the post list.
+
+Entries are tagged with the generation they were built from and every
+invalidation bumps the generation, so a rebuild racing with a write
+can't leave an outdated entry looking fresh.
+
+`invalidate()` runs once the transaction commits. Inside a request
+(see `core.middleware.CacheInvalidationMiddleware`) the invalidations
+of every committed write are coalesced into a single one when the
+response is ready, so a burst of writes doesn't trigger a rebuild per
+write.
+
+With POST_LIST_CACHE_SWR an outdated entry is still served while a
+single reader, holding a Redis lock, rebuilds it.
+
+Besides the default list, variants like filtered or later pages have
+their own entries, see `key()`. They share the generation, so a single
+invalidation outdates all of them.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from redis.exceptions import RedisError
+
+from . import metrics
+
+
+KEY = 'post_objects'
+GENERATION_KEY = f'{KEY}:generation'
+LOCK_KEY = f'{KEY}:lock'
+
+_batch = ContextVar('post_cache_batch', default=None)
+
+
+class _Batch:
+    dirty = False
+
+
+def key(variant=''):
+    """Return the cache key of a variant of the post list, the default
+    list being the empty variant."""
+    return f'{KEY}:{variant}' if variant else KEY
+
+
+def bump_generation():
+    """Make the cached entry outdated right away."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # The key was evicted or flushed while entries tagged with the
+        # small generations counted from a reset may still be cached,
+        # start past any of them.
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate():
+    """Invalidate the post list once the transaction commits."""
+    batch = _batch.get()
+    if batch is None:
+        transaction.on_commit(bump_generation)
+    else:
+        transaction.on_commit(lambda: setattr(batch, 'dirty', True))
+
+
+@contextmanager
+def coalesce():
+    """Coalesce the invalidations committed in the block into one."""
+    batch = _Batch()
+    token = _batch.set(batch)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        if batch.dirty:
+            bump_generation()
+
+
+def _rebuild(entry_key, build, generation):
+    entry = (generation, build())
+    cache.set(entry_key, entry)
+    return entry
+
+
+def get_or_build(build, variant=''):
+    """Return the (generation, data) entry of a variant of the post
+    list, calling build() to rebuild it. The generation identifies the
+    data, e.g. to cache things derived from it."""
+    entry_key = key(variant)
+    values = cache.get_many([entry_key, GENERATION_KEY])
+    generation = values.get(GENERATION_KEY, 0)
+    entry = values.get(entry_key)
+    if entry is None:
+        metrics.POST_LIST_CACHE.labels('miss').inc()
+        return _rebuild(entry_key, build, generation)
+
+    # Serializers like msgpack read tuples back as lists.
+    entry = tuple(entry)
+    if entry[0] == generation:
+        metrics.POST_LIST_CACHE.labels('hit').inc()
+        return entry
+    if not settings.POST_LIST_CACHE_SWR:
+        metrics.POST_LIST_CACHE.labels('miss').inc()
+        return _rebuild(entry_key, build, generation)
+
+    lock = cache.lock(
+        f'{entry_key}:lock' if variant else LOCK_KEY,
+        timeout=settings.POST_LIST_CACHE_LOCK_TIMEOUT
+    )
+    try:
+        acquired = lock.acquire(blocking=False)
+    except RedisError:
+        # Redis went away since the lookup, see IGNORE_EXCEPTIONS.
+        acquired = False
+    if not acquired:
+        metrics.POST_LIST_CACHE.labels('stale').inc()
+        return entry
+    try:
+        metrics.POST_LIST_CACHE.labels('miss').inc()
+        return _rebuild(entry_key, build, generation)
+    finally:
+        try:
+            lock.release()
+        except RedisError:
+            # The rebuild outlived the lock timeout.
+            pass
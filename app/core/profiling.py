@@ -0,0 +1,202 @@
+"""
+Per request profiling: SQL, cache and serializer costs.
+
+A `RequestProfile` is activated by `core.middleware.ProfilingMiddleware`
+for the duration of a request. Instrumented code (the cache backend, the
+serializers) records into it through `current()`, which is a no-op
+returning None when profiling is off.
+
+Profiled requests are aggregated per route into Redis hashes holding
+counters and a latency histogram, see `store()` and `load_routes()`.
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from django_redis import get_redis_connection
+from rest_framework.serializers import BaseSerializer
+
+
+_active_profile = ContextVar('request_profile', default=None)
+
+# Upper bounds in milliseconds of the latency histogram buckets.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+def current():
+    """Return the profile of the running request, if any."""
+    return _active_profile.get()
+
+
+class RequestProfile:
+    """Counters collected while serving a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+        self._serializer_depth = 0
+
+    def __enter__(self):
+        self._token = _active_profile.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_profile.reset(self._token)
+        self.total_time = time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries[sql] += 1
+
+    @property
+    def sql_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        """Number of queries repeating an already executed statement."""
+        return sum(count - 1 for count in self.queries.values())
+
+    def n_plus_one(self):
+        """Return statements executed often enough to be an N+1."""
+        threshold = settings.PROFILING_N_PLUS_ONE_THRESHOLD
+        return [
+            sql for sql, count in self.queries.items() if count >= threshold
+        ]
+
+    def server_timing(self):
+        """Return the value of the Server-Timing header."""
+        return ', '.join([
+            f'total;dur={self.total_time * 1000:.1f}',
+            f'sql;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.sql_count} queries, '
+            f'{self.duplicate_count} duplicates"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+        ])
+
+
+def record_cache(hits, misses=0):
+    """Record cache lookups in the running profile."""
+    profile = current()
+    if profile is not None:
+        profile.cache_hits += hits
+        profile.cache_misses += misses
+
+
+def _timed_serializer_data(fget):
+    """Wrap BaseSerializer.data to time the outermost serialization."""
+    def data(self):
+        profile = current()
+        if profile is None:
+            return fget(self)
+        profile._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            profile._serializer_depth -= 1
+            if not profile._serializer_depth:
+                profile.serializer_time += time.perf_counter() - start
+    data._profiled = True
+    return data
+
+
+def install_serializer_timing():
+    """Time serializer output, called once when the app is ready."""
+    fget = BaseSerializer.data.fget
+    if not getattr(fget, '_profiled', False):
+        BaseSerializer.data = property(_timed_serializer_data(fget))
+
+
+def _routes_key():
+    return f'{settings.PROFILING_REDIS_PREFIX}:routes'
+
+
+def _route_key(route):
+    return f'{settings.PROFILING_REDIS_PREFIX}:route:{route}'
+
+
+def store(route, profile):
+    """Add a finished request profile to the Redis aggregate of a route."""
+    total_ms = profile.total_time * 1000
+    bucket = next(le for le in BUCKETS_MS if total_ms <= le)
+    key = _route_key(route)
+    pipe = get_redis_connection('default').pipeline(transaction=False)
+    pipe.sadd(_routes_key(), route)
+    pipe.hincrby(key, 'count', 1)
+    pipe.hincrby(key, f'le:{bucket}', 1)
+    pipe.hincrbyfloat(key, 'total_ms', total_ms)
+    pipe.hincrby(key, 'sql_count', profile.sql_count)
+    pipe.hincrbyfloat(key, 'sql_ms', profile.sql_time * 1000)
+    pipe.hincrby(key, 'duplicates', profile.duplicate_count)
+    pipe.hincrby(key, 'n_plus_one', int(bool(profile.n_plus_one())))
+    pipe.hincrby(key, 'cache_hits', profile.cache_hits)
+    pipe.hincrby(key, 'cache_misses', profile.cache_misses)
+    pipe.hincrbyfloat(key, 'serializer_ms', profile.serializer_time * 1000)
+    pipe.execute()
+
+
+def percentile(histogram, count, q):
+    """Return the upper bound of the bucket holding the q quantile."""
+    seen = 0
+    for le in BUCKETS_MS:
+        seen += histogram.get(le, 0)
+        if seen >= q * count:
+            return le
+    return BUCKETS_MS[-1]
+
+
+def load_routes():
+    """Return the aggregated stats of every profiled route."""
+    connection = get_redis_connection('default')
+    routes = {}
+    for route in connection.smembers(_routes_key()):
+        route = route.decode()
+        raw = {
+            field.decode(): float(value) for field, value in
+            connection.hgetall(_route_key(route)).items()
+        }
+        count = int(raw.get('count', 0))
+        if not count:
+            continue
+        histogram = {
+            float(field[3:]): value for field, value in raw.items()
+            if field.startswith('le:')
+        }
+        routes[route] = {
+            'count': count,
+            'avg_ms': raw['total_ms'] / count,
+            'p50_ms': percentile(histogram, count, 0.50),
+            'p95_ms': percentile(histogram, count, 0.95),
+            'p99_ms': percentile(histogram, count, 0.99),
+            'sql_count': raw['sql_count'] / count,
+            'sql_ms': raw['sql_ms'] / count,
+            'duplicates': raw['duplicates'] / count,
+            'n_plus_one': int(raw['n_plus_one']),
+            'cache_hits': int(raw['cache_hits']),
+            'cache_misses': int(raw['cache_misses']),
+            'serializer_ms': raw['serializer_ms'] / count,
+        }
+    return routes
+
+
+def reset():
+    """Delete every aggregated route."""
+    connection = get_redis_connection('default')
+    routes = connection.smembers(_routes_key())
+    connection.delete(
+        _routes_key(), *(_route_key(route.decode()) for route in routes)
+    )
@@ -0,0 +1,77 @@
+"""
+Publishing of scheduled posts.
+
+A post with a status is published once its published date is due, see
+`PostQuerySet.published()`. Lists read from the database show it right
+away, but the cached post list and the feeds were built before, so a
+periodic Celery beat task, `publish_due_posts`, publishes the posts
+which became due since its last run: batch by batch, their feed rows
+are added and the post lists are invalidated once, then they are
+warmed again, see core/warming.py.
+
+The end of the last run is kept in the cache, when it's lost the task
+looks PUBLISH_LOOKBACK seconds back, publishing posts twice is
+harmless.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from redis.exceptions import RedisError
+
+from . import feeds, post_cache, warming
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = 'publishing:watermark'
+LOCK_KEY = 'publishing:lock'
+
+
+def due_posts(since, until):
+    """Return the ids of posts with a status whose published date is
+    in (since, until], oldest first."""
+    return list(Post.objects.filter(
+        status=True, published_date__gt=since, published_date__lte=until
+    ).order_by('published_date').values_list('id', flat=True))
+
+
+def publish_due(now=None):
+    """Publish the posts due since the last run, return their number,
+    None when another run holds the lock."""
+    lock = cache.lock(LOCK_KEY, timeout=settings.PUBLISH_INTERVAL * 10)
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        return _publish_due(now or timezone.now())
+    finally:
+        try:
+            lock.release()
+        except RedisError:
+            # The run outlived the lock timeout.
+            pass
+
+
+def _publish_due(now):
+    watermark = cache.get(WATERMARK_KEY)
+    since = (
+        datetime.fromtimestamp(watermark, timezone.utc)
+        if watermark is not None
+        else now - timedelta(seconds=settings.PUBLISH_LOOKBACK)
+    )
+    post_ids = due_posts(since, now)
+    for start in range(0, len(post_ids), settings.PUBLISH_BATCH_SIZE):
+        batch = post_ids[start:start + settings.PUBLISH_BATCH_SIZE]
+        with transaction.atomic():
+            feeds.refresh(batch)
+            post_cache.invalidate()
+    # Timestamps, as serializers like msgpack don't read datetimes.
+    cache.set(WATERMARK_KEY, now.timestamp(), None)
+    if post_ids:
+        logger.info('Published %d posts due by %s.', len(post_ids), now)
+        warming.warm()
+    return len(post_ids)
@@ -0,0 +1,111 @@
+"""
+Renderers for the REST API.
+"""
+import csv
+import io
+from datetime import date
+from itertools import islice
+
+import orjson
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Render JSON with orjson.
+
+    Datetimes, UUIDs and dataclasses are serialized natively, whatever
+    else DRF's JSONEncoder knows about (Decimals, lazy strings,
+    querysets...) goes through it.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        # Honour `Accept: application/json; indent=...` like JSONRenderer.
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self._encoder.default,
+                            option=options)
+
+
+class StreamingRendererMixin:
+    """Renderers of lists of rows which can also be streamed, see
+    `stream()`. A dict, like an error, is rendered as a single row."""
+
+    def stream(self, rows, fields, batch_size):
+        """Yield the rendering of the rows iterable batch by batch, only
+        holding batch_size of them at a time."""
+        rows = iter(rows)
+        context = {'fields': fields, 'header': True}
+        while True:
+            batch = list(islice(rows, batch_size))
+            if batch or context['header']:
+                yield self.render(batch, renderer_context=context)
+            if len(batch) < batch_size:
+                return
+            context = {'fields': fields, 'header': False}
+
+
+def _rows(data):
+    return [data] if isinstance(data, dict) else data
+
+
+class NDJSONRenderer(StreamingRendererMixin, ORJSONRenderer):
+    """Render rows as newline delimited JSON, one object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options | orjson.OPT_APPEND_NEWLINE
+        # orjson over-allocates every dumped object, appending them
+        # right away frees them instead of holding a batch of them.
+        output = bytearray()
+        for row in _rows(data):
+            output += orjson.dumps(
+                row, default=self._encoder.default, option=options
+            )
+        return bytes(output)
+
+
+class CSVRenderer(StreamingRendererMixin, BaseRenderer):
+    """Render rows as CSV, with a header row unless the renderer
+    context's `header` is false. Columns are the context's `fields`,
+    the keys of the first row otherwise. Lists are joined by `;`."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        rows = _rows(data)
+        fields = renderer_context.get('fields') or (
+            list(rows[0]) if rows else []
+        )
+        output = io.StringIO()
+        writer = csv.writer(output)
+        if renderer_context.get('header', True):
+            writer.writerow(fields)
+        writer.writerows(
+            [self.format_value(row.get(field)) for field in fields]
+            for row in rows
+        )
+        return output.getvalue().encode(self.charset)
+
+    def format_value(self, value):
+        if isinstance(value, (list, tuple)):
+            return ';'.join(map(str, value))
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
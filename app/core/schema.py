@@ -0,0 +1,72 @@
+"""
+OpenAPI schema served from a build time artifact.
+
+Generating the schema introspects every view and serializer, so it's
+done once by the build_schema command when the image is built, which
+writes the YAML and JSON renderings to OPENAPI_SCHEMA_DIR. The version
+of the artifact is a hash of its content: `/api/schema/<version>/`
+never changes and is cached for good, `/api/schema/` is revalidated
+with its ETag, see `core.views.SchemaView`.
+
+In development, OPENAPI_SCHEMA_RUNTIME serves a schema generated on
+every request instead.
+"""
+import hashlib
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from drf_spectacular.renderers import (
+    OpenApiJsonRenderer,
+    OpenApiYamlRenderer
+)
+from drf_spectacular.settings import spectacular_settings
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+
+Artifact = namedtuple('Artifact', ['version', 'contents'])
+
+
+def generate():
+    """Return the schema rendered in every format."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        format: renderer().render(schema, renderer.media_type)
+        for format, renderer in RENDERERS.items()
+    }
+
+
+def _path(format):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'openapi.{format}'
+
+
+def write():
+    """Generate the artifact into OPENAPI_SCHEMA_DIR, return it."""
+    contents = generate()
+    Path(settings.OPENAPI_SCHEMA_DIR).mkdir(parents=True, exist_ok=True)
+    for format, content in contents.items():
+        _path(format).write_bytes(content)
+    load.cache_clear()
+    return load()
+
+
+@lru_cache(maxsize=None)
+def load():
+    """Return the artifact, read once per process."""
+    try:
+        contents = {format: _path(format).read_bytes() for format in RENDERERS}
+    except FileNotFoundError:
+        # Serving a schema beats failing, generate it once.
+        logger.warning(
+            'No OpenAPI schema in %s, run build_schema.',
+            settings.OPENAPI_SCHEMA_DIR
+        )
+        contents = generate()
+    version = hashlib.sha256(contents['yaml']).hexdigest()[:16]
+    return Artifact(version, contents)
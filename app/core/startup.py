@@ -0,0 +1,110 @@
+"""
+Container startup checks, see the startup command.
+
+Restarts and scaled out containers run the same image against the same
+database and static volume, so collecting static files and migrating
+are skipped when there's nothing to do:
+
+- the static sources found by the staticfiles finders are hashed and
+  the hash is kept next to the collected files, collectstatic only runs
+  when it differs;
+- migrations are applied when the migration plan isn't empty, holding a
+  PostgreSQL advisory lock so concurrent containers, or the one-shot
+  migrate job, don't apply them twice.
+
+The cold start of web and worker processes, imports first, is measured
+by the startup_profile command.
+"""
+import hashlib
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+STATIC_HASH_FILE = '.sources.sha256'
+# Key of the advisory lock serializing migrations, "migr".
+MIGRATE_LOCK_ID = 0x6d696772
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)')
+
+
+def static_sources_hash():
+    """Return a hash of the paths and contents of the static sources."""
+    files = {}
+    for finder in get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            # The first finder wins, like collectstatic.
+            files.setdefault(path, storage.path(path))
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(path.encode())
+        with open(files[path], 'rb') as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+def _static_hash_path():
+    return os.path.join(settings.STATIC_ROOT, STATIC_HASH_FILE)
+
+
+def collected_static_hash():
+    """Return the hash of the sources last collected, None if unknown."""
+    try:
+        with open(_static_hash_path()) as file:
+            return file.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def save_static_hash(value):
+    with open(_static_hash_path(), 'w') as file:
+        file.write(value)
+
+
+def migration_plan():
+    """Return the migrations left to apply, like showmigrations."""
+    executor = MigrationExecutor(connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+@contextmanager
+def migrate_lock():
+    """Hold the advisory lock serializing migrations."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [MIGRATE_LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_unlock(%s)', [MIGRATE_LOCK_ID]
+            )
+
+
+def parse_importtime(output):
+    """Return the (module, self_us, cumulative_us, depth) rows of
+    `python -X importtime` output, depth 0 for the imports made by the
+    profiled code itself."""
+    rows = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((
+                module, int(self_us), int(cumulative_us),
+                (len(indent) - 1) // 2
+            ))
+    return rows
+
+
+def package_times(rows):
+    """Return the import time of every top level package, summing the
+    self times of its modules, slowest first."""
+    totals = Counter()
+    for module, self_us, _, _ in rows:
+        totals[module.partition('.')[0]] += self_us
+    return totals.most_common()
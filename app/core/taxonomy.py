@@ -0,0 +1,79 @@
+"""
+Two tier caches of the categories and tags, see core/two_tier_cache.py.
+
+They hold the serialized lists of the category and tag endpoints under
+the 'list' key and the name of every category and tag under its id.
+Name searches are cached per query in a namespace of their own. Any
+name may start or stop matching any query, so a change of a category or
+tag drops the namespace as a whole, by bumping its version rather than
+scanning Redis for its keys.
+"""
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import post_cache
+from .models import Category, Tag
+from .two_tier_cache import TwoTierCache
+
+LIST_KEY = 'list'
+
+caches = {
+    Category: TwoTierCache('category'),
+    Tag: TwoTierCache('tag'),
+}
+
+search_caches = {
+    Category: TwoTierCache('category-search'),
+    Tag: TwoTierCache('tag-search'),
+}
+
+
+def names(model, ids):
+    """Return {id: name} of categories or tags."""
+    return caches[model].get_many(
+        ids, lambda missing: dict(
+            model.objects.filter(id__in=missing).values_list('id', 'name')
+        )
+    )
+
+
+def listing(model, build):
+    """Return the serialized list of categories or tags."""
+    return caches[model].get(LIST_KEY, build)
+
+
+def search(model, key, build):
+    """Return the cached results of a name search, see
+    blog/api/v1/search.py."""
+    return search_caches[model].get(key, build)
+
+
+def _invalidate(model, keys):
+    caches[model].invalidate(keys)
+    # Any name may start or stop matching a search.
+    search_caches[model].invalidate()
+
+
+def invalidate(model, ids=None):
+    """Invalidate the list and the names of ids, or every name, along
+    with the name searches.
+
+    Entries are dropped right away, so the rest of the transaction
+    reads its own writes, and again after the commit, so concurrent
+    readers can't cache the previous rows meanwhile.
+    """
+    keys = None if ids is None else [LIST_KEY, *ids]
+    if connection.in_atomic_block:
+        _invalidate(model, keys)
+    transaction.on_commit(lambda: _invalidate(model, keys))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def invalidate_taxonomy(sender, instance, **kwargs):
+    invalidate(sender, [instance.id])
+    # Posts lists show the names of their categories and tags.
+    post_cache.invalidate()
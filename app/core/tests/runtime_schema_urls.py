@@ -0,0 +1,6 @@
+"""
+URLconf generating the schema on every request, see test_schema.
+"""
+from app.urls import runtime_schema_urlpatterns
+
+urlpatterns = runtime_schema_urlpatterns
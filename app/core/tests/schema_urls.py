@@ -0,0 +1,7 @@
+"""
+URLconf serving the schema artifact whatever OPENAPI_SCHEMA_RUNTIME is,
+see test_schema.
+"""
+from app.urls import artifact_schema_urlpatterns
+
+urlpatterns = artifact_schema_urlpatterns
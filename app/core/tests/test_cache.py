@@ -0,0 +1,81 @@
+"""
+Tests for the cache backend and its profile.
+"""
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache import RedisCache, ThresholdCompressor
+
+
+ZLIB = 'django_redis.compressors.zlib.ZlibCompressor'
+
+
+class ThresholdCompressorTests(SimpleTestCase):
+    """Test compressing values above a size threshold."""
+
+    def test_small_values_are_kept(self):
+        """Test values under COMPRESS_MIN_LENGTH aren't compressed."""
+        compressor = ThresholdCompressor(
+            {'COMPRESS_WITH': ZLIB, 'COMPRESS_MIN_LENGTH': 100}
+        )
+
+        self.assertEqual(compressor.compress(b'a' * 99), b'a' * 99)
+
+    def test_large_values_are_compressed(self):
+        """Test values over COMPRESS_MIN_LENGTH are compressed
+        at COMPRESS_LEVEL."""
+        compressor = ThresholdCompressor({
+            'COMPRESS_WITH': ZLIB, 'COMPRESS_MIN_LENGTH': 100,
+            'COMPRESS_LEVEL': 1
+        })
+
+        compressed = compressor.compress(b'a' * 1000)
+
+        self.assertEqual(compressed, zlib.compress(b'a' * 1000, 1))
+        self.assertEqual(compressor.decompress(compressed), b'a' * 1000)
+
+    def test_incompressible_values_are_kept(self):
+        """Test values compression doesn't shrink are kept as is."""
+        compressor = ThresholdCompressor(
+            {'COMPRESS_WITH': ZLIB, 'COMPRESS_MIN_LENGTH': 0}
+        )
+        value = zlib.compress(bytes(range(256)) * 10)
+
+        self.assertEqual(compressor.compress(value), value)
+
+
+class CacheProfileTests(SimpleTestCase):
+    """Test the configured cache profile."""
+
+    def test_round_trips_cached_entries(self):
+        """Test the post list entry and compressed variants are read
+        back from the cache, small or large."""
+        body = b'{"results": []}' * 1000
+        cache.set('test:post_list', (1, (body, 'application/json')))
+        cache.set('test:compressed', zlib.compress(body))
+
+        generation, (content, content_type) = cache.get('test:post_list')
+
+        self.assertEqual(generation, 1)
+        self.assertEqual(content, body)
+        self.assertEqual(content_type, 'application/json')
+        self.assertEqual(cache.get('test:compressed'), zlib.compress(body))
+        cache.delete_many(['test:post_list', 'test:compressed'])
+
+    def test_unreachable_redis_is_a_miss(self):
+        """Test a failing Redis degrades to misses instead of errors."""
+        options = settings.CACHES['default']['OPTIONS']
+        unreachable = RedisCache('redis://127.0.0.1:1/0', {
+            'OPTIONS': {**options, 'IGNORE_EXCEPTIONS': True}
+        })
+
+        with self.assertLogs('django_redis.cache', 'ERROR'):
+            unreachable.set('key', 'value')
+            value = unreachable.get('key', 'default')
+            values = unreachable.get_many(['key'])
+
+        self.assertEqual(value, 'default')
+        self.assertEqual(values, {})
@@ -1,19 +1,48 @@
 """
 Tests for custom django commands.
 """
-from unittest.mock import patch
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import call, patch
 
-from django.test import SimpleTestCase
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 
 from psycopg2 import OperationalError as Psycopg2Error
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from core.management.commands.import_posts import Command as ImportPosts
+from core.management.commands.startup_profile import profile
+from core.startup import package_times, parse_importtime
+from core.models import (
+    Post,
+    Category,
+    Comment,
+    PostImport,
+    Profile,
+    Tag,
+    TagFeed
+)
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
 class WaitForDbCommandTests(SimpleTestCase):
     """Test Commands for wait for db command."""
 
+    def setUp(self):
+        self.probes = {}
+        for probe in ('check_cache', 'check_broker'):
+            patcher = patch(f'core.health.{probe}')
+            self.probes[probe] = patcher.start()
+            self.addCleanup(patcher.stop)
+
     def test_wait_for_db_when_db_ready(self, patched_check):
         """Test waiting for db if db is ready."""
         patched_check.return_value = True
@@ -32,3 +61,430 @@ class WaitForDbCommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_exponential_backoff(
+            self, patched_sleep, patched_check):
+        """Test doubling the delay up to max delay."""
+        patched_check.side_effect = [OperationalError] * 6 + [True]
+
+        call_command('wait_for_db', max_delay=4, stdout=StringIO())
+
+        self.assertEqual(
+            [c.args[0] for c in patched_sleep.call_args_list],
+            [0.5, 1, 2, 4, 4, 4]
+        )
+
+    @patch('time.sleep')
+    def test_wait_for_cache_and_broker(self, patched_sleep, patched_check):
+        """Test waiting for cache after db is available."""
+        self.probes['check_cache'].side_effect = [
+            RedisConnectionError, None
+        ]
+        out = StringIO()
+
+        call_command('wait_for_db', stdout=out)
+
+        self.assertEqual(self.probes['check_cache'].call_count, 2)
+        self.probes['check_broker'].assert_called_once()
+        self.assertEqual(out.getvalue().count('Database is available!'), 1)
+        self.assertIn('Cache is unavailable!', out.getvalue())
+
+    def test_wait_for_db_skip_cache_and_broker(self, patched_check):
+        """Test skipping cache and broker checks."""
+        call_command(
+            'wait_for_db', skip_cache=True, skip_broker=True,
+            stdout=StringIO()
+        )
+
+        self.probes['check_cache'].assert_not_called()
+        self.probes['check_broker'].assert_not_called()
+
+
+@patch('core.management.commands.uwsgi_stats.process_rss')
+@patch('core.management.commands.uwsgi_stats.read_stats')
+class UwsgiStatsCommandTests(SimpleTestCase):
+    """Test Commands for uwsgi stats command."""
+
+    def test_uwsgi_stats_reports_workers(self, patched_read, patched_rss):
+        """Test reporting rss of the master and running workers only."""
+        patched_read.return_value = {
+            'pid': 1,
+            'listen_queue': 0,
+            'workers': [
+                {'id': 1, 'pid': 10, 'status': 'idle', 'rss': 2**20,
+                 'requests': 5, 'avg_rt': 2000},
+                {'id': 0, 'pid': 0, 'status': 'cheap', 'rss': 0,
+                 'requests': 0, 'avg_rt': 0},
+            ]
+        }
+        patched_rss.return_value = 2**20
+        out = StringIO()
+
+        call_command('uwsgi_stats', stdout=out)
+
+        self.assertIn('worker 1 pid=10', out.getvalue())
+        self.assertNotIn('worker 0', out.getvalue())
+        self.assertIn('total rss=2.0MiB', out.getvalue())
+
+    def test_uwsgi_stats_unreachable(self, patched_read, patched_rss):
+        """Test raising CommandError when stats server is down."""
+        patched_read.side_effect = ConnectionRefusedError
+
+        with self.assertRaises(CommandError):
+            call_command('uwsgi_stats')
+
+
+class InsertDataCommandTests(TestCase):
+    """Test Commands for insert data command."""
+
+    def _insert(self, **options):
+        call_command(
+            'insert_data', workers=1, batch_size=4,
+            stdout=StringIO(), **options
+        )
+
+    def test_insert_data_counts(self):
+        """Test inserting the requested number of rows
+        in several batches, including through tables."""
+        self._insert(users=3, posts=10, comments=6, tags=7)
+
+        self.assertEqual(Profile.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 10)
+        self.assertEqual(Comment.objects.count(), 6)
+        self.assertEqual(Tag.objects.count(), 7)
+        self.assertEqual(
+            Post.comments.through.objects.count(), 6
+        )
+        for post in Post.objects.all():
+            self.assertEqual(post.categories.count(), 2)
+            self.assertGreaterEqual(post.tags.count(), 1)
+
+    def test_insert_data_is_deterministic(self):
+        """Test generating the same posts for the same seed."""
+        self._insert(posts=5, seed=7)
+        first = list(Post.objects.order_by('id').values_list(
+            'title', 'content'))
+        Post.objects.all().delete()
+
+        self._insert(posts=5, seed=7)
+        second = list(Post.objects.order_by('id').values_list(
+            'title', 'content'))
+
+        self.assertEqual(first, second)
+
+    def test_insert_data_reports_inserted_rows(self):
+        """Test reporting the comments actually inserted, none
+        without posts to comment."""
+        out = StringIO()
+
+        call_command(
+            'insert_data', posts=0, comments=6, workers=1, stdout=out
+        )
+
+        self.assertIn('1 users, 0 posts and 0 comments.', out.getvalue())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_insert_data_without_users_raises_error(self):
+        """Test at least one user is required."""
+        with self.assertRaises(CommandError):
+            self._insert(users=0)
+
+
+class ImportPostsCommandTests(TestCase):
+    """Test Commands for import posts command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='Test@example.com', password='T123@example'
+        )
+        self.profile = Profile.objects.get(user=self.user)
+        self.category = Category.objects.create(user=self.user, name='Web')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_ndjson(self, records, name='posts.ndjson'):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+        return path
+
+    def record(self, number, **fields):
+        return {
+            'author_email': 'test@example.com', 'title': f'Post {number}',
+            'content': 'Sample content', 'status': True,
+            'published_date': '2023-10-12T16:48:32Z', **fields
+        }
+
+    def import_posts(self, path, **options):
+        out, err = StringIO(), StringIO()
+        options.setdefault('workers', 1)
+        call_command('import_posts', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        """Test importing posts with tags by name and category ids,
+        skipping invalid records."""
+        path = self.write_ndjson([
+            self.record(1, tags=['Python', 'Django']),
+            self.record(2, category_ids=[self.category.id], tags=['Python']),
+            self.record(3, published_date='yesterday'),
+            self.record(4, author_email='nobody@example.com'),
+        ])
+
+        out, err = self.import_posts(path, mmap=True)
+
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['Django', 'Python']
+        )
+        post = Post.objects.get(title='Post 2')
+        self.assertEqual(post.author, self.profile)
+        self.assertEqual(list(post.categories.all()), [self.category])
+        self.assertEqual(TagFeed.objects.filter(post=post).count(), 1)
+        self.assertIn('Record 3: Invalid published_date', err)
+        self.assertIn('Record 4: Unknown author.', err)
+        self.assertIn('Imported 2 posts, skipped 2 records.', out)
+
+    def test_import_gzip_csv(self):
+        """Test importing a gzip compressed CSV file in a process pool,
+        like the ones exported, and falling back to --author."""
+        path = os.path.join(self.directory.name, 'posts.csv.gz')
+        with gzip.open(path, 'wt', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([
+                'id', 'author_id', 'title', 'content', 'status',
+                'published_date', 'category_ids', 'tag_ids'
+            ])
+            for number in range(5):
+                writer.writerow([
+                    number, '', f'Post {number}', 'Line,\n\tand \\ more',
+                    'True', '2023-10-12T16:48:32+00:00',
+                    str(self.category.id), ''
+                ])
+
+        self.import_posts(
+            path, workers=2, batch_size=2, author='test@example.com'
+        )
+
+        self.assertEqual(Post.objects.count(), 5)
+        post = Post.objects.get(title='Post 4')
+        self.assertEqual(post.content, 'Line,\n\tand \\ more')
+        self.assertTrue(post.status)
+        self.assertEqual(list(post.categories.all()), [self.category])
+
+    def test_import_resumes_after_last_committed_batch(self):
+        """Test running again after a crash imports the remaining
+        records only."""
+        path = self.write_ndjson([self.record(number) for number in range(5)])
+        write = ImportPosts._write
+        calls = []
+
+        def crash_on_second_batch(command, posts):
+            calls.append(posts)
+            if len(calls) == 2:
+                raise RuntimeError('Crash')
+            return write(command, posts)
+
+        with patch.object(ImportPosts, '_write', crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_posts(path, batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+
+        out, _ = self.import_posts(path, batch_size=2)
+
+        self.assertIn('Resuming after record 2', out)
+        self.assertEqual(
+            sorted(Post.objects.values_list('title', flat=True)),
+            [f'Post {number}' for number in range(5)]
+        )
+        progress = PostImport.objects.get()
+        self.assertEqual((progress.records, progress.imported), (5, 5))
+
+        self.import_posts(path, restart=True)
+        self.assertEqual(Post.objects.count(), 10)
+
+    def test_import_changed_file_needs_restart(self):
+        """Test refusing to resume the import of a file whose content
+        changed, unless restarted."""
+        path = self.write_ndjson([self.record(number) for number in range(2)])
+        self.import_posts(path)
+        self.write_ndjson([self.record(number) for number in range(2, 5)])
+
+        with self.assertRaisesMessage(CommandError, 'use --restart'):
+            self.import_posts(path)
+        self.assertEqual(Post.objects.count(), 2)
+
+        self.import_posts(path, restart=True)
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_import_unknown_format(self):
+        """Test files without a known extension need --format."""
+        path = self.write_ndjson([self.record(1)], name='posts.txt')
+
+        with self.assertRaises(CommandError):
+            self.import_posts(path)
+        self.import_posts(path, format='ndjson')
+        self.assertEqual(Post.objects.count(), 1)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class BenchmarkCommandTests(TestCase):
+    """Test Commands for benchmark command."""
+
+    def test_benchmark_list_serializers(self):
+        """Test reporting rows per second of both list serializers."""
+        call_command(
+            'insert_data', users=2, posts=5, workers=1, stdout=StringIO()
+        )
+        out = StringIO()
+
+        call_command(
+            'benchmark', 'list_serializers', rows=5, repeat=1, stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('PostSerializer'))
+        self.assertTrue(lines[1].startswith('PostListSerializer'))
+        self.assertIn('rows/s', lines[1])
+
+    def test_benchmark_post_columns_reports_peak_memory(self):
+        """Test reporting the peak memory of full and deferred posts."""
+        call_command(
+            'insert_data', posts=3, paragraphs=3, workers=1,
+            stdout=StringIO()
+        )
+        out = StringIO()
+
+        call_command(
+            'benchmark', 'post_columns', rows=3, repeat=1, stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('Post deferred'))
+        self.assertTrue(lines[1].endswith('KiB peak'))
+
+
+@patch('core.warming.warm')
+class WarmCacheCommandTests(SimpleTestCase):
+    """Test Commands for warm cache command."""
+
+    def test_warm_cache_passes_options(self, patched_warm):
+        """Test warming with the given pages and workers."""
+        patched_warm.return_value = 12
+        out = StringIO()
+
+        call_command('warm_cache', pages=2, workers=3, stdout=out)
+
+        patched_warm.assert_called_once_with(2, 3)
+        self.assertIn('Warmed 12 pages', out.getvalue())
+
+
+@patch('core.management.commands.startup.call_command')
+class StartupCommandTests(TestCase):
+    """Test Commands for startup command."""
+
+    def startup(self, *args):
+        out = StringIO()
+        call_command('startup', '--skip-warm', *args, stdout=out)
+        return out.getvalue()
+
+    def test_startup_collects_changed_static_files(self, patched_call):
+        """Test collecting static files once until their sources
+        change, reporting the phases."""
+        with override_settings(STATIC_ROOT=tempfile.mkdtemp()):
+            first = self.startup('--migrations', 'skip')
+            second = self.startup('--migrations', 'skip')
+            with patch('core.startup.static_sources_hash') as patched_hash:
+                patched_hash.return_value = 'changed'
+                self.startup('--migrations', 'skip')
+
+        collects = [
+            args for args in patched_call.call_args_list
+            if args[0][0] == 'collectstatic'
+        ]
+        self.assertEqual(len(collects), 2)
+        self.assertIn('wait_for_db: done in', first)
+        self.assertIn('collectstatic: skipped', second)
+
+    def test_startup_skips_applied_migrations(self, patched_call):
+        """Test not migrating when the plan is empty."""
+        out = self.startup('--skip-static')
+
+        self.assertIn('migrate: skipped, no migrations to apply', out)
+        self.assertNotIn(
+            call('migrate', interactive=False, verbosity=0),
+            patched_call.call_args_list
+        )
+
+    @patch('core.startup.migration_plan')
+    def test_startup_applies_migrations(self, patched_plan, patched_call):
+        """Test migrating pending migrations under the lock."""
+        patched_plan.return_value = ['0042_pending']
+
+        out = self.startup('--skip-static')
+
+        patched_call.assert_called_with(
+            'migrate', interactive=False, verbosity=0
+        )
+        self.assertIn('migrate: applied 1 migrations', out)
+
+    @patch('core.startup.migration_plan')
+    def test_startup_waiting_for_migrations_times_out(
+        self, patched_plan, patched_call
+    ):
+        """Test raising CommandError when a migrate job doesn't
+        apply the migrations in time."""
+        patched_plan.return_value = ['0042_pending']
+
+        with self.assertRaises(CommandError):
+            self.startup(
+                '--skip-static', '--migrations', 'wait',
+                '--migrations-timeout', '0'
+            )
+
+
+class StartupProfileCommandTests(SimpleTestCase):
+    """Test Commands for startup profile command."""
+
+    def test_worker_starts_within_budget(self):
+        """Test a worker is ready within its STARTUP_BUDGETS."""
+        out = StringIO()
+
+        call_command(
+            'startup_profile', process=['worker'], check=True, stdout=out
+        )
+
+        self.assertIn('worker: ready in', out.getvalue())
+        self.assertIn('slowest imports (cumulative)', out.getvalue())
+
+    def test_worker_skips_request_only_modules(self):
+        """Test workers don't import views, the schema generation,
+        the admin modules nor DRF serializers on startup."""
+        _, rows = profile('worker')
+
+        modules = {row[0] for row in rows}
+        self.assertIn('app.celery_config', modules)
+        for module in ('blog.api.v1.views', 'drf_spectacular.views',
+                       'core.admin', 'rest_framework.serializers',
+                       'mail_templated'):
+            self.assertNotIn(module, modules)
+
+    def test_parse_importtime(self):
+        """Test reading modules, times and depths of importtime."""
+        rows = parse_importtime(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   json.decoder\n'
+            'import time:       300 |        420 | json\n'
+            'import time:        80 |        80 | csv\n'
+        )
+
+        self.assertEqual(rows, [
+            ('json.decoder', 120, 120, 1), ('json', 300, 420, 0),
+            ('csv', 80, 80, 0)
+        ])
+        self.assertEqual(package_times(rows), [('json', 420), ('csv', 80)])
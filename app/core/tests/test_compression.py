@@ -0,0 +1,87 @@
+"""
+Tests for the compression middleware.
+"""
+import gzip
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import compression
+from core.compression import CompressionMiddleware, negotiate
+
+
+PAYLOAD = b'{"results": [' + b'{"title": "Sample title"},' * 50 + b'{}]}'
+
+
+def json_response(content=PAYLOAD, **attrs):
+    response = HttpResponse(content, content_type='application/json')
+    for name, value in attrs.items():
+        setattr(response, name, value)
+    return response
+
+
+class NegotiateTests(SimpleTestCase):
+    """Test choosing the encoding of Accept-Encoding headers."""
+
+    def test_gzip(self):
+        """Test choosing gzip."""
+        self.assertEqual(negotiate('gzip, deflate'), 'gzip')
+
+    def test_quality_values(self):
+        """Test honouring q values and refusals."""
+        self.assertEqual(negotiate('identity'), None)
+        self.assertEqual(negotiate('gzip;q=0'), None)
+        # The wildcard covers the other encodings, if any is installed.
+        self.assertIn(negotiate('*;q=0.5, gzip;q=0'), (None, 'br', 'zstd'))
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_prefers_best_quality_then_server_order(self):
+        """Test the client preference first, then ours."""
+        self.assertEqual(negotiate('gzip, br;q=0.5'), 'gzip')
+        self.assertEqual(negotiate('gzip, br'), 'br')
+
+
+@override_settings(COMPRESSION_MIN_LENGTH=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _get(self, response, accept='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compress_json(self):
+        """Test compressing a JSON response."""
+        response = self._get(json_response())
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), PAYLOAD)
+
+    def test_skip_small_streaming_and_unaccepted(self):
+        """Test leaving alone responses not worth compressing."""
+        small = self._get(json_response(b'{}'))
+        streaming = self._get(StreamingHttpResponse(
+            [PAYLOAD], content_type='application/json'
+        ))
+        unaccepted = self._get(json_response(), accept='identity')
+
+        for response in (small, streaming, unaccepted):
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_reuse_cached_compressed_body(self):
+        """Test serving the cached compressed body of a cached list."""
+        cache.delete('test-compression:gzip')
+        self._get(json_response(compression_cache_key='test-compression'))
+
+        response = self._get(json_response(
+            b'{"changed": true}' * 10,
+            compression_cache_key='test-compression'
+        ))
+
+        self.assertEqual(gzip.decompress(response.content), PAYLOAD)
+        cache.delete('test-compression:gzip')
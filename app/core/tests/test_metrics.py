@@ -0,0 +1,105 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from prometheus_client import REGISTRY
+
+from core import metrics
+
+
+METRICS_URL = reverse('metrics')
+LIST_POST_URL = reverse('blog:api-blog:post-list')
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsApiTests(TestCase):
+    """Test the metrics exposition."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_metrics_exposition(self):
+        """Test exposing request latency by route and status."""
+        self.client.get(LIST_POST_URL)
+
+        res = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer secret'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",'
+            'route="blog:api-blog:post-list",status="200"}', body
+        )
+        self.assertIn('http_request_db_queries_bucket', body)
+        self.assertIn('http_requests_in_progress', body)
+        self.assertIn('post_list_cache_total', body)
+        self.assertIn('celery_queue_depth', body)
+
+    def test_metrics_token_required(self):
+        """Test rejecting scrapes without the configured token."""
+        for authorization in ('', 'Bearer wrong'):
+            res = self.client.get(
+                METRICS_URL, HTTP_AUTHORIZATION=authorization
+            )
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_metrics_not_served_without_token(self):
+        """Test refusing every scrape outside DEBUG without a token."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=True)
+    def test_metrics_open_in_debug_without_token(self):
+        """Test serving scrapes without a token in DEBUG."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class CeleryMetricsTests(TestCase):
+    """Test Celery signal handlers."""
+
+    def test_task_duration_and_failure(self):
+        """Test recording task run time and failures."""
+        task = SimpleNamespace(name='sample_task')
+
+        metrics.task_prerun(task_id='1', task=task)
+        metrics.task_postrun(task_id='1', task=task, state='SUCCESS')
+        metrics.task_failure(sender=task, exception=ValueError())
+
+        self.assertEqual(REGISTRY.get_sample_value(
+            'celery_task_duration_seconds_count',
+            {'task': 'sample_task', 'state': 'SUCCESS'}
+        ), 1)
+        self.assertEqual(REGISTRY.get_sample_value(
+            'celery_task_failures_total',
+            {'task': 'sample_task', 'exception': 'ValueError'}
+        ), 1)
+
+    def test_mark_process_dead(self):
+        """Test dropping the live gauges of an exited process only."""
+        with tempfile.TemporaryDirectory() as directory:
+            names = ['gauge_livesum_123.db', 'counter_123.db']
+            for name in names:
+                open(os.path.join(directory, name), 'wb').close()
+
+            with patch.dict(
+                os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}
+            ):
+                metrics.worker_process_shutdown(pid=123)
+
+            self.assertEqual(os.listdir(directory), ['counter_123.db'])
@@ -0,0 +1,28 @@
+"""
+Tests for the process pool helpers.
+"""
+from multiprocessing.pool import ThreadPool
+
+from django.test import SimpleTestCase
+
+from core.pool import ordered_map
+
+
+class OrderedMapTests(SimpleTestCase):
+    """Test mapping through a pool a few items ahead."""
+
+    def test_results_in_order_and_items_consumed_lazily(self):
+        """Test yielding results in order while only pulling `ahead`
+        items in advance."""
+        consumed = []
+
+        def items():
+            for item in range(10):
+                consumed.append(item)
+                yield item
+
+        with ThreadPool(2) as pool:
+            results = ordered_map(pool, abs, items(), ahead=3)
+            self.assertEqual(next(results), 0)
+            self.assertEqual(len(consumed), 3)
+            self.assertEqual(list(results), list(range(1, 10)))
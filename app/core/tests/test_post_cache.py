@@ -0,0 +1,94 @@
+"""
+Tests for the post list cache.
+"""
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core import post_cache
+
+
+class PostCacheTests(TestCase):
+    """Test building, invalidating and serving the post list."""
+
+    def setUp(self):
+        cache.delete_many([
+            post_cache.KEY, post_cache.GENERATION_KEY, post_cache.LOCK_KEY
+        ])
+
+    def _generation(self):
+        return cache.get(post_cache.GENERATION_KEY, 0)
+
+    def test_build_once_then_hit(self):
+        """Test building the list on a miss and reusing it."""
+        build = Mock(return_value=['post'])
+
+        self.assertEqual(post_cache.get_or_build(build), (0, ['post']))
+        self.assertEqual(post_cache.get_or_build(build), (0, ['post']))
+
+        build.assert_called_once_with()
+
+    def test_invalidate_waits_for_commit(self):
+        """Test invalidating only once the transaction commits."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            post_cache.invalidate()
+            self.assertEqual(self._generation(), 0)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self._generation(), 0)
+
+    def test_coalesce_invalidations(self):
+        """Test invalidating once for many committed writes."""
+        with post_cache.coalesce():
+            for _ in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    post_cache.invalidate()
+            self.assertEqual(self._generation(), 0)
+
+        self.assertNotEqual(self._generation(), 0)
+
+    def test_outdated_entry_is_rebuilt(self):
+        """Test rebuilding the list after an invalidation."""
+        post_cache.get_or_build(lambda: ['old'])
+        post_cache.bump_generation()
+        generation = self._generation()
+
+        self.assertEqual(
+            post_cache.get_or_build(lambda: ['new']), (generation, ['new'])
+        )
+        self.assertEqual(
+            post_cache.get_or_build(lambda: ['newer']), (generation, ['new'])
+        )
+
+    @override_settings(POST_LIST_CACHE_SWR=True)
+    def test_stale_while_revalidate(self):
+        """Test serving the outdated list while another
+        reader holds the rebuild lock."""
+        post_cache.get_or_build(lambda: ['old'])
+        post_cache.bump_generation()
+        lock = cache.lock(post_cache.LOCK_KEY, timeout=5)
+        lock.acquire(blocking=False)
+
+        try:
+            self.assertEqual(
+                post_cache.get_or_build(lambda: ['new']), (0, ['old'])
+            )
+        finally:
+            lock.release()
+
+        self.assertEqual(
+            post_cache.get_or_build(lambda: ['new']),
+            (self._generation(), ['new'])
+        )
+
+    def test_lost_generation_does_not_revive_entries(self):
+        """Test entries of generations counted before the generation
+        key was lost are outdated by the next invalidation."""
+        cache.set(post_cache.KEY, (1, ['old']))
+        post_cache.bump_generation()
+
+        self.assertEqual(
+            post_cache.get_or_build(lambda: ['new'])[1], ['new']
+        )
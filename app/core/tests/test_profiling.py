@@ -0,0 +1,114 @@
+"""
+Tests for the profiling middleware and report command.
+"""
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import post_cache, profiling
+
+
+LIST_POST_URL = reverse('blog:api-blog:post-list')
+
+
+@override_settings(
+    PROFILING_REDIS_PREFIX='test-profiling', PROFILING_HEADER='X-Profile',
+    PROFILING_SECRET='secret'
+)
+class ProfilingMiddlewareTests(TestCase):
+    """Test profiling requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.delete_many([post_cache.KEY, post_cache.GENERATION_KEY])
+
+    def tearDown(self):
+        profiling.reset()
+
+    def test_not_profiled_without_header(self):
+        """Test requests are not profiled by default."""
+        res = self.client.get(LIST_POST_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(profiling.load_routes(), {})
+
+    def test_profiled_with_header(self):
+        """Test returning Server-Timing and aggregating the route."""
+        res = self.client.get(LIST_POST_URL, HTTP_X_PROFILE='secret')
+
+        self.assertIn('sql;dur=', res['Server-Timing'])
+        self.assertIn('serializer;dur=', res['Server-Timing'])
+        # The cached list and its generation.
+        self.assertIn('0 hits, 2 misses', res['Server-Timing'])
+        routes = profiling.load_routes()
+        stats = routes['GET blog:api-blog:post-list']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['cache_misses'], 2)
+
+    def test_not_profiled_without_secret(self):
+        """Test anonymous clients sending the header get no profile and
+        store nothing, nor when no secret is configured."""
+        res = self.client.get(LIST_POST_URL, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(profiling.load_routes(), {})
+        with self.settings(PROFILING_SECRET=None):
+            res = self.client.get(LIST_POST_URL, HTTP_X_PROFILE='secret')
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(profiling.load_routes(), {})
+
+    @override_settings(DEBUG=True)
+    def test_profiled_with_any_value_in_debug(self):
+        """Test any header value profiles in development."""
+        res = self.client.get(LIST_POST_URL, HTTP_X_PROFILE='1')
+
+        self.assertIn('Server-Timing', res)
+
+    @override_settings(PROFILING_HEADER=None)
+    def test_header_disabled_by_default(self):
+        """Test the header is ignored unless configured."""
+        res = self.client.get(LIST_POST_URL, HTTP_X_PROFILE='secret')
+
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_profiled_by_setting(self):
+        """Test profiling every request when enabled in settings."""
+        res = self.client.get(LIST_POST_URL)
+
+        self.assertIn('Server-Timing', res)
+
+    def test_report_command(self):
+        """Test printing the aggregated routes."""
+        self.client.get(LIST_POST_URL, HTTP_X_PROFILE='secret')
+        out = StringIO()
+
+        call_command('profiling_report', '--reset', stdout=out)
+
+        self.assertIn('GET blog:api-blog:post-list', out.getvalue())
+        self.assertEqual(profiling.load_routes(), {})
+
+
+class RequestProfileTests(TestCase):
+    """Test counters of a request profile."""
+
+    @override_settings(PROFILING_N_PLUS_ONE_THRESHOLD=3)
+    def test_duplicate_queries(self):
+        """Test counting duplicates and detecting N+1 statements."""
+        profile = profiling.RequestProfile()
+
+        def execute(sql, params, many, context):
+            return None
+
+        for _ in range(3):
+            profile(execute, 'SELECT 1', (), False, {})
+        profile(execute, 'SELECT 2', (), False, {})
+
+        self.assertEqual(profile.sql_count, 4)
+        self.assertEqual(profile.duplicate_count, 2)
+        self.assertEqual(profile.n_plus_one(), ['SELECT 1'])
@@ -0,0 +1,79 @@
+"""
+Tests for publishing scheduled posts.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from core import post_cache, publishing
+from core.models import Post, Profile, Tag, TagFeed
+
+
+class PublishDueTests(TestCase):
+    """Test the publish_due_posts beat task."""
+
+    def setUp(self):
+        cache.delete_many([
+            publishing.WATERMARK_KEY, publishing.LOCK_KEY,
+            post_cache.GENERATION_KEY
+        ])
+        user = get_user_model().objects.create_user(
+            email='Test@example.com', password='T123@example'
+        )
+        self.tag = Tag.objects.create(user=user, name='Python')
+        self.now = timezone.now()
+        self.post = Post.objects.create(
+            author=Profile.objects.get(user=user), title='Scheduled',
+            content='Sample content', status=True,
+            published_date=self.now + timedelta(hours=1)
+        )
+        self.post.tags.add(self.tag)
+
+    def publish_due(self, now):
+        with self.captureOnCommitCallbacks(execute=True):
+            return publishing.publish_due(now)
+
+    def test_scheduled_post_is_published_once_due(self):
+        """Test adding feed rows and invalidating the post list
+        once the published date passed."""
+        self.assertFalse(Post.objects.published().exists())
+        self.assertFalse(TagFeed.objects.exists())
+
+        with patch('core.warming.warm') as warm:
+            self.assertEqual(self.publish_due(self.now), 0)
+            warm.assert_not_called()
+            with patch('django.utils.timezone.now') as now:
+                now.return_value = self.now + timedelta(hours=2)
+                published = self.publish_due(now.return_value)
+
+        self.assertEqual(published, 1)
+        warm.assert_called_once_with()
+        self.assertIsNotNone(cache.get(post_cache.GENERATION_KEY))
+        self.assertEqual(
+            cache.get(publishing.WATERMARK_KEY),
+            (self.now + timedelta(hours=2)).timestamp()
+        )
+
+    def test_runs_continue_from_the_watermark(self):
+        """Test posts due before the last run aren't published again."""
+        with patch('core.warming.warm'):
+            self.publish_due(self.now + timedelta(hours=2))
+            published = self.publish_due(self.now + timedelta(hours=3))
+
+        self.assertEqual(published, 0)
+
+    def test_concurrent_run_is_skipped(self):
+        """Test a run holding the lock keeps others out."""
+        lock = cache.lock(publishing.LOCK_KEY, timeout=5)
+        lock.acquire(blocking=False)
+
+        try:
+            self.assertIsNone(
+                publishing.publish_due(self.now + timedelta(hours=2))
+            )
+        finally:
+            lock.release()
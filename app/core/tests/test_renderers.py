@@ -0,0 +1,65 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import io
+import uuid
+from decimal import Decimal
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test rendering responses with orjson."""
+
+    def test_render_native_and_drf_types(self):
+        """Test rendering datetimes, UUIDs, Decimals and lazy strings."""
+        data = {
+            'date': datetime(2023, 10, 12, 16, 48, 32, tzinfo=timezone.utc),
+            'uuid': uuid.UUID(int=1),
+            'price': Decimal('1.50'),
+            'label': gettext_lazy('Sample'),
+            1: 'int key',
+        }
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(
+            rendered,
+            b'{"date":"2023-10-12T16:48:32Z",'
+            b'"uuid":"00000000-0000-0000-0000-000000000001",'
+            b'"price":1.5,"label":"Sample","1":"int key"}'
+        )
+
+    def test_render_none(self):
+        """Test rendering no data as an empty body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_render_indented(self):
+        """Test indenting when the client asks for it."""
+        rendered = ORJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=2'
+        )
+
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test parsing request bodies with orjson."""
+
+    def test_parse(self):
+        """Test parsing a JSON body."""
+        data = ORJSONParser().parse(io.BytesIO('{"name": "é"}'.encode()))
+
+        self.assertEqual(data, {'name': 'é'})
+
+    def test_parse_invalid_json(self):
+        """Test raising ParseError on invalid JSON."""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"name": '))
@@ -0,0 +1,80 @@
+"""
+Tests for the OpenAPI schema artifact.
+"""
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import schema
+
+
+@override_settings(ROOT_URLCONF='core.tests.schema_urls')
+class SchemaArtifactTests(SimpleTestCase):
+    """Test serving the schema generated by build_schema."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.settings = override_settings(
+            OPENAPI_SCHEMA_DIR=tempfile.mkdtemp()
+        )
+        cls.settings.enable()
+        cls.artifact = schema.write()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        schema.load.cache_clear()
+        super().tearDownClass()
+
+    def test_latest_schema_is_revalidated(self):
+        """Test the latest schema has an ETag answered with a 304."""
+        url = reverse('api-schema')
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, self.artifact.contents['yaml'])
+        self.assertEqual(res['Cache-Control'], 'public, max-age=3600')
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, 304)
+
+    def test_versioned_schema_is_immutable(self):
+        """Test the versioned schema is cached for good, in the
+        negotiated format, and unknown versions aren't found."""
+        url = reverse('api-schema-version', args=[self.artifact.version])
+
+        res = self.client.get(url, {'format': 'json'})
+
+        self.assertEqual(res.content, self.artifact.contents['json'])
+        self.assertIn('immutable', res['Cache-Control'])
+        res = self.client.get(reverse('api-schema-version', args=['old']))
+        self.assertEqual(res.status_code, 404)
+
+    def test_docs_read_the_versioned_schema(self):
+        """Test Swagger UI is pointed at the versioned schema."""
+        res = self.client.get(reverse('api-docs'))
+
+        self.assertContains(
+            res, reverse('api-schema-version', args=[self.artifact.version])
+        )
+
+
+@override_settings(ROOT_URLCONF='core.tests.runtime_schema_urls')
+class RuntimeSchemaTests(SimpleTestCase):
+    """Test the schema generated on every request in development."""
+
+    @patch('core.schema.load')
+    def test_runtime_schema_is_generated(self, patched_load):
+        """Test the schema is generated without the artifact and docs
+        read it."""
+        res = self.client.get(reverse('api-schema'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(b'openapi:', res.content)
+        self.assertNotIn('Cache-Control', res)
+        patched_load.assert_not_called()
+        self.assertContains(
+            self.client.get(reverse('api-docs')), reverse('api-schema')
+        )
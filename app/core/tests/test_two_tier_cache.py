@@ -0,0 +1,108 @@
+"""
+Tests for the two tier cache.
+"""
+import os
+import json
+import time
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from django_redis import get_redis_connection
+
+from core import two_tier_cache
+from core.two_tier_cache import LRU, TwoTierCache
+
+
+class LRUTests(SimpleTestCase):
+    """Test the in process tier."""
+
+    def test_evicts_least_recently_used(self):
+        """Test dropping the oldest unused key over maxsize."""
+        lru = LRU(maxsize=2, ttl=60)
+        lru.set_many({'a': 1, 'b': 2})
+        lru.get_many(['a'])
+        lru.set_many({'c': 3})
+
+        self.assertEqual(lru.get_many(['a', 'b', 'c']), {'a': 1, 'c': 3})
+
+    def test_entries_expire(self):
+        """Test entries older than ttl are dropped."""
+        lru = LRU(maxsize=2, ttl=0)
+        lru.set_many({'a': 1})
+        time.sleep(0.01)
+
+        self.assertEqual(lru.get_many(['a']), {})
+        self.assertEqual(len(lru), 0)
+
+
+@override_settings(TWO_TIER_CACHE_SIZE=10, TWO_TIER_CACHE_LOCAL_TTL=60)
+class TwoTierCacheTests(SimpleTestCase):
+    """Test looking up and invalidating both tiers."""
+
+    def setUp(self):
+        self.two_tier = TwoTierCache('test-two-tier')
+        cache.delete_pattern('test-two-tier:*')
+
+    def tearDown(self):
+        two_tier_cache._registry.pop('test-two-tier', None)
+
+    def test_lookups_by_tier(self):
+        """Test building once, then serving from Redis in a
+        new worker and from memory afterwards."""
+        build = Mock(return_value={1: 'Django', 2: 'Python'})
+
+        self.assertEqual(
+            self.two_tier.get_many([1, 2], build), {1: 'Django', 2: 'Python'}
+        )
+        # Another worker only shares the Redis tier.
+        other = TwoTierCache('test-two-tier')
+        self.assertEqual(other.get_many([1, 2], build)[1], 'Django')
+        other.get_many([1, 2], build)
+
+        build.assert_called_once_with([1, 2])
+        self.assertEqual(other.stats()['redis_hits'], 2)
+        self.assertEqual(other.stats()['local_hits'], 2)
+        self.assertEqual(other.stats()['hit_rate'], 1)
+        self.assertEqual(self.two_tier.stats()['misses'], 2)
+
+    def test_invalidate_keys(self):
+        """Test dropping keys from both tiers."""
+        self.two_tier.get('list', lambda: ['old'])
+
+        self.two_tier.invalidate(['list'])
+
+        self.assertEqual(self.two_tier.get('list', lambda: ['new']), ['new'])
+
+    def test_invalidate_namespace(self):
+        """Test dropping every key from both tiers without scanning
+        Redis."""
+        self.two_tier.get_many([1, 2], lambda missing: {1: 'a', 2: 'b'})
+
+        with patch.object(cache, 'delete_pattern') as delete_pattern:
+            self.two_tier.invalidate()
+
+        delete_pattern.assert_not_called()
+        self.assertEqual(len(self.two_tier.local), 0)
+        # Nor is it served from Redis to another worker.
+        other = TwoTierCache('test-two-tier')
+        self.assertEqual(other.get(1, lambda: 'new'), 'new')
+
+    def test_invalidation_from_another_worker(self):
+        """Test dropping local entries on messages published
+        by other processes."""
+        self.two_tier.get('list', lambda: ['old'])
+
+        get_redis_connection('default').publish(
+            two_tier_cache.CHANNEL, json.dumps({
+                'pid': os.getpid() + 1,
+                'namespace': 'test-two-tier',
+                'keys': ['list']
+            })
+        )
+        deadline = time.monotonic() + 2
+        while len(self.two_tier.local) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(self.two_tier.local), 0)
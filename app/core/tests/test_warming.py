@@ -0,0 +1,85 @@
+"""
+Tests for warming the cached post lists.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import post_cache, warming
+from core.models import Post, Profile, Tag
+
+
+@override_settings(
+    PUBLIC_BASE_URL='https://blog.example.com',
+    ALLOWED_HOSTS=['blog.example.com', 'testserver']
+)
+class WarmTests(TestCase):
+    """Test rendering the common post lists ahead of readers."""
+
+    def setUp(self):
+        # Entries of earlier tests are outdated.
+        post_cache.bump_generation()
+        user = get_user_model().objects.create_user(
+            email='Test@example.com', password='T123@example'
+        )
+        self.tag = Tag.objects.create(user=user, name='Python')
+        for _ in range(3):
+            post = Post.objects.create(
+                author=Profile.objects.get(user=user), title='Sample',
+                content='Sample content', status=True,
+                published_date='2023-10-12T16:48:32Z'
+            )
+            post.tags.add(self.tag)
+
+    def is_fresh(self, variant):
+        entry = cache.get(post_cache.key(variant))
+        return entry is not None \
+            and entry[0] == cache.get(post_cache.GENERATION_KEY)
+
+    def test_warm_common_lists(self):
+        """Test the first pages of the lists are cached, pages past
+        the end skipped."""
+        # 2 posts per API page, 3 per HTML page.
+        warmed = warming.warm(pages=3, workers=1)
+
+        self.assertEqual(warmed, 2 + 2 + 2 + 2 + 1)
+        for variant in ('', 'page=2', f'tags={self.tag.id}',
+                        'ordering=-published_date', 'html:page=1'):
+            self.assertTrue(self.is_fresh(variant), variant)
+        self.assertFalse(self.is_fresh('page=3'))
+
+    def test_warmed_list_is_served_without_queries(self):
+        """Test readers of a warmed list hit the cache."""
+        warming.warm(pages=1, workers=1)
+
+        with self.assertNumQueries(0):
+            res = APIClient().get(
+                reverse('blog:api-blog:post-list'), {'tags': self.tag.id}
+            )
+            self.client.get(reverse('blog:post'))
+
+        self.assertEqual(res.json()['total_posts'], 3)
+        self.assertTrue(all(
+            post['abs_url'].startswith('https://blog.example.com/')
+            for post in res.json()['results']
+        ))
+
+    @override_settings(PUBLIC_BASE_URL=None)
+    def test_not_warmed_without_public_base_url(self):
+        """Test nothing is warmed without the public URL of the site."""
+        with self.assertLogs('core.warming', 'WARNING'):
+            self.assertEqual(warming.warm(pages=1, workers=1), 0)
+
+        self.assertFalse(self.is_fresh(''))
+
+    @override_settings(PUBLIC_BASE_URL='https://unknown.example.com')
+    def test_failing_pages_are_logged(self):
+        """Test a page failing to render is logged and skipped."""
+        view, path, params = warming.list_pages(pages=1)[0]
+        with self.assertLogs('core.warming', 'ERROR') as logs:
+            self.assertFalse(warming.warm_page(view, path, params))
+
+        self.assertIn('Unable to warm', logs.output[0])
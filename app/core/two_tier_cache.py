@@ -0,0 +1,250 @@
+"""
+Two tier cache: a bounded LRU in each worker in front of Redis.
+
+Meant for small, rarely changing and very often read data like the
+categories and tags. Lookups are served from the worker memory first,
+then from the default cache, then built from the database.
+
+Redis entries are keyed by a version of their namespace.
+`TwoTierCache.invalidate()` deletes the given keys, or bumps the
+version to drop the whole namespace without scanning Redis, and
+publishes the invalidated keys on a Redis channel. Entries of earlier
+versions are left to expire. Every process listens on it
+from a daemon thread, started lazily so that uWSGI workers forked
+after the app was loaded each get their own. Local entries also expire
+after TWO_TIER_CACHE_LOCAL_TTL seconds in case a message is missed.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'two-tier-cache:invalidate'
+LISTEN_TIMEOUT = 30
+
+_registry = {}
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+class LRU:
+    """Thread safe, bounded mapping evicting the least recently used
+    keys, whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                expires, value = entry
+                if expires < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, values):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """Per worker LRU in front of the default cache for a namespace."""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.local = LRU(
+            settings.TWO_TIER_CACHE_SIZE, settings.TWO_TIER_CACHE_LOCAL_TTL
+        )
+        self.hits = {'local': 0, 'redis': 0}
+        self.misses = 0
+        _registry[namespace] = self
+
+    @property
+    def _version_key(self):
+        return f'{self.namespace}:version'
+
+    def _version(self):
+        version = cache.get(self._version_key)
+        if version is None:
+            # Seeded with the time so that losing the key doesn't bring
+            # back the entries of earlier versions.
+            cache.add(self._version_key, time.time_ns(), None)
+            version = cache.get(self._version_key)
+        return version
+
+    def _redis_key(self, key, version):
+        return f'{self.namespace}:{version}:{key}'
+
+    def _count(self, tier, result, amount):
+        if amount:
+            metrics.TWO_TIER_CACHE.labels(
+                self.namespace, tier, result
+            ).inc(amount)
+
+    def get_many(self, keys, build_many):
+        """Return {key: value} of keys, calling build_many(missing) to
+        build the values found in neither tier."""
+        _ensure_listener()
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        self.hits['local'] += len(found)
+        self._count('local', 'hit', len(found))
+        self._count('local', 'miss', len(missing))
+        if not missing:
+            return found
+
+        # Read before building, a concurrent invalidation then outdates
+        # what is built from the previous rows.
+        version = self._version()
+        from_redis = self._get_redis(missing, version)
+        self.hits['redis'] += len(from_redis)
+        self._count('redis', 'hit', len(from_redis))
+        missing = [key for key in missing if key not in from_redis]
+        self.misses += len(missing)
+        self._count('redis', 'miss', len(missing))
+
+        built = build_many(missing) if missing else {}
+        if built:
+            cache.set_many({
+                self._redis_key(key, version): value
+                for key, value in built.items()
+            })
+        self.local.set_many({**from_redis, **built})
+        found.update(from_redis)
+        found.update(built)
+        return found
+
+    def _get_redis(self, keys, version):
+        redis_keys = {key: self._redis_key(key, version) for key in keys}
+        values = cache.get_many(list(redis_keys.values()))
+        return {
+            key: values[redis_key]
+            for key, redis_key in redis_keys.items() if redis_key in values
+        }
+
+    def get(self, key, build):
+        """Return the value of key, calling build() on a miss."""
+        return self.get_many([key], lambda missing: {key: build()})[key]
+
+    def invalidate(self, keys=None):
+        """Drop keys, or the whole namespace, in every worker."""
+        keys = None if keys is None else list(keys)
+        if keys is None:
+            try:
+                cache.incr(self._version_key)
+            except ValueError:
+                cache.add(self._version_key, time.time_ns(), None)
+        elif keys:
+            version = self._version()
+            cache.delete_many([self._redis_key(key, version) for key in keys])
+        _drop(self.namespace, keys)
+        try:
+            get_redis_connection('default').publish(CHANNEL, json.dumps({
+                'pid': os.getpid(),
+                'namespace': self.namespace,
+                'keys': keys
+            }))
+        except RedisError:
+            logger.exception('Unable to publish the invalidation of %s',
+                             self.namespace)
+
+    def stats(self):
+        """Return the lookups of this worker and its hit rates."""
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            'size': len(self.local),
+            'local_hits': self.hits['local'],
+            'redis_hits': self.hits['redis'],
+            'misses': self.misses,
+            'local_hit_rate': self.hits['local'] / lookups if lookups else 0,
+            'hit_rate': sum(self.hits.values()) / lookups if lookups else 0,
+        }
+
+
+def _drop(namespace, keys):
+    two_tier = _registry.get(namespace)
+    if two_tier is None:
+        return
+    if keys is None:
+        two_tier.local.clear()
+    else:
+        two_tier.local.delete_many(keys)
+
+
+def _listen():
+    while True:
+        try:
+            pubsub = get_redis_connection('default').pubsub(
+                ignore_subscribe_messages=True
+            )
+            pubsub.subscribe(CHANNEL)
+            while True:
+                # listen() would hit the socket timeout of the cache
+                # connections whenever nothing is published for a while.
+                message = pubsub.get_message(timeout=LISTEN_TIMEOUT)
+                if message is None:
+                    continue
+                data = json.loads(message['data'])
+                if data['pid'] != os.getpid():
+                    _drop(data['namespace'], data['keys'])
+        except Exception:
+            logger.exception('Two tier cache listener failed, retrying.')
+            # Entries published meanwhile are lost, expire them all.
+            for two_tier in _registry.values():
+                two_tier.local.clear()
+            time.sleep(1)
+
+
+def _ensure_listener():
+    """Start the invalidation listener of the current process."""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        threading.Thread(
+            target=_listen, name='two-tier-cache', daemon=True
+        ).start()
+        _listener_pid = os.getpid()
@@ -0,0 +1,76 @@
+"""
+Operational views.
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.urls import reverse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from . import metrics, schema
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus exposition of the web, cache and Celery metrics.
+    Only served without METRICS_TOKEN in DEBUG."""
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(
+        request.headers.get('Authorization', ''),
+        f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.collect(), content_type=CONTENT_TYPE_LATEST)
+
+
+class SchemaView(SpectacularAPIView):
+    """The OpenAPI schema artifact, see core/schema.py, in the format
+    negotiated like SpectacularAPIView. Versioned URLs are cached for
+    good, the latest version is revalidated with its ETag."""
+
+    def _get_schema_response(self, request):
+        artifact = schema.load()
+        version = self.kwargs.get('version')
+        if version not in (None, artifact.version):
+            raise Http404
+        format = request.accepted_renderer.format
+        etag = f'"{artifact.version}-{format}"'
+        response = get_conditional_response(request, etag=etag) \
+            or HttpResponse(
+                artifact.contents[format],
+                content_type=request.accepted_media_type
+            )
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept'])
+        if version:
+            patch_cache_control(
+                response, public=True, max_age=365 * 24 * 60 * 60,
+                immutable=True
+            )
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE
+            )
+        # Compressed bodies are cached along with the artifact.
+        response.compression_cache_key = f'openapi:{artifact.version}:{format}'
+        return response
+
+
+class SchemaDocsView(SpectacularSwaggerView):
+    """Swagger UI reading the versioned schema artifact."""
+
+    @extend_schema(exclude=True)
+    def get(self, request, *args, **kwargs):
+        self.url = reverse('api-schema-version', args=[schema.load().version])
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,111 @@
+"""
+Warming of the cached post lists.
+
+Post lists are cached lazily, see core/post_cache.py, so after a deploy,
+a cache flush or an invalidation the first readers pay for the queries
+and the rendering. `warm()` renders the first CACHE_WARM_PAGES pages of
+the common lists ahead of them: the default API list, its orderings,
+the lists of the CACHE_WARM_TAXONOMIES most used tags and categories
+and the HTML list.
+
+Pages are rendered by calling the views directly, skipping middlewares,
+by CACHE_WARM_WORKERS threads, each with its own database connection.
+Cached pages hold absolute post URLs, so they're requested on the
+PUBLIC_BASE_URL readers use and nothing is warmed without it.
+It runs from the warm_cache command, after migrations in
+scripts/run.sh, and from the warm_cache Celery task.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import reverse
+
+from .models import Category, Tag
+
+logger = logging.getLogger(__name__)
+
+
+def api_variants():
+    """Yield the query params of the common API post lists."""
+    yield {}
+    for field in ('published_date', '-published_date'):
+        yield {'ordering': field}
+    for field, model in (('tags', Tag), ('categories', Category)):
+        popular = model.objects.with_usage().order_by(
+            '-usage', 'id'
+        ).values_list('id', flat=True)
+        for obj_id in popular[:settings.CACHE_WARM_TAXONOMIES]:
+            yield {field: obj_id}
+
+
+def list_pages(pages=None):
+    """Return the (view, path, params) of the pages to warm."""
+    from blog.api.v1.views import PostModelViewSet
+    from blog.views import PostListView
+
+    # The first pages are cached as the lists without page param.
+    numbers = [{}] + [
+        {'page': number}
+        for number in range(2, (pages or settings.CACHE_WARM_PAGES) + 1)
+    ]
+    api = (
+        PostModelViewSet.as_view({'get': 'list'}),
+        reverse('blog:api-blog:post-list')
+    )
+    html = (PostListView.as_view(), reverse('blog:post'))
+    return [
+        (*api, {**params, **number})
+        for params in api_variants() for number in numbers
+    ] + [(*html, number) for number in numbers]
+
+
+def warm_page(view, path, params):
+    """Render a page through its view, return whether it succeeded.
+    Failures are logged, they don't stop the other pages."""
+    base = urlsplit(settings.PUBLIC_BASE_URL)
+    request = RequestFactory().get(
+        path, params, secure=base.scheme == 'https',
+        HTTP_HOST=base.netloc, HTTP_ACCEPT='application/json'
+    )
+    try:
+        return view(request).status_code == 200
+    except Http404:
+        # Past the last page of a Django list view.
+        return False
+    except Exception:
+        logger.exception('Unable to warm %s %s', path, params)
+        return False
+
+
+def _warm_pages(pages):
+    try:
+        return sum(warm_page(*page) for page in pages)
+    finally:
+        # Every thread opened its own connections.
+        connections.close_all()
+
+
+def warm(pages=None, workers=None):
+    """Warm the common post lists, return the number of pages
+    rendered. Pages past the end of a list are skipped."""
+    if not settings.PUBLIC_BASE_URL:
+        logger.warning('Not warming post lists, PUBLIC_BASE_URL is unset.')
+        return 0
+    to_warm = list_pages(pages)
+    workers = workers or settings.CACHE_WARM_WORKERS
+    if workers == 1:
+        # In the calling thread and its transaction, if any.
+        warmed = sum(warm_page(*page) for page in to_warm)
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            warmed = sum(executor.map(
+                _warm_pages,
+                [to_warm[index::workers] for index in range(workers)]
+            ))
+    logger.info('Warmed %d of %d post list pages.', warmed, len(to_warm))
+    return warmed
@@ -0,0 +1,46 @@
+"""
+Compare the summary.json of two locust runs endpoint by endpoint.
+
+Usage: python compare.py results/<old-run> results/<new-run>
+"""
+import json
+import os
+import sys
+
+COLUMNS = ['rps', 'p50', 'p95', 'p99']
+
+
+def load_summary(results_dir):
+    """Load and return the summary saved by the locustfile."""
+    with open(os.path.join(results_dir, 'summary.json')) as f:
+        return json.load(f)
+
+
+def delta(old, new):
+    """Return the relative change between two values as text."""
+    if not old:
+        return 'n/a'
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def main(old_dir, new_dir):
+    old, new = load_summary(old_dir), load_summary(new_dir)
+    width = max(len(name) for name in new)
+    print(f'{"endpoint":<{width}}  ' + '  '.join(
+        f'{column:>24}' for column in COLUMNS))
+    for name in sorted(new):
+        if name not in old:
+            print(f'{name:<{width}}  (new endpoint)')
+            continue
+        cells = [
+            f'{old[name][c]:>8} -> {new[name][c]:<6}'
+            f'{delta(old[name][c], new[name][c]):>7}'
+            for c in COLUMNS
+        ]
+        print(f'{name:<{width}}  ' + '  '.join(cells))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(__doc__.strip())
+    main(sys.argv[1], sys.argv[2])
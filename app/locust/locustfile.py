@@ -1,34 +1,329 @@
 """
 API's load testing with locust.
+
+User classes are weighted to mimic real traffic: mostly anonymous readers,
+some authors and commenters and a few clients churning through the auth
+endpoints. Accounts and payloads come from fixtures.json and per-endpoint
+latency limits from thresholds.json, both next to this file (override with
+LOCUST_FIXTURES / LOCUST_THRESHOLDS). See run.sh for the headless runner.
 """
-from datetime import datetime
+import json
+import os
+import random
+from datetime import datetime, timezone
 
 from locust import (
     HttpUser,
+    between,
+    events,
     task
 )
+from locust.runners import WorkerRunner
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+POST_LIST_URL = '/blog/api/v1/posts/'
+CATEGORY_LIST_URL = '/blog/api/v1/categories/'
+TAG_LIST_URL = '/blog/api/v1/tags/'
+COMMENT_LIST_URL = '/blog/api/v1/comments/'
+JWT_CREATE_URL = '/user/api/v1/jwt/create/'
+JWT_REFRESH_URL = '/user/api/v1/jwt/refresh/'
+JWT_VERIFY_URL = '/user/api/v1/jwt/verify/'
+TOKEN_LOGIN_URL = '/user/api/v1/token/login/'
+TOKEN_LOGOUT_URL = '/user/api/v1/token/logout/'
+PROFILE_URL = '/user/api/v1/profile/'
+
+
+def load_json(env_name, filename):
+    """Load and return a JSON file next to this locustfile."""
+    path = os.environ.get(env_name, os.path.join(BASE_DIR, filename))
+    with open(path) as f:
+        return json.load(f)
+
 
+FIXTURES = load_json('LOCUST_FIXTURES', 'fixtures.json')
+THRESHOLDS = load_json('LOCUST_THRESHOLDS', 'thresholds.json')
 
-class QuickstartUser(HttpUser):
+
+def post_detail_url(post_id):
+    """Create and return post detail URL."""
+    return f'{POST_LIST_URL}{post_id}/'
+
+
+def random_post_payload():
+    """Create and return a valid post payload from the fixtures."""
+    return {
+        'title': random.choice(FIXTURES['titles']),
+        'content': random.choice(FIXTURES['contents']),
+        'categories': [
+            {'name': name} for name in
+            random.sample(FIXTURES['categories'], 2)
+        ],
+        'tags': [
+            {'name': name} for name in random.sample(FIXTURES['tags'], 2)
+        ],
+        'published_date': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class BlogUser(HttpUser):
+    """Base class sharing the discovered post ids between tasks."""
+    abstract = True
+    wait_time = between(1, 3)
 
     def on_start(self):
-        res = self.client.post('user/api/v1/token/login/', data={
-            "email": "admin@example.com",
-            "password": "123"
-        }).json()
-        self.client.headers = {
-            "Authorization": f"Token {res.get('token', None)}"
-            }
-
-    @task
-    def task_get_post_list(self):
-        self.client.get('blog/api/v1/posts/')
-
-    @task
-    def task_post_sample_post(self):
-        self.client.post('blog/api/v1/posts/', data={
-            'title': 'Sample title',
-            'content': 'Sample content',
-            'status': True,
-            'published_date': datetime.now()
+        self.post_ids = []
+
+    def jwt_login(self):
+        """Login with a fixture account and use the access token."""
+        account = random.choice(FIXTURES['users'])
+        with self.client.post(
+            JWT_CREATE_URL, json=account, catch_response=True
+        ) as res:
+            if res.status_code != 200:
+                res.failure(f'Login failed for {account["email"]}')
+                return None
+            tokens = res.json()
+        self.client.headers['Authorization'] = f'Bearer {tokens["access"]}'
+        return tokens
+
+    def list_posts(self, params=None, name=POST_LIST_URL):
+        """List posts and remember the ids for detail requests."""
+        res = self.client.get(POST_LIST_URL, params=params, name=name)
+        if res.status_code == 200:
+            ids = [post['id'] for post in res.json().get('results', [])]
+            self.post_ids = (ids + self.post_ids)[:100]
+        return res
+
+    def random_post_id(self):
+        if not self.post_ids:
+            self.list_posts()
+        return random.choice(self.post_ids) if self.post_ids else None
+
+
+class AnonymousReader(BlogUser):
+    """Unauthenticated visitor browsing and searching posts."""
+    weight = 10
+
+    @task(10)
+    def post_list(self):
+        self.list_posts(
+            params={'page': random.randint(1, FIXTURES['max_page'])},
+            name=f'{POST_LIST_URL}?page=[n]'
+        )
+
+    @task(5)
+    def post_detail(self):
+        post_id = self.random_post_id()
+        if post_id:
+            self.client.get(
+                post_detail_url(post_id), name=f'{POST_LIST_URL}[id]/'
+            )
+
+    @task(3)
+    def post_filter_by_tag(self):
+        self.list_posts(
+            params={'tags': random.choice(FIXTURES['tag_ids'])},
+            name=f'{POST_LIST_URL}?tags=[id]'
+        )
+
+    @task(3)
+    def post_filter_by_category(self):
+        self.list_posts(
+            params={'categories': random.choice(FIXTURES['category_ids'])},
+            name=f'{POST_LIST_URL}?categories=[id]'
+        )
+
+    @task(2)
+    def post_search(self):
+        self.list_posts(
+            params={'search': random.choice(FIXTURES['search_terms'])},
+            name=f'{POST_LIST_URL}?search=[q]'
+        )
+
+    @task(2)
+    def post_ordering(self):
+        self.list_posts(
+            params={'ordering': random.choice(
+                ['published_date', '-published_date'])},
+            name=f'{POST_LIST_URL}?ordering=[field]'
+        )
+
+    @task(2)
+    def category_list(self):
+        self.client.get(CATEGORY_LIST_URL)
+
+    @task(2)
+    def tag_list(self):
+        self.client.get(TAG_LIST_URL)
+
+    @task(1)
+    def comment_list(self):
+        self.client.get(COMMENT_LIST_URL)
+
+
+class Author(BlogUser):
+    """Authenticated user writing and editing own posts."""
+    weight = 2
+
+    def on_start(self):
+        super().on_start()
+        self.own_post_ids = []
+        self.jwt_login()
+
+    @task(3)
+    def create_post(self):
+        res = self.client.post(POST_LIST_URL, json=random_post_payload())
+        if res.status_code == 201:
+            self.own_post_ids.append(res.json()['id'])
+
+    @task(2)
+    def update_post(self):
+        if not self.own_post_ids:
+            return
+        self.client.patch(
+            post_detail_url(random.choice(self.own_post_ids)),
+            json={'title': random.choice(FIXTURES['titles'])},
+            name=f'{POST_LIST_URL}[id]/'
+        )
+
+    @task(1)
+    def delete_post(self):
+        if len(self.own_post_ids) < 5:
+            return
+        post_id = self.own_post_ids.pop(0)
+        self.client.delete(
+            post_detail_url(post_id), name=f'{POST_LIST_URL}[id]/'
+        )
+
+    @task(4)
+    def post_list(self):
+        self.list_posts()
+
+    @task(1)
+    def profile(self):
+        self.client.get(PROFILE_URL)
+
+
+class Commenter(BlogUser):
+    """Authenticated user reading posts and leaving comments."""
+    weight = 3
+
+    def on_start(self):
+        super().on_start()
+        self.jwt_login()
+
+    @task(4)
+    def post_list(self):
+        self.list_posts()
+
+    @task(3)
+    def post_detail(self):
+        post_id = self.random_post_id()
+        if post_id:
+            self.client.get(
+                post_detail_url(post_id), name=f'{POST_LIST_URL}[id]/'
+            )
+
+    @task(2)
+    def create_comment(self):
+        post_id = self.random_post_id()
+        if post_id:
+            self.client.post(COMMENT_LIST_URL, json={
+                'post_obj': post_id,
+                'comment': random.choice(FIXTURES['comments'])
+            })
+
+    @task(1)
+    def comment_list(self):
+        self.client.get(COMMENT_LIST_URL)
+
+
+class AuthChurner(BlogUser):
+    """Client repeatedly logging in and out with JWT and auth tokens."""
+    weight = 1
+
+    @task(3)
+    def jwt_cycle(self):
+        self.client.headers.pop('Authorization', None)
+        tokens = self.jwt_login()
+        if not tokens:
+            return
+        self.client.post(JWT_VERIFY_URL, json={'token': tokens['access']})
+        self.client.post(JWT_REFRESH_URL, json={'refresh': tokens['refresh']})
+
+    @task(1)
+    def token_cycle(self):
+        self.client.headers.pop('Authorization', None)
+        res = self.client.post(
+            TOKEN_LOGIN_URL, json=random.choice(FIXTURES['users'])
+        )
+        if res.status_code != 200:
+            return
+        self.client.post(TOKEN_LOGOUT_URL, headers={
+            'Authorization': f'Token {res.json()["token"]}'
         })
+
+
+def endpoint_summary(entry):
+    """Return the numbers compared between runs for a stats entry."""
+    return {
+        'requests': entry.num_requests,
+        'failures': entry.num_failures,
+        'rps': round(entry.total_rps, 2),
+        'avg': round(entry.avg_response_time, 2),
+        'p50': entry.get_response_time_percentile(0.50),
+        'p95': entry.get_response_time_percentile(0.95),
+        'p99': entry.get_response_time_percentile(0.99),
+    }
+
+
+def check_thresholds(stats):
+    """Return a list of violated latency/failure thresholds."""
+    violations = []
+    default = THRESHOLDS['default']
+    total = stats.total
+    if total.num_requests and total.fail_ratio > THRESHOLDS['max_fail_ratio']:
+        violations.append(
+            f'fail ratio {total.fail_ratio:.3f} > '
+            f'{THRESHOLDS["max_fail_ratio"]}'
+        )
+    for (name, method), entry in stats.entries.items():
+        if not entry.num_requests:
+            continue
+        limits = dict(default, **THRESHOLDS['endpoints'].get(
+            f'{method} {name}', {}))
+        for percentile in ('p50', 'p95', 'p99'):
+            value = entry.get_response_time_percentile(
+                int(percentile[1:]) / 100)
+            if value > limits[percentile]:
+                violations.append(
+                    f'{method} {name} {percentile} {value}ms > '
+                    f'{limits[percentile]}ms'
+                )
+    return violations
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    """Save a JSON summary and fail the run when thresholds are broken."""
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    stats = environment.stats
+
+    results_dir = os.environ.get('LOCUST_RESULTS_DIR')
+    if results_dir:
+        summary = {
+            f'{method} {name}': endpoint_summary(entry)
+            for (name, method), entry in stats.entries.items()
+        }
+        summary['Aggregated'] = endpoint_summary(stats.total)
+        with open(os.path.join(results_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+
+    violations = check_thresholds(stats)
+    for violation in violations:
+        print(f'THRESHOLD FAILED: {violation}')
+    if violations:
+        environment.process_exit_code = 1
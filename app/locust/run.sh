@@ -0,0 +1,27 @@
+#!/bin/sh
+# Headless load test run with threshold checks.
+#
+# Usage: ./run.sh [host, default http://localhost:8000]
+# Tune with USERS, SPAWN_RATE and RUN_TIME. Results (CSV, HTML report and
+# summary.json) go to results/<date>-<commit>/, compare two runs with
+# `python compare.py results/<old> results/<new>`.
+# Exits non zero when a threshold in thresholds.json is broken.
+
+set -e
+
+cd "$(dirname "$0")"
+
+HOST=${1:-http://localhost:8000}
+REVISION=$(git rev-parse --short HEAD 2>/dev/null || echo local)
+export LOCUST_RESULTS_DIR="results/$(date +%Y%m%d-%H%M%S)-$REVISION"
+mkdir -p "$LOCUST_RESULTS_DIR"
+
+locust -f locustfile.py \
+    --headless \
+    --host "$HOST" \
+    --users "${USERS:-50}" \
+    --spawn-rate "${SPAWN_RATE:-5}" \
+    --run-time "${RUN_TIME:-2m}" \
+    --csv "$LOCUST_RESULTS_DIR/stats" \
+    --html "$LOCUST_RESULTS_DIR/report.html" \
+    --only-summary
@@ -1,6 +1,15 @@
 server {
     listen ${LISTEN_PORT};
 
+    # API responses are compressed by the app (core/compression.py),
+    # nginx leaves responses with a Content-Encoding alone. Streamed
+    # responses, like post exports, aren't compressed by the app.
+    gzip              on;
+    gzip_vary         on;
+    gzip_min_length   500;
+    gzip_types        text/css application/javascript application/json image/svg+xml
+                      application/x-ndjson text/csv;
+
     location /static {
         alias /vol/static;
     }
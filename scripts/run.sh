@@ -2,8 +2,15 @@
 
 set -e
 
-python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Static files and migrations are skipped when unchanged, see
+# core/startup.py. With STARTUP_MIGRATIONS=wait a one-shot job applies
+# the migrations instead.
+python manage.py startup --migrations ${STARTUP_MIGRATIONS:-apply}
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# Prometheus samples shared by the uWSGI workers, see core/metrics.py.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# uWSGI profile from /scripts/uwsgi, see base.ini for overridable settings.
+uwsgi --ini /scripts/uwsgi/${WEB_PROFILE:-prod}.ini
\ No newline at end of file